@@ -0,0 +1,33 @@
+"""
+Cache kết quả giải của thư mục này là module dùng chung 5Stage/result_cache.py (hash gồm
+mã nguồn model ở đây và mọi module 5Stage/ nó dùng), không còn bản sao riêng. Chỉ thư mục
+cache mặc định là .scm_cache/ của thư mục này.
+"""
+import importlib.util
+import os
+import sys
+
+_HERE = os.path.dirname(os.path.abspath(__file__))
+_SHARED = os.path.join(_HERE, os.pardir, '5Stage')
+# solver_backends của 5Stage import theo tên; thêm vào CUỐI sys.path như dynamic_scm_milp.py
+sys.path.append(_SHARED)
+
+
+def _load_shared(name):
+    """Nạp 5Stage/<name>.py dưới tên riêng (trùng tên với module của thư mục này)."""
+    spec = importlib.util.spec_from_file_location(f'shared_{name}', os.path.join(_SHARED, f'{name}.py'))
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[spec.name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+_shared_cache = _load_shared('result_cache')
+_shared_cache.CACHE_DIR = os.environ.get('SCM_CACHE_DIR', os.path.join(_HERE, '.scm_cache'))
+
+CachedSolution = _shared_cache.CachedSolution
+instance_key = _shared_cache.instance_key
+load = _shared_cache.load
+solution_record = _shared_cache.solution_record
+solve_cached = _shared_cache.solve_cached
+store = _shared_cache.store
@@ -0,0 +1,89 @@
+"""
+Chạy mỗi lớp instance (K, m, mode) với mọi backend có sẵn (solver_backends.py), ghi thời
+gian / objective và chọn backend nhanh nhất trong số các backend giải tối ưu với cùng
+objective. Kết quả + lựa chọn ghi ra JSON; trong production đọc lại bằng
+solver_backends.pick_backend(file, 'K4_m2_Pm'). CP-SAT tối ưu trên lưới scale (không
+chứng minh được tối ưu, xem solver_backends.py) được in kèm '*' và không được chọn.
+
+Chạy:
+    python bench_backends.py                                   # lưới mặc định, mọi backend
+    python bench_backends.py --stages 4 --m 1 2 --backends SCIP CBC CP-SAT --time-limit 120
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import time
+
+from benchmark_suite import DEFAULT_M_VALUES, MODES, case_key
+from data_loader import SupplyChainData
+from dynamic_scm_milp import SupplyChainModel
+from scip_log import capture_c_stdout
+from solver_backends import BACKENDS, available_backends
+
+
+def run_case(num_stages, m, mode, backend, time_limit=None):
+    model = SupplyChainModel(SupplyChainData(m=m, mode=mode, num_stages=num_stages), backend=backend)
+    with contextlib.redirect_stdout(io.StringIO()), capture_c_stdout():
+        model.create_variables()
+        model.add_constraints()
+        model.set_objective()
+        if time_limit:
+            model.set_time_limit(time_limit)
+        start = time.perf_counter()
+        optimal = model.solve()
+        solve_time = time.perf_counter() - start
+    grid_optimal = bool(model.cp_sat_info) and model.cp_sat_info['cp_status'] == 'OPTIMAL' and not optimal
+    return {'case': case_key(num_stages, m, mode), 'backend': backend, 'optimal': optimal,
+            'grid_optimal': grid_optimal,
+            'objective': model.get_objective_value() if optimal or grid_optimal else None, 'time': solve_time}
+
+
+def pick_fastest(rows, rel_tol=1e-6):
+    """Backend nhanh nhất trong các backend tối ưu có objective trùng objective tốt nhất."""
+    solved = [r for r in rows if r['optimal']]
+    if not solved:
+        return None
+    best = min(r['objective'] for r in solved)
+    agree = [r for r in solved if abs(r['objective'] - best) <= rel_tol * max(1.0, abs(best))]
+    return min(agree, key=lambda r: r['time'])['backend']
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--stages', type=int, nargs='+', default=[3, 4, 5], choices=[3, 4, 5])
+    parser.add_argument('--m', type=int, nargs='+', default=None, help='mặc định theo số stage')
+    parser.add_argument('--modes', nargs='+', default=MODES, choices=MODES)
+    parser.add_argument('--backends', nargs='+', default=None, choices=BACKENDS, help='mặc định: mọi backend có sẵn')
+    parser.add_argument('--time-limit', type=float, default=300, help='giây, cho mỗi lần giải')
+    parser.add_argument('--out', default='backend_choice.json')
+    args = parser.parse_args(argv)
+
+    backends = [b for b in (args.backends or BACKENDS) if b in available_backends()]
+    print(f"Backends: {', '.join(backends)}")
+    print(f"{'case':>12} | " + " | ".join(f"{b:>10}" for b in backends) + f" | {'fastest':>8}")
+    print("-" * (16 + 13 * len(backends) + 10))
+
+    results, choice = [], {}
+    for K in args.stages:
+        for m in args.m or DEFAULT_M_VALUES[K]:
+            for mode in args.modes:
+                rows = [run_case(K, m, mode, backend, args.time_limit) for backend in backends]
+                results.extend(rows)
+                key = case_key(K, m, mode)
+                choice[key] = pick_fastest(rows)
+                cells = [f"{r['time']:9.2f}s" if r['optimal'] else f"{r['time']:8.2f}s*" if r['grid_optimal']
+                         else f"{'-':>10}" for r in rows]
+                print(f"{key:>12} | " + " | ".join(cells) + f" | {choice[key] or '-':>8}", flush=True)
+                objectives = {r['backend']: r['objective'] for r in rows if r['optimal']}
+                if objectives and max(objectives.values()) - min(objectives.values()) > 1e-6 * max(objectives.values()):
+                    print(f"[WARN] {key}: objective khác nhau giữa các backend: {objectives}")
+
+    with open(args.out, 'w', encoding='utf-8') as f:
+        json.dump({'time_limit': args.time_limit, 'results': results, 'choice': choice}, f, indent=2)
+    print(f"Đã ghi {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+Regression benchmark cho phần BUILD model (không giải):
+thời gian create_variables + add_constraints + set_objective, số biến, số rows
+và số nonzeros theo m = 1..50, cho cả 4-stage và 5-stage.
+
+Mọi họ ràng buộc phải tăng tuyến tính theo T: số rows và nonzeros mỗi khi tăng m
+phải tăng một lượng cố định. Nếu không, script báo lỗi và trả exit code 1.
+
+Chạy:
+    python bench_build.py          # m = 1..50
+    python bench_build.py 20       # m = 1..20
+"""
+
+import contextlib
+import io
+import sys
+import time
+
+from ortools.linear_solver import linear_solver_pb2
+
+from data_loader import SupplyChainData
+from dynamic_scm_milp import SupplyChainModel
+
+
+def build_stats(m, mode='Pm', num_stages=4):
+    """Build 1 model (không solve), trả về dict thống kê kích thước + thời gian build."""
+    data = SupplyChainData(m=m, mode=mode, num_stages=num_stages)
+    model = SupplyChainModel(data)
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        start_time = time.perf_counter()
+        model.create_variables()
+        model.add_constraints()
+        model.set_objective()
+        build_time = time.perf_counter() - start_time
+
+    proto = linear_solver_pb2.MPModelProto()
+    model.solver.ExportModelToProto(proto)
+    nnz = sum(len(c.var_index) for c in proto.constraint)
+
+    return {
+        'm': m,
+        'T': data.T,
+        'num_stages': num_stages,
+        'vars': model.solver.NumVariables(),
+        'rows': model.solver.NumConstraints(),
+        'nnz': nnz,
+        'build_time': build_time,
+    }
+
+
+def is_affine(values):
+    """True nếu values[i+1] - values[i] là hằng số (tăng tuyến tính theo m)."""
+    deltas = {b - a for a, b in zip(values, values[1:])}
+    return len(deltas) <= 1
+
+
+def run_benchmark(m_max=50, num_stages_list=(4, 5)):
+    ok = True
+    for K in num_stages_list:
+        print("=" * 80)
+        print(f"{K}-STAGE MODEL BUILD (m = 1..{m_max})")
+        print("=" * 80)
+        print(f"{'m':>4} | {'T':>5} | {'Vars':>7} | {'Rows':>7} | {'NNZ':>8} | "
+              f"{'Build(s)':>9} | {'us/row':>7}")
+        print("-" * 80)
+
+        stats = []
+        for m in range(1, m_max + 1):
+            s = build_stats(m, num_stages=K)
+            stats.append(s)
+            print(f"{s['m']:>4} | {s['T']:>5} | {s['vars']:>7} | {s['rows']:>7} | {s['nnz']:>8} | "
+                  f"{s['build_time']:>9.4f} | {1e6 * s['build_time'] / s['rows']:>7.1f}", flush=True)
+
+        print("-" * 80)
+        for key in ('vars', 'rows', 'nnz'):
+            values = [s[key] for s in stats]
+            if is_affine(values):
+                step = values[1] - values[0] if len(values) > 1 else 0
+                print(f"  {key:<5}: linear in m (+{step} per unit of m)")
+            else:
+                ok = False
+                print(f"  {key:<5}: NOT linear in m -> quadratic constraint building regression!")
+
+        if m_max >= 2:
+            half = stats[m_max // 2 - 1]
+            full = stats[-1]
+            print(f"  build time m={full['m']} / m={half['m']}: "
+                  f"{full['build_time'] / half['build_time']:.2f}x (linear ~ {full['m'] / half['m']:.2f}x)")
+        print()
+    return ok
+
+
+if __name__ == "__main__":
+    m_max = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    sys.exit(0 if run_benchmark(m_max) else 1)
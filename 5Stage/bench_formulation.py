@@ -0,0 +1,95 @@
+"""
+So sánh formulation mặc định với tight=True (SupplyChainModel(data, tight=True)): cùng
+instance, cùng SCIP, đo
+
+    lp_gap      (objective tối ưu - LP relaxation) / objective
+    root_gap    (objective tối ưu - dual bound sau root node, có cut của SCIP) / objective
+    nodes, solve time
+
+và kiểm tra objective tối ưu của hai formulation trùng nhau (khác -> in [WARN]).
+
+Chạy:
+    python bench_formulation.py                         # 3/4/5-stage, m mặc định, Pm + Pmd
+    python bench_formulation.py --stages 4 --m 1 2 4 --time-limit 300
+"""
+
+import argparse
+import contextlib
+import io
+import time
+
+from data_loader import SupplyChainData
+from dynamic_scm_milp import SupplyChainModel
+from scip_log import capture_c_stdout, parse_scip_log
+
+DEFAULT_M_VALUES = {3: [1, 2, 4], 4: [1, 2, 4], 5: [1, 2]}
+MODES = ['Pm', 'Pmd']
+
+
+def lp_relaxation(model):
+    """Giá trị LP relaxation của model đã build (tính nguyên được khôi phục sau đó)."""
+    integers = [var for var in model.solver.variables() if var.integer()]
+    for var in integers:
+        var.SetInteger(False)
+    model.solver.Solve()
+    value = model.solver.Objective().Value()
+    for var in integers:
+        var.SetInteger(True)
+    return value
+
+
+def run_case(num_stages, m, mode, tight, time_limit=None):
+    data = SupplyChainData(m=m, mode=mode, num_stages=num_stages)
+    model = SupplyChainModel(data, tight=tight)
+    quiet = io.StringIO()
+    with contextlib.redirect_stdout(quiet):
+        model.create_variables()
+        model.add_constraints()
+        model.set_objective()
+    lp = lp_relaxation(model)
+
+    if time_limit:
+        model.solver.SetTimeLimit(int(time_limit * 1000))
+    model.solver.EnableOutput()
+    with contextlib.redirect_stdout(quiet), capture_c_stdout() as log:
+        start = time.perf_counter()
+        optimal = model.solve()
+        solve_time = time.perf_counter() - start
+    stats = parse_scip_log(log['text'])
+
+    objective = model.get_objective_value() if optimal else None
+    gap = lambda bound: (objective - bound) / objective if objective and bound is not None else None
+    return {'rows': model.solver.NumConstraints(), 'optimal': optimal, 'objective': objective,
+            'lp_bound': lp, 'root_bound': stats['root_dual_bound'], 'lp_gap': gap(lp),
+            'root_gap': gap(stats['root_dual_bound']), 'nodes': model.solver.nodes(), 'solve_time': solve_time}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--stages', type=int, nargs='+', default=[3, 4, 5], choices=[3, 4, 5])
+    parser.add_argument('--m', type=int, nargs='+', default=None, help='mặc định theo số stage')
+    parser.add_argument('--modes', nargs='+', default=MODES, choices=MODES)
+    parser.add_argument('--time-limit', type=float, default=None, help='giây, cho mỗi lần giải')
+    args = parser.parse_args(argv)
+
+    pct = lambda v: f"{100 * v:6.2f}%" if v is not None else f"{'-':>7}"
+    print(f"{'case':>12} | {'form':>7} | {'rows':>6} | {'objective':>12} | {'LP gap':>7} | {'root gap':>8} | "
+          f"{'nodes':>7} | {'solve(s)':>8}")
+    print("-" * 90)
+    for K in args.stages:
+        for m in args.m or DEFAULT_M_VALUES[K]:
+            for mode in args.modes:
+                rows = {}
+                for tight in (False, True):
+                    row = rows[tight] = run_case(K, m, mode, tight, args.time_limit)
+                    objective = f"{row['objective']:12,.1f}" if row['objective'] is not None else f"{'-':>12}"
+                    print(f"{f'K{K}_m{m}_{mode}':>12} | {'tight' if tight else 'default':>7} | {row['rows']:>6} | "
+                          f"{objective} | {pct(row['lp_gap'])} | {pct(row['root_gap']):>8} | {row['nodes']:>7} | "
+                          f"{row['solve_time']:8.2f}", flush=True)
+                a, b = rows[False]['objective'], rows[True]['objective']
+                if a is not None and b is not None and abs(a - b) > 1e-6 * max(1.0, abs(a)):
+                    print(f"[WARN] K{K}_m{m}_{mode}: objective default {a:,.4f} != tight {b:,.4f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+Before/after cho bất đẳng thức lot-sizing (lot_sizing.py) trên lưới m = 1..4:
+số dòng thêm, LP relaxation sau khi thêm cut, số node, thời gian (gồm cả thời gian thêm
+cut) và kiểm tra objective tối ưu không đổi.
+
+Chạy:
+    python bench_lot_sizing.py                           # 3-/4-stage m=1..4, 5-stage m=1,2; Pm
+    python bench_lot_sizing.py --stages 4 --m 1 2 3 4 --modes Pm Pmd --time-limit 300
+"""
+
+import argparse
+import contextlib
+import io
+import time
+
+from bench_formulation import lp_relaxation
+from data_loader import SupplyChainData
+from dynamic_scm_milp import SupplyChainModel
+from lot_sizing import add_lot_sizing_cuts
+
+DEFAULT_M_VALUES = {3: [1, 2, 3, 4], 4: [1, 2, 3, 4], 5: [1, 2]}
+CUT_MODES = [None, 'upfront', 'rounds']
+
+
+def run_case(num_stages, m, mode, lot_sizing, time_limit=None):
+    model = SupplyChainModel(SupplyChainData(m=m, mode=mode, num_stages=num_stages), lot_sizing=lot_sizing)
+    with contextlib.redirect_stdout(io.StringIO()):
+        model.create_variables()
+        model.add_constraints()
+        model.set_objective()
+        start = time.perf_counter()
+        model.lot_sizing_rows = []
+        added = add_lot_sizing_cuts(model, lot_sizing) if lot_sizing else 0
+        cut_time = time.perf_counter() - start
+        lp = lp_relaxation(model)
+        if time_limit:
+            model.solver.SetTimeLimit(int(time_limit * 1000))
+        start = time.perf_counter()
+        optimal = model.solve()
+        solve_time = time.perf_counter() - start
+    return {'added': added, 'lp_bound': lp, 'optimal': optimal, 'nodes': model.solver.nodes(),
+            'objective': model.get_objective_value() if optimal else None, 'time': cut_time + solve_time}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--stages', type=int, nargs='+', default=[3, 4, 5], choices=[3, 4, 5])
+    parser.add_argument('--m', type=int, nargs='+', default=None, help='mặc định theo số stage')
+    parser.add_argument('--modes', nargs='+', default=['Pm'], choices=['Pm', 'Pmd'])
+    parser.add_argument('--time-limit', type=float, default=None, help='giây, cho mỗi lần giải')
+    args = parser.parse_args(argv)
+
+    print(f"{'case':>12} | {'cuts':>7} | {'rows':>5} | {'LP bound':>12} | {'objective':>12} | {'nodes':>7} | "
+          f"{'time(s)':>8}")
+    print("-" * 84)
+    for K in args.stages:
+        for m in args.m or DEFAULT_M_VALUES[K]:
+            for mode in args.modes:
+                reference = None
+                for lot_sizing in CUT_MODES:
+                    row = run_case(K, m, mode, lot_sizing, args.time_limit)
+                    objective = f"{row['objective']:12,.1f}" if row['objective'] is not None else f"{'-':>12}"
+                    print(f"{f'K{K}_m{m}_{mode}':>12} | {lot_sizing or 'off':>7} | {row['added']:>5} | "
+                          f"{row['lp_bound']:12,.1f} | {objective} | {row['nodes']:>7} | {row['time']:8.2f}",
+                          flush=True)
+                    if lot_sizing is None:
+                        reference = row['objective']
+                    elif reference is not None and row['objective'] is not None \
+                            and abs(reference - row['objective']) > 1e-6 * max(1.0, abs(reference)):
+                        print(f"[WARN] K{K}_m{m}_{mode} {lot_sizing}: objective {row['objective']:,.4f} "
+                              f"!= {reference:,.4f}")
+
+
+if __name__ == "__main__":
+    main()
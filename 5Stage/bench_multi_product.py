@@ -0,0 +1,91 @@
+"""
+Benchmark MultiProductModel theo số sản phẩm: số cặp (product, supplier), biến, rows,
+nonzeros, thời gian build và (tùy chọn) thời gian giải, objective, best bound, gap.
+
+Dòng P=1 (density=1) còn được so với MatrixSupplyChainModel: objective phải trùng.
+
+Chạy:
+    python bench_multi_product.py                                  # P = 1..500, chỉ build
+    python bench_multi_product.py --solve --time-limit 60
+    python bench_multi_product.py --products 1 10 100 --stages 5 --density 0.3 --solve
+"""
+
+import argparse
+import contextlib
+import io
+import time
+
+from ortools.linear_solver import pywraplp
+
+from data_loader import SupplyChainData
+from matrix_model import MatrixSupplyChainModel
+from multi_product import MultiProductData, MultiProductModel
+
+STATUS = {pywraplp.Solver.OPTIMAL: 'optimal', pywraplp.Solver.FEASIBLE: 'feasible',
+          pywraplp.Solver.INFEASIBLE: 'infeasible', pywraplp.Solver.NOT_SOLVED: 'not_solved'}
+
+
+def run_case(num_products, m=1, mode='Pm', num_stages=4, density=0.5, seed=0,
+             solve=False, time_limit=None):
+    start = time.perf_counter()
+    data = MultiProductData(num_products, m=m, mode=mode, num_stages=num_stages,
+                            density=1.0 if num_products == 1 else density, seed=seed)
+    model = MultiProductModel(data).build()
+    build_time = time.perf_counter() - start
+
+    row = {'P': num_products, 'pairs': len(data.pairs), 'vars': model.n_vars, 'rows': model.n_rows,
+           'nnz': len(model.coefs), 'build_time': build_time, 'status': None, 'solve_time': None,
+           'objective': None, 'bound': None, 'gap': None}
+    if solve:
+        if time_limit:
+            model.solver.SetTimeLimit(int(time_limit * 1000))
+        with contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            status = model.solver.Solve()
+            row['solve_time'] = time.perf_counter() - start
+        row['status'] = STATUS.get(status, str(status))
+        if status in (pywraplp.Solver.OPTIMAL, pywraplp.Solver.FEASIBLE):
+            obj = model.solver.Objective().Value()
+            bound = model.solver.Objective().BestBound()
+            row.update(objective=obj, bound=bound, gap=abs(obj - bound) / max(1.0, abs(obj)))
+    return row
+
+
+def single_product_objective(m, mode, num_stages):
+    with contextlib.redirect_stdout(io.StringIO()):
+        model = MatrixSupplyChainModel(SupplyChainData(m=m, mode=mode, num_stages=num_stages)).build()
+        model.solve()
+    return model.get_objective_value()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--products', type=int, nargs='+', default=[1, 10, 50, 100, 200, 500])
+    parser.add_argument('--m', type=int, default=1)
+    parser.add_argument('--mode', default='Pm', choices=['Pm', 'Pmd'])
+    parser.add_argument('--stages', type=int, default=4, choices=[3, 4, 5])
+    parser.add_argument('--density', type=float, default=0.5, help='xác suất 1 cặp (product, supplier) tồn tại')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--solve', action='store_true')
+    parser.add_argument('--time-limit', type=float, default=None, help='giây, cho mỗi lần giải')
+    args = parser.parse_args(argv)
+
+    print(f"{'P':>4} | {'pairs':>6} | {'vars':>7} | {'rows':>7} | {'nnz':>8} | {'build(s)':>8} | "
+          f"{'status':>10} | {'solve(s)':>8} | {'objective':>12} | {'gap':>7}")
+    print("-" * 104)
+    for P in args.products:
+        row = run_case(P, args.m, args.mode, args.stages, args.density, args.seed, args.solve, args.time_limit)
+        solve_time = f"{row['solve_time']:8.2f}" if row['solve_time'] is not None else f"{'-':>8}"
+        objective = f"{row['objective']:12,.0f}" if row['objective'] is not None else f"{'-':>12}"
+        gap = f"{100 * row['gap']:6.2f}%" if row['gap'] is not None else f"{'-':>7}"
+        print(f"{row['P']:>4} | {row['pairs']:>6} | {row['vars']:>7} | {row['rows']:>7} | {row['nnz']:>8} | "
+              f"{row['build_time']:8.3f} | {row['status'] or '-':>10} | {solve_time} | {objective} | {gap}",
+              flush=True)
+        if P == 1 and row['status'] == 'optimal':
+            ref = single_product_objective(args.m, args.mode, args.stages)
+            if abs(ref - row['objective']) > 1e-6 * max(1.0, abs(ref)):
+                print(f"[WARN] P=1 objective {row['objective']:,.4f} != single-product {ref:,.4f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+Benchmark MatrixSupplyChainModel trên mạng lớn, đo số node / arc / biến / rows / nonzeros,
+thời gian build và (tùy chọn) thời gian giải, objective, gap:
+
+- Chuỗi nối tiếp dài (StageGraph.serial), K = 5..20 stage: mỗi stage thêm 1 khối cân bằng
+  luồng và 1 arc (capacity + in-transit, cứ freight_every arc thì có cước) nên kích thước
+  model phải tăng tuyến tính theo K.
+- Mạng nhiều site (StageGraph.network, --network): plants x DCs x customers, arc thưa.
+
+Chạy:
+    python bench_network.py                      # K = 5, 10, 15, 20; m = 1; không giải
+    python bench_network.py --stages 10 20 --m 2 --solve --time-limit 60
+    python bench_network.py --network --plants 2 --dcs 10 40 --customers 50 300 --solve --time-limit 120
+"""
+
+import argparse
+import contextlib
+import io
+import itertools
+import time
+
+from ortools.linear_solver import pywraplp
+
+from data_loader import SupplyChainData
+from matrix_model import MatrixSupplyChainModel
+from stage_graph import StageGraph
+
+
+def run_graph(data, graph, label, solve=False, time_limit=None, params=None):
+    start = time.perf_counter()
+    model = MatrixSupplyChainModel(data, graph).build()
+    build_time = time.perf_counter() - start
+
+    row = {'case': label, 'nodes': graph.K, 'arcs': len(graph.arcs), 'vars': model.n_vars,
+           'rows': model.n_rows, 'nnz': len(model.coefs), 'build_time': build_time,
+           'solve_time': None, 'objective': None, 'gap': None}
+    if solve:
+        if time_limit:
+            model.solver.SetTimeLimit(int(time_limit * 1000))
+        if params:
+            model.solver.SetSolverSpecificParametersAsString(params)
+        with contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            status = model.solver.Solve()
+            row['solve_time'] = time.perf_counter() - start
+        if status in (pywraplp.Solver.OPTIMAL, pywraplp.Solver.FEASIBLE):
+            obj = model.solver.Objective().Value()
+            bound = model.solver.Objective().BestBound()
+            row.update(objective=obj, gap=abs(obj - bound) / max(1.0, abs(obj)))
+    return row
+
+
+def run_case(num_stages, m=1, mode='Pm', solve=False, time_limit=None, freight_every=2, params=None):
+    data = SupplyChainData(m=m, mode=mode, num_stages=4)
+    graph = StageGraph.serial(data, num_stages, freight_every=freight_every)
+    return run_graph(data, graph, f'K={num_stages}', solve, time_limit, params)
+
+
+def run_network_case(plants, dcs, customers, m=1, mode='Pm', solve=False, time_limit=None,
+                     dcs_per_customer=2, seed=0, params=None):
+    data = SupplyChainData(m=m, mode=mode, num_stages=4)
+    graph = StageGraph.network(data, plants, dcs, customers, dcs_per_customer=dcs_per_customer, seed=seed)
+    return run_graph(data, graph, f'{plants}x{dcs}x{customers}', solve, time_limit, params)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--stages', type=int, nargs='+', default=[5, 10, 15, 20])
+    parser.add_argument('--freight-every', type=int, default=2)
+    parser.add_argument('--network', action='store_true', help='mạng nhiều site thay vì chuỗi nối tiếp')
+    parser.add_argument('--plants', type=int, nargs='+', default=[2])
+    parser.add_argument('--dcs', type=int, nargs='+', default=[10, 40])
+    parser.add_argument('--customers', type=int, nargs='+', default=[50, 300])
+    parser.add_argument('--dcs-per-customer', type=int, default=2)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--m', type=int, default=1)
+    parser.add_argument('--mode', default='Pm', choices=['Pm', 'Pmd'])
+    parser.add_argument('--solve', action='store_true')
+    parser.add_argument('--time-limit', type=float, default=None, help='giây, cho mỗi lần giải')
+    parser.add_argument('--params', default=None,
+                        help="tham số SCIP, ví dụ 'separating/maxroundsroot = 5'")
+    args = parser.parse_args(argv)
+
+    if args.network:
+        cases = [lambda p=p, d=d, c=c: run_network_case(p, d, c, args.m, args.mode, args.solve, args.time_limit,
+                                                        args.dcs_per_customer, args.seed, args.params)
+                 for p, d, c in itertools.product(args.plants, args.dcs, args.customers)]
+    else:
+        cases = [lambda K=K: run_case(K, args.m, args.mode, args.solve, args.time_limit, args.freight_every,
+                                      args.params)
+                 for K in args.stages]
+
+    print(f"{'case':>12} | {'nodes':>5} | {'arcs':>5} | {'vars':>7} | {'rows':>7} | {'nnz':>8} | "
+          f"{'build(s)':>8} | {'solve(s)':>8} | {'objective':>12} | {'gap':>7}")
+    print("-" * 104)
+    for case in cases:
+        row = case()
+        solve_time = f"{row['solve_time']:8.2f}" if row['solve_time'] is not None else f"{'-':>8}"
+        objective = f"{row['objective']:12,.0f}" if row['objective'] is not None else f"{'-':>12}"
+        gap = f"{100 * row['gap']:6.2f}%" if row['gap'] is not None else f"{'-':>7}"
+        print(f"{row['case']:>12} | {row['nodes']:>5} | {row['arcs']:>5} | {row['vars']:>7} | {row['rows']:>7} | "
+              f"{row['nnz']:>8} | {row['build_time']:8.3f} | {solve_time} | {objective} | {gap}", flush=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,218 @@
+"""
+Benchmark suite cho 3-, 4- và 5-stage model, đo RIÊNG từng phase:
+
+    data            SupplyChainData(...)
+    create_variables
+    add_constraints
+    set_objective
+    solve           SCIP (wall time)
+    extract         get_cost_breakdown() + get_purchasing_plan()
+
+Mỗi case còn ghi: số biến (tổng / binary), số rows, nonzeros, objective, và số liệu
+SCIP (presolve time, solving time, node count, LP iterations, root bound) lấy từ
+pywraplp + log SCIP (scip_log.py).
+
+Kết quả ghi ra JSON để so sánh giữa các commit -> biết chậm ở Python model
+assembly hay ở solver.
+
+Chạy:
+    python benchmark_suite.py                          # toàn bộ grid, ghi bench_results.json
+    python benchmark_suite.py --stages 4 --m 1 2       # chỉ 4-stage, m=1,2
+    python benchmark_suite.py --no-solve               # chỉ đo build
+    python benchmark_suite.py --builder matrix         # dùng matrix_model.py
+    python benchmark_suite.py --out new.json --compare bench_baseline.json
+"""
+
+import argparse
+import contextlib
+import datetime
+import io
+import json
+import platform
+import subprocess
+import sys
+import time
+
+import ortools
+from ortools.linear_solver import linear_solver_pb2
+
+from data_loader import SupplyChainData
+from dynamic_scm_milp import SupplyChainModel
+from matrix_model import MatrixSupplyChainModel
+from scip_log import capture_c_stdout, parse_scip_log
+
+# m mặc định cho từng số stage (giống run_sensitivity.py / paper)
+DEFAULT_M_VALUES = {3: [1, 2, 3, 4], 4: [1, 2, 3, 4], 5: [1, 2]}
+MODES = ['Pm', 'Pmd']
+MODEL_CLASSES = {'milp': SupplyChainModel, 'matrix': MatrixSupplyChainModel}
+BUILD_PHASES = ['data', 'create_variables', 'add_constraints', 'set_objective']
+
+# Ngưỡng báo chậm khi so sánh với baseline
+SLOWDOWN_RATIO = 1.25
+MIN_SECONDS = 0.01
+
+
+def case_key(num_stages, m, mode):
+    return f"K{num_stages}_m{m}_{mode}"
+
+
+def run_case(num_stages, m, mode, solve=True, time_limit=None, model_cls=SupplyChainModel):
+    """Chạy 1 case, trả về dict số liệu (JSON-able)."""
+    phases = {}
+    quiet = io.StringIO()
+
+    start = time.perf_counter()
+    data = SupplyChainData(m=m, mode=mode, num_stages=num_stages)
+    phases['data'] = time.perf_counter() - start
+
+    model = model_cls(data)
+    with contextlib.redirect_stdout(quiet):
+        for phase in ('create_variables', 'add_constraints', 'set_objective'):
+            start = time.perf_counter()
+            getattr(model, phase)()
+            phases[phase] = time.perf_counter() - start
+
+    solver = model.solver
+    proto = linear_solver_pb2.MPModelProto()
+    solver.ExportModelToProto(proto)
+
+    result = {
+        'num_stages': num_stages,
+        'm': m,
+        'mode': mode,
+        'T': data.T,
+        'vars': solver.NumVariables(),
+        'binary_vars': sum(1 for v in solver.variables() if v.integer()),
+        'rows': solver.NumConstraints(),
+        'nnz': sum(len(c.var_index) for c in proto.constraint),
+        'phases': phases,
+        'build_time': sum(phases[p] for p in BUILD_PHASES),
+    }
+    if not solve:
+        return result
+
+    if time_limit:
+        solver.SetTimeLimit(int(time_limit * 1000))
+    solver.EnableOutput()
+    with contextlib.redirect_stdout(quiet), capture_c_stdout() as log:
+        start = time.perf_counter()
+        success = model.solve()
+        phases['solve'] = time.perf_counter() - start
+
+    stats = parse_scip_log(log['text'])
+    result.update({
+        'optimal': success,
+        'objective': solver.Objective().Value() if success else None,
+        'nodes': solver.nodes(),
+        'lp_iterations': solver.iterations(),
+        'presolve_time': stats['presolve_time'],
+        'scip_solving_time': stats['solving_time'],
+        'root_lp_bound': stats['root_lp_bound'],
+        'root_dual_bound': stats['root_dual_bound'],
+        'gap': stats['gap'],
+    })
+
+    if success:
+        start = time.perf_counter()
+        model.get_cost_breakdown()
+        model.get_purchasing_plan()
+        phases['extract'] = time.perf_counter() - start
+    return result
+
+
+def _git_commit():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'],
+                                       stderr=subprocess.DEVNULL).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_suite(stages, m_values=None, modes=MODES, solve=True, time_limit=None, builder='milp'):
+    cases = {}
+    for K in stages:
+        for m in (m_values or DEFAULT_M_VALUES[K]):
+            for mode in modes:
+                key = case_key(K, m, mode)
+                res = run_case(K, m, mode, solve=solve, time_limit=time_limit,
+                               model_cls=MODEL_CLASSES[builder])
+                cases[key] = res
+                solve_txt = (f"solve {res['phases']['solve']:7.3f}s nodes {res['nodes']:>6} "
+                             f"obj {res['objective'] if res['objective'] is not None else float('nan'):>12,.1f}"
+                             if solve else "")
+                print(f"{key:<14} rows {res['rows']:>6} nnz {res['nnz']:>7} "
+                      f"build {res['build_time']:7.3f}s {solve_txt}", flush=True)
+    return {
+        'meta': {
+            'timestamp': datetime.datetime.now().isoformat(timespec='seconds'),
+            'git_commit': _git_commit(),
+            'python': platform.python_version(),
+            'ortools': ortools.__version__,
+            'platform': platform.platform(),
+            'builder': builder,
+        },
+        'cases': cases,
+    }
+
+
+def compare(new, old):
+    """In bảng so sánh phase-by-phase giữa 2 lần chạy; trả về False nếu có regression."""
+    ok = True
+    print("=" * 100)
+    print(f"COMPARE {new['meta'].get('git_commit')} vs baseline {old['meta'].get('git_commit')}")
+    print("=" * 100)
+    print(f"{'case':<14} | {'phase':<17} | {'baseline(s)':>11} | {'new(s)':>9} | {'ratio':>6} |")
+    print("-" * 100)
+    for key, res in new['cases'].items():
+        base = old['cases'].get(key)
+        if base is None:
+            continue
+        for phase, t_new in res['phases'].items():
+            t_old = base['phases'].get(phase)
+            if t_old is None:
+                continue
+            ratio = t_new / t_old if t_old > 0 else float('inf')
+            flag = ''
+            if ratio > SLOWDOWN_RATIO and t_new - t_old > MIN_SECONDS:
+                flag = '<-- SLOWER (' + ('model assembly' if phase in BUILD_PHASES else 'solver') + ')'
+                ok = False
+            print(f"{key:<14} | {phase:<17} | {t_old:>11.4f} | {t_new:>9.4f} | {ratio:>6.2f} | {flag}")
+        for field in ('rows', 'nnz', 'nodes', 'lp_iterations'):
+            if field in base and field in res and base[field] != res[field]:
+                print(f"{key:<14} | {field:<17} | {base[field]:>11} | {res[field]:>9} |")
+        if base.get('objective') is not None and res.get('objective') is not None:
+            if abs(base['objective'] - res['objective']) > 1e-6 * max(1.0, abs(base['objective'])):
+                print(f"{key:<14} | OBJECTIVE CHANGED: {base['objective']:,.4f} -> {res['objective']:,.4f}")
+                ok = False
+    print("-" * 100)
+    return ok
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--stages', type=int, nargs='+', default=[3, 4, 5], choices=[3, 4, 5])
+    parser.add_argument('--m', type=int, nargs='+', default=None, help='m values (default per stage)')
+    parser.add_argument('--modes', nargs='+', default=MODES, choices=MODES)
+    parser.add_argument('--builder', default='milp', choices=sorted(MODEL_CLASSES),
+                        help='milp = SupplyChainModel, matrix = MatrixSupplyChainModel')
+    parser.add_argument('--no-solve', action='store_true', help='only time the build phases')
+    parser.add_argument('--time-limit', type=float, default=None, help='solver time limit per case (s)')
+    parser.add_argument('--out', default='bench_results.json')
+    parser.add_argument('--compare', default=None, help='baseline JSON to diff against')
+    args = parser.parse_args(argv)
+
+    results = run_suite(args.stages, args.m, args.modes, solve=not args.no_solve,
+                        time_limit=args.time_limit, builder=args.builder)
+    with open(args.out, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2)
+    print(f"Saved: {args.out}")
+
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        return 0 if compare(results, baseline) else 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
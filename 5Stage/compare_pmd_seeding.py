@@ -0,0 +1,73 @@
+"""
+Đo thời gian tiết kiệm được khi seed bài Pmd bằng nghiệm Pm cùng m.
+
+Với mỗi m: giải Pm, định thời lại nghiệm Pm theo nhu cầu Pmd (warm_start.pm_to_pmd, kiểm
+tra khả thi bằng PlanEvaluator), rồi giải Pmd 4 lần (cache tắt):
+    cold    - giải độc lập như run_sensitivity.py
+    hint    - chỉ MIP start (phương án đã định thời lại)
+    cutoff  - chỉ cutoff = chi phí của phương án đó trên Pmd (khi khả thi)
+    both    - MIP start + cutoff (như sweep.py với seed_pmd=True)
+
+Chạy:
+    python compare_pmd_seeding.py               # 5-stage, m = 1, 2
+    python compare_pmd_seeding.py 4 1 2 3 4     # 4-stage, m = 1..4
+"""
+
+import contextlib
+import io
+import sys
+
+from data_loader import SupplyChainData
+from dynamic_scm_milp import SupplyChainModel
+from result_cache import solve_cached
+from warm_start import pm_to_pmd
+
+
+def solve(data, hint=None, cutoff=None):
+    with contextlib.redirect_stdout(io.StringIO()):
+        model, obj_val, duration, _ = solve_cached(data, SupplyChainModel, use_cache=False,
+                                                   hint=hint, cutoff=cutoff)
+    return model, obj_val, duration
+
+
+def compare(num_stages, m_values):
+    print("=" * 110)
+    print(f"Pm -> Pmd SEEDING ({num_stages}-stage)")
+    print("=" * 110)
+    print(f"{'m':<3} | {'Cost_Pm':>12} | {'Mapped':>12} | {'Cost_Pmd':>12} | {'cold':>8} | "
+          f"{'hint':>8} | {'cutoff':>8} | {'both':>8} | {'Saved':>6}")
+    print("-" * 110)
+
+    totals = dict.fromkeys(('cold', 'hint', 'cutoff', 'both'), 0.0)
+    for m in m_values:
+        data_pm = SupplyChainData(m=m, mode='Pm', num_stages=num_stages)
+        data_pmd = SupplyChainData(m=m, mode='Pmd', num_stages=num_stages)
+
+        model_pm, obj_pm, _ = solve(data_pm)
+        values = {v.name(): v.solution_value() for v in model_pm.solver.variables()}
+        hint, mapped = pm_to_pmd(values, data_pm, data_pmd)
+        runs = {'cold': solve(data_pmd), 'hint': solve(data_pmd, hint=hint),
+                'cutoff': solve(data_pmd, cutoff=mapped), 'both': solve(data_pmd, hint=hint, cutoff=mapped)}
+
+        obj_cold = runs['cold'][1]
+        for name, (_, obj, _) in runs.items():
+            if abs(obj - obj_cold) > 1e-6 * max(1.0, abs(obj_cold)):
+                print(f"[WARN] m={m}: {name} objective {obj:,.4f} != cold {obj_cold:,.4f}")
+        times = {name: run[2] for name, run in runs.items()}
+        for name, cpu in times.items():
+            totals[name] += cpu
+        mapped_str = f"{mapped:>12,.0f}" if mapped is not None else f"{'infeasible':>12}"
+        saved = times['cold'] - times['both']
+        print(f"{m:<3} | {obj_pm:>12,.0f} | {mapped_str} | {obj_cold:>12,.0f} | {times['cold']:>8.2f} | "
+              f"{times['hint']:>8.2f} | {times['cutoff']:>8.2f} | {times['both']:>8.2f} | "
+              f"{100 * saved / times['cold']:>5.1f}%", flush=True)
+
+    print("-" * 110)
+    print("Total Pmd: " + ", ".join(f"{name} {total:.2f}s" for name, total in totals.items()))
+
+
+if __name__ == "__main__":
+    args = [int(a) for a in sys.argv[1:]]
+    num_stages = args[0] if args else 5
+    m_values = args[1:] or [1, 2]
+    compare(num_stages, m_values)
@@ -0,0 +1,132 @@
+"""
+Concurrent solve: chạy song song nhiều cấu hình (khác seed, có thể khác emphasis / backend)
+trên CÙNG một instance và giữ nghiệm của cấu hình đầu tiên chứng minh được tối ưu; các
+worker còn lại bị dừng ngay (Pool.terminate). Thời gian giải MILP rất nhạy với seed
+(thứ tự biến, tie-breaking trong branching), nên race k cấu hình thường nhanh hơn 1 lần
+giải với seed mặc định; dùng được cho mọi backend (CBC vốn giải tuần tự).
+
+Mỗi worker dựng model riêng từ data (không chia sẻ pywraplp object giữa các process) và
+trả về CachedSolution (result_cache.solution_record) nên có cùng API đọc kết quả với
+SupplyChainModel.
+
+deterministic=True: chờ mọi cấu hình xong rồi lấy cấu hình tối ưu có thứ tự nhỏ nhất ->
+cùng phương án qua các lần chạy (khi có nhiều phương án tối ưu), đổi lại mất lợi thế
+về thời gian. Mặc định (False) objective vẫn như nhau nhưng phương án có thể khác.
+
+Chạy:
+    python concurrent_solve.py --stages 4 --m 2 --configs 8
+    python concurrent_solve.py --stages 5 --m 2 --configs 32 --emphasis-mix --time-limit 600
+"""
+
+import argparse
+import contextlib
+import io
+import multiprocessing
+import os
+import time
+
+from data_loader import SupplyChainData
+from dynamic_scm_milp import SupplyChainModel
+from result_cache import CachedSolution, solution_record
+from solver_backends import EMPHASIS, add_solver_arguments, solver_params_from_args
+
+
+def seeded_configs(n, base=None, emphasis_mix=False):
+    """
+    n cấu hình {backend, tham số set_parameters} khác seed (0..n-1), chung tham số base.
+    emphasis_mix=True: xoay vòng emphasis qua EMPHASIS để các worker khác nhau nhiều hơn.
+    """
+    base = dict(base or {})
+    configs = []
+    for k in range(n):
+        config = dict(base, seed=base.get('seed', 0) + k)
+        if emphasis_mix:
+            config['emphasis'] = EMPHASIS[k % len(EMPHASIS)]
+        configs.append(config)
+    return configs
+
+
+def solve_config(task):
+    """Giải instance với 1 cấu hình - chạy trong worker. task = (index, data, config, tight)."""
+    index, data, config, tight = task
+    params = dict(config)
+    backend = params.pop('backend', 'SCIP')
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        model = SupplyChainModel(data, tight=tight, backend=backend)
+        model.create_variables()
+        model.add_constraints()
+        model.set_objective()
+        model.set_parameters(**params)
+        optimal = model.solve()
+    duration = time.perf_counter() - start
+    return {'index': index, 'config': config, 'optimal': optimal, 'time': duration,
+            'objective': model.get_objective_value() if optimal else None,
+            'solution': CachedSolution(data, solution_record(model, duration)) if optimal else None}
+
+
+def race_solve(data, configs, tight=False, max_workers=None, deterministic=False):
+    """
+    Race các cấu hình trên instance `data`. Trả về (kết quả thắng hoặc None nếu không cấu
+    hình nào tối ưu, list kết quả đã xong theo thứ tự hoàn thành). Kết quả: dict index,
+    config, optimal, time, objective, solution (CachedSolution).
+    """
+    tasks = [(k, data, config, tight) for k, config in enumerate(configs)]
+    if max_workers is None:
+        max_workers = min(len(tasks), os.cpu_count() or 1)
+
+    finished, winner = [], None
+    if max_workers <= 1:
+        for task in tasks:
+            finished.append(solve_config(task))
+            if finished[-1]['optimal'] and not deterministic:
+                return finished[-1], finished
+    else:
+        with multiprocessing.Pool(max_workers) as pool:
+            for result in pool.imap_unordered(solve_config, tasks):
+                finished.append(result)
+                if result['optimal'] and not deterministic:
+                    winner = result
+                    pool.terminate()
+                    break
+    if winner is None:
+        optimal = sorted((r for r in finished if r['optimal']), key=lambda r: r['index'])
+        winner = optimal[0] if optimal else None
+    return winner, finished
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--stages', type=int, default=4, choices=[3, 4, 5])
+    parser.add_argument('--m', type=int, default=1)
+    parser.add_argument('--mode', default='Pm', choices=['Pm', 'Pmd'])
+    parser.add_argument('--configs', type=int, default=None, help='số cấu hình (mặc định = số core)')
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--backend', default='SCIP')
+    parser.add_argument('--emphasis-mix', action='store_true', help='xoay vòng emphasis giữa các cấu hình')
+    parser.add_argument('--tight', action='store_true')
+    parser.add_argument('--deterministic', action='store_true', help='chờ mọi cấu hình, lấy cấu hình nhỏ nhất')
+    add_solver_arguments(parser)
+    args = parser.parse_args(argv)
+
+    data = SupplyChainData(m=args.m, mode=args.mode, num_stages=args.stages)
+    base = dict(solver_params_from_args(args), backend=args.backend)
+    configs = seeded_configs(args.configs or os.cpu_count() or 1, base, args.emphasis_mix)
+
+    start = time.perf_counter()
+    winner, finished = race_solve(data, configs, tight=args.tight, max_workers=args.workers,
+                                  deterministic=args.deterministic)
+    elapsed = time.perf_counter() - start
+    for r in finished:
+        objective = f"{r['objective']:12,.1f}" if r['optimal'] else f"{'-':>12}"
+        print(f"config {r['index']:>3} seed={r['config']['seed']:<4} {r['config'].get('emphasis', ''):<12} "
+              f"{objective} {r['time']:8.2f}s")
+    if winner is None:
+        print(f"Không cấu hình nào giải tối ưu ({elapsed:.2f}s)")
+    else:
+        print(f"Thắng: config {winner['index']} (seed={winner['config']['seed']}) objective "
+              f"{winner['objective']:,.1f}, tổng {elapsed:.2f}s với {len(configs)} cấu hình")
+
+
+if __name__ == "__main__":
+    main()
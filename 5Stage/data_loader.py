@@ -1,90 +1,126 @@
+from typing import NamedTuple
+
+import numpy as np
+
+
+def _frozen(values):
+    array = np.array(values, dtype=float)
+    array.flags.writeable = False
+    return array
+
+
+class PriceBreaks(NamedTuple):
+    """
+    Bảng bậc giá chiết khấu (incremental) của 1 supplier, mảng chỉ đọc theo bậc g:
+
+        max_q      breakpoint (cận trên lượng mua cả horizon của bậc g), tăng ngặt
+        lower      cận dưới = max_q[g - 1] (0 với g = 0)
+        width      max_q - lower
+        price      đơn giá trong bậc g
+        base_cost  chi phí mua hết các bậc dưới g = sum_{g' < g} width[g'] * price[g']
+
+    Mua tổng Q nằm trong bậc g tốn base_cost[g] + price[g] * (Q - lower[g]).
+    """
+    max_q: np.ndarray
+    lower: np.ndarray
+    width: np.ndarray
+    price: np.ndarray
+    base_cost: np.ndarray
+
+    @classmethod
+    def from_intervals(cls, intervals, name=''):
+        max_q = np.array([iv['max_q'] for iv in intervals], dtype=float)
+        price = np.array([iv['price'] for iv in intervals], dtype=float)
+        if len(max_q) == 0 or max_q[0] <= 0 or np.any(np.diff(max_q) <= 0):
+            raise ValueError(f"Bậc giá của supplier {name!r} phải có max_q dương, tăng ngặt: {max_q.tolist()}")
+        lower = np.concatenate([[0.0], max_q[:-1]])
+        width = max_q - lower
+        base_cost = np.concatenate([[0.0], np.cumsum(width * price)[:-1]])
+        return cls(*(_frozen(a) for a in (max_q, lower, width, price, base_cost)))
+
+    def tier(self, qty):
+        """Bậc giá chứa tổng lượng mua qty (vector hóa); qty > max_q cuối -> len(max_q)."""
+        return np.searchsorted(self.max_q, qty, side='left')
+
+    def cost(self, qty):
+        """Chi phí mua (chưa gồm primary / secondary cost) cho tổng lượng qty, vector hóa; vượt bậc cuối -> inf."""
+        qty = np.asarray(qty, dtype=float)
+        g = self.tier(qty)
+        inside = g < len(self.max_q)
+        gc = np.minimum(g, len(self.max_q) - 1)
+        return np.where(inside, self.base_cost[gc] + self.price[gc] * (qty - self.lower[gc]), np.inf)
+
+
 class SupplyChainData:
     def __init__(self, m=1, mode='Pm', num_stages=4):
         self.m = m
         self.mode = mode
-        self.K = num_stages  # Number of stages (4 or 5)
+        self.K = num_stages  # Number of stages (3, 4 or 5)
         
         # --- 1. THAM SỐ GỐC (BASE PARAMETERS - m=1) ---
         self.base_T = 5  # Lưu lại số kỳ gốc để dùng trong Model
         
-        base_demand = [100, 200, 250, 300, 200]
-        base_holding_cost = [5, 5, 5, 6, 6]
-        base_prod_fixed = [2500, 2500, 3000, 3000, 3500]
-        base_prod_var   = [10, 10, 12, 12, 13]
+        base_demand = np.array([100, 200, 250, 300, 200])
+        base_holding_cost = np.array([5, 5, 5, 6, 6])
+        base_prod_fixed = np.array([2500, 2500, 3000, 3000, 3500])
+        base_prod_var   = np.array([10, 10, 12, 12, 13])
         
-        base_prod_cap = [270] * self.base_T
-        base_trans_cap = [300] * self.base_T
+        base_prod_cap = np.full(self.base_T, 270)
+        base_trans_cap = np.full(self.base_T, 300)
         
         # --- 2. BIẾN ĐỔI DỮ LIỆU ---
+        # Mọi dữ liệu theo kỳ con là mảng NumPy liên tục, mở rộng bằng np.repeat
+        # (mỗi kỳ gốc -> m kỳ con) thay vì vòng lặp extend.
         self.T = self.base_T * m 
         
         # A. Xử lý Nhu cầu (Demand) - Giữ nguyên logic cũ
-        self.demand = [0] * self.T
-        if m == 1:
-            self.demand = base_demand
-        else:
-            for t_old in range(self.base_T):
-                val = base_demand[t_old]
-                if mode == 'Pm':
-                    idx = (t_old + 1) * m - 1 
-                    self.demand[idx] = val
-                elif mode == 'Pmd':
-                    dist_val = val / m
-                    for sub in range(m):
-                        self.demand[t_old * m + sub] = dist_val
+        self.demand = np.zeros(self.T)
+        if m == 1 or mode == 'Pm':
+            self.demand[m - 1::m] = base_demand  # dồn vào kỳ con cuối của mỗi kỳ gốc
+        elif mode == 'Pmd':
+            self.demand[:] = np.repeat(base_demand / m, m)
 
         # B. Xử lý Chi phí & Năng lực (SỬA LỖI TẠI ĐÂY)
         
         # 1. Holding cost: Vẫn chia m (đúng theo định lý 2 condition i [cite: 806])
-        self.holding_cost = []
-        for h in base_holding_cost:
-            self.holding_cost.extend([h / m] * m)
+        self.holding_cost = np.repeat(base_holding_cost / m, m)
             
         # 2. Production Fixed Cost: KHÔNG CHIA m (Theo condition ii )
         # Model sẽ dùng biến w_group để tính phí này 1 lần cho cả nhóm
-        self.prod_fixed_cost = []
-        for f in base_prod_fixed:
-            self.prod_fixed_cost.extend([f] * m) 
+        self.prod_fixed_cost = np.repeat(base_prod_fixed, m)
             
         # 3. Production Variable Cost: Giữ nguyên
-        self.prod_var_cost = []
-        for v in base_prod_var:
-            self.prod_var_cost.extend([v] * m)
+        self.prod_var_cost = np.repeat(base_prod_var, m)
 
         # 4. Production Capacity: KHÔNG CHIA m Ở ĐÂY
         # Để nguyên giá trị gốc, Model sẽ ràng buộc: Sum(sub_periods) <= Base_Cap
-        self.prod_capacity = []
-        for c in base_prod_cap:
-            self.prod_capacity.extend([c] * m)
+        self.prod_capacity = np.repeat(base_prod_cap, m)
             
         # 5. Transport Capacity: Giữ nguyên logic cũ (chia m) vì bài báo không nhấn mạnh
         # thay đổi capacity vận chuyển, ta giả định nó chia đều theo thời gian.
-        self.trans_capacity = []
-        for c in base_trans_cap:
-            self.trans_capacity.extend([c / m] * m)
+        self.trans_capacity = np.repeat(base_trans_cap / m, m)
             
         self.inventory_capacity = 400
 
         # C. Production Site 2 (Stage 3) - chỉ dùng khi num_stages=5
         # Dữ liệu từ Table 12
-        base_prod2_fixed = [3000, 3000, 3000, 3000, 3200]
-        base_prod2_var   = [15, 15, 15, 16, 16]
-        base_prod2_cap   = [300, 300, 300, 300, 300]
+        base_prod2_fixed = np.array([3000, 3000, 3000, 3000, 3200])
+        base_prod2_var   = np.array([15, 15, 15, 16, 16])
+        base_prod2_cap   = np.array([300, 300, 300, 300, 300])
         
-        self.prod2_fixed_cost = []
-        for f in base_prod2_fixed:
-            self.prod2_fixed_cost.extend([f] * m)
-            
-        self.prod2_var_cost = []
-        for v in base_prod2_var:
-            self.prod2_var_cost.extend([v] * m)
-            
-        self.prod2_capacity = []
-        for c in base_prod2_cap:
-            self.prod2_capacity.extend([c] * m)
+        self.prod2_fixed_cost = np.repeat(base_prod2_fixed, m)
+        self.prod2_var_cost = np.repeat(base_prod2_var, m)
+        self.prod2_capacity = np.repeat(base_prod2_cap, m)
 
         # D. Xử lý Lead Time và Initial Inventory (phụ thuộc num_stages)
-        if self.K == 4:
+        if self.K == 3:
+            # 3-stage (giống 3Stage/): Mfg (1) -> Local (2) -> Regional/Customer (3)
+            self.lead_times = {
+                (1, 2): 0,
+                (2, 3): 1 * m
+            }
+            self.initial_inventory = {1: 0, 2: 0, 3: 100}
+        elif self.K == 4:
             self.lead_times = {
                 (1, 2): 0,
                 (2, 3): 1 * m, 
@@ -101,19 +137,13 @@ class SupplyChainData:
             }
             self.initial_inventory = {1: 0, 2: 0, 3: 0, 4: 0, 5: 100}
         else:
-            raise ValueError(f"num_stages={self.K} chưa được hỗ trợ. Chỉ hỗ trợ 4 hoặc 5.")
+            raise ValueError(f"num_stages={self.K} chưa được hỗ trợ. Chỉ hỗ trợ 3, 4 hoặc 5.")
 
         # --- 3. DỮ LIỆU NHÀ CUNG CẤP ---
         self.global_min_order_first = 50
         self.global_min_order_later = 20
         self.global_max_order_size = 500
 
-        def expand_cap(arr_cap, m_factor):
-            new_arr = []
-            for val in arr_cap:
-                new_arr.extend([val] * m_factor) 
-            return new_arr
-
         sup1_off1_cap = [300, 450, 450, 450, 450]
         sup1_off2_cap = [0, 0, 50, 150, 400]
         sup2_cap      = [200, 400, 650, 900, 1200]
@@ -123,7 +153,7 @@ class SupplyChainData:
         self.suppliers = [
             {
                 "name": "Sup1_Offer1",
-                "cumulative_capacity": expand_cap(sup1_off1_cap, m),
+                "cumulative_capacity": np.repeat(sup1_off1_cap, m),
                 "primary_cost": 550,     # <--- GIỮ NGUYÊN
                 "secondary_cost": 1000,  # <--- GIỮ NGUYÊN
                 "min_order": 50,
@@ -131,7 +161,7 @@ class SupplyChainData:
             },
             {
                 "name": "Sup1_Offer2",
-                "cumulative_capacity": expand_cap(sup1_off2_cap, m),
+                "cumulative_capacity": np.repeat(sup1_off2_cap, m),
                 "primary_cost": 550,     # <--- GIỮ NGUYÊN
                 "secondary_cost": 1000,  # <--- GIỮ NGUYÊN
                 "min_order": 50,
@@ -139,7 +169,7 @@ class SupplyChainData:
             },
             {
                 "name": "Sup2",
-                "cumulative_capacity": expand_cap(sup2_cap, m),
+                "cumulative_capacity": np.repeat(sup2_cap, m),
                 "primary_cost": 500,     # <--- GIỮ NGUYÊN
                 "secondary_cost": 1000,  # <--- GIỮ NGUYÊN
                 "min_order": 50,
@@ -147,7 +177,7 @@ class SupplyChainData:
             },
             {
                 "name": "Sup3",
-                "cumulative_capacity": expand_cap(sup3_cap, m),
+                "cumulative_capacity": np.repeat(sup3_cap, m),
                 "primary_cost": 600,     # <--- GIỮ NGUYÊN
                 "secondary_cost": 1050,  # <--- GIỮ NGUYÊN
                 "min_order": 50,
@@ -164,4 +194,14 @@ class SupplyChainData:
             {"min": 113, "max": 124, "fixed_cost": 1411, "var_cost_per_unit": 0.0},
             {"min": 125, "max": 254, "fixed_cost": 0.0,  "var_cost_per_unit": 11.3},
             {"min": 255, "max": 312, "fixed_cost": 2780, "var_cost_per_unit": 0.0}
-        ]
\ No newline at end of file
+        ]
+
+        self.refresh_price_breaks()
+
+    def refresh_price_breaks(self):
+        """
+        Tính lại self.price_breaks (PriceBreaks theo supplier, kiểm tra breakpoint tăng ngặt).
+        Gọi sau khi sửa price_intervals tại chỗ.
+        """
+        self.price_breaks = [PriceBreaks.from_intervals(s['price_intervals'], s.get('name', j))
+                             for j, s in enumerate(self.suppliers)]
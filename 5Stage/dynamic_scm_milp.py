@@ -1,20 +1,73 @@
+import copy
+
+import numpy as np
 from ortools.linear_solver import pywraplp
 from data_loader import SupplyChainData 
+from lot_sizing import add_lot_sizing_cuts
+from solve_monitor import SolveMonitor
+from solver_backends import create_solver, restore_bounds, solution_values, solve_cp_sat, solver_parameters
+from stage_graph import StageGraph
 
 class SupplyChainModel:
-    def __init__(self, data):
+    # Field của SupplyChainData sửa được tại chỗ bằng update() / update_supplier()
+    UPDATABLE_FIELDS = ('demand', 'holding_cost', 'prod_var_cost', 'prod_fixed_cost',
+                        'prod2_var_cost', 'prod2_fixed_cost', 'prod_capacity', 'prod2_capacity',
+                        'trans_capacity', 'inventory_capacity', 'freight_actual')
+    UPDATABLE_SUPPLIER_FIELDS = ('primary_cost', 'secondary_cost', 'min_order', 'cumulative_capacity')
+    # Field mà bất đẳng thức lot-sizing (l,S) / cover phụ thuộc vào (xem lot_sizing.py)
+    LOT_SIZING_FIELDS = ('demand', 'prod_capacity', 'prod2_capacity')
+
+    def __init__(self, data, tight=False, lot_sizing=None, backend='SCIP', graph=None):
+        """
+        tight=True: big-M chặt hơn, cùng nghiệm tối ưu (xem _max_order / _freight_max):
+        - q[j, t] <= min(max order, cumulative capacity tại t, max_q bậc giá cuối) * z[j, t]
+        - y_freight <= min(max bậc cước, capacity xe tại t) * f_freight
+        - z[j, t] <= sum_g s_price[j, g] (đặt hàng thì phải chọn 1 bậc giá).
+        Bậc giá (s_price, r_price) và bậc cước (f_freight, y_freight) vốn đã ở dạng
+        multiple-choice: lượng trong mỗi bậc nằm trong [lower * chọn, upper * chọn], là
+        bao lồi của từng hàm chi phí từng khúc - phần còn yếu nằm ở các big-M trên.
+
+        lot_sizing='upfront' / 'rounds': thêm bất đẳng thức (l,S) và cover theo capacity
+        (lot_sizing.py) ngay trước lần solve() đầu tiên; update() demand / capacity sản xuất
+        hoặc add_receipts() bỏ các dòng này và solve() kế tiếp thêm lại theo tham số mới.
+
+        backend: 'SCIP', 'CBC', 'HIGHS' hoặc 'CP-SAT' (xem solver_backends.py).
+
+        graph: StageGraph của mạng (mặc định StageGraph.from_data(data)). Ràng buộc cân bằng,
+        sản xuất, capacity vận chuyển và cước đều sinh theo node / arc của graph; model này
+        chỉ nhận mạng nối tiếp node 1..K với tối đa 2 site sản xuất (xem _check_graph),
+        mạng nhiều site dùng MatrixSupplyChainModel.
+        """
         self.data = data
-        self.solver = pywraplp.Solver.CreateSolver('SCIP')
+        self.tight = tight
+        self.lot_sizing = lot_sizing
+        self.lot_sizing_rows = None
+        self.backend = backend
+        self.cp_sat_fixed = []
+        self.cp_sat_info = None
+        self.time_limit = None
+        self.params = {}
+        self.mp_params = None
+        self.solver = create_solver(backend)
         if not self.solver:
-            raise Exception("SCIP backend not found.")
+            raise Exception(f"{backend} backend not found.")
         self.infinity = self.solver.infinity()
+
+        # Mạng (node, arc, leg chịu cước / in-transit, site sản xuất) lấy từ stage graph
+        self.graph = StageGraph.from_data(data) if graph is None else graph
+        self._check_graph()
+        self.K = self.graph.K
+        self.freight_legs = self.graph.legs('freight')
+        self.intransit_legs = self.graph.legs('intransit')
+        self.sites = {arc['production']['site']: arc for arc in self.graph.arcs if arc['production']}
+        self.demand_node = next(node['id'] for node in self.graph.nodes if node['demand'] is not None)
         
         # Khai báo biến
         self.q, self.z = {}, {}
         self.x, self.w_prod = {}, {}
         self.w_prod_group = {} # Setup cho nhóm kỳ gốc site 1
         
-        # Production site 2 (stage 3) - chỉ dùng cho K=5
+        # Production site 2 - luôn tạo, cố định = 0 nếu graph không có site 2
         self.x2, self.w_prod2 = {}, {}
         self.w_prod2_group = {}
         
@@ -23,6 +76,56 @@ class SupplyChainModel:
         self.s_price, self.r_price = {}, {}
         self.f_freight, self.y_freight = {}, {}
 
+        # Handle của các ràng buộc có tham số (cho update_* / resolve)
+        self.min_order_rows, self.max_order_rows, self.cum_cap_rows = {}, {}, {}
+        self.prod_cap_rows, self.prod_block_rows = {}, {}
+        self.trans_cap_rows, self.demand_rows = {}, {}
+        self.flow_rows, self.price_rows, self.ending_rows = {}, {}, {}
+        self.freight_min_rows, self.freight_max_rows = {}, {}
+        self.site_ship_rows = {}  # y[leg, t] == x2[t] (arc vừa sản xuất vừa vận chuyển), nối các khối biến
+        self.last_solution = None
+        self.status = None  # status pywraplp của lần solve() gần nhất
+        self.receipts = {}
+        self.trace = None
+        self.idx = {}
+        self._cost_parts = None
+
+    def _check_graph(self):
+        """Graph phải là mạng node 1..K mà các họ biến x / x2 / y[leg] / i[k] biểu diễn được."""
+        g = self.graph
+        if [node['id'] for node in g.nodes] != list(range(1, g.K + 1)):
+            raise ValueError("SupplyChainModel cần node id 1..K theo thứ tự (dùng MatrixSupplyChainModel)")
+        legs = [arc['leg'] for arc in g.arcs]
+        sites = [arc['production']['site'] for arc in g.arcs if arc['production']]
+        if len(set(legs)) != len(legs) or not set(legs) <= set(range(1, g.K)):
+            raise ValueError(f"Leg phải khác nhau và trong 1..{g.K - 1}: {legs}")
+        if len(set(sites)) != len(sites) or not set(sites) <= {1, 2}:
+            raise ValueError(f"SupplyChainModel chỉ có site sản xuất 1 và 2: {sites}")
+        for arc in g.arcs:
+            if arc['freight'] not in (True, False) or arc['unit_cost']:
+                raise ValueError(f"Arc {arc['src']}->{arc['dst']}: bậc cước riêng / unit_cost cần "
+                                 "MatrixSupplyChainModel")
+        if sum(node['demand'] is not None for node in g.nodes) != 1:
+            raise ValueError("SupplyChainModel cần đúng 1 node có nhu cầu")
+
+    def _site_vars(self, site):
+        """(x, w_prod, w_prod_group) của site sản xuất 1 hoặc 2."""
+        if site == 1:
+            return self.x, self.w_prod, self.w_prod_group
+        return self.x2, self.w_prod2, self.w_prod2_group
+
+    def _departure(self, arc, t):
+        """Luồng rời src của arc ở kỳ t: lượng sản xuất nếu là arc sản xuất, ngược lại y[leg, t]."""
+        if arc['production']:
+            return self._site_vars(arc['production']['site'])[0][t]
+        return self.y[arc['leg'], t]
+
+    def _arrival(self, arc, t):
+        """Luồng tới dst: arc sản xuất có capacity vận chuyển giao bằng y[leg, t] (== x2[t])."""
+        if arc['production'] and arc['transport_capacity'] is None:
+            return self._site_vars(arc['production']['site'])[0][t]
+        return self.y[arc['leg'], t]
+
     def create_variables(self):
         print("Creating variables...")
         T = self.data.T 
@@ -38,14 +141,14 @@ class SupplyChainModel:
             self.x[t] = self.solver.NumVar(0, self.infinity, f'x_{t}')
             self.w_prod[t] = self.solver.BoolVar(f'w_prod_{t}')
             
-            # Production Site 2 (Sub-period) - luôn tạo nhưng chỉ dùng khi K=5
+            # Production Site 2 (Sub-period) - luôn tạo nhưng chỉ dùng khi graph có site 2
             self.x2[t] = self.solver.NumVar(0, self.infinity, f'x2_{t}')
             self.w_prod2[t] = self.solver.BoolVar(f'w_prod2_{t}')
             
             # Inventory & Transport
-            for k in range(1, self.data.K + 1):
+            for k in range(1, self.K + 1):
                 self.i[k, t] = self.solver.NumVar(0, self.data.inventory_capacity, f'i_{k}_{t}')    
-                if k < self.data.K:
+                if k < self.K:
                     self.y[k, t] = self.solver.NumVar(0, self.infinity, f'y_{k}_{t}')
                     self.w_trans[k, t] = self.solver.BoolVar(f'w_trans_{k}_{t}')
 
@@ -60,26 +163,47 @@ class SupplyChainModel:
                 self.s_price[j_idx, g] = self.solver.BoolVar(f's_{j_idx}_{g}')
                 self.r_price[j_idx, g] = self.solver.NumVar(0, self.infinity, f'r_{j_idx}_{g}')
 
-        # 4. Freight Rates - điều chỉnh theo K
+        # 4. Freight Rates - trên các leg có freight của graph
         transport_intervals = self.data.freight_actual 
         for t in range(T):
-            # Cho 4-stage: freight ở leg 3 (stage 3->4)
-            # Cho 5-stage: freight ở leg 2,4 (stage 2->3, 4->5)
-            if self.data.K == 4:
-                freight_legs = [3]
-            elif self.data.K == 5:
-                freight_legs = [2, 4]
-            else:
-                freight_legs = []
-            
-            for k in freight_legs:
+            for k in self.freight_legs:
                 for e, _ in enumerate(transport_intervals):
                     self.f_freight[k, t, e] = self.solver.BoolVar(f'f_{k}_{t}_{e}')
                     self.y_freight[k, t, e] = self.solver.NumVar(0, self.infinity, f'y_fr_{k}_{t}_{e}')
         
-        
+        self._index_variables()
         print(f"Total variables: {self.solver.NumVariables()}")
 
+    def _index_variables(self):
+        """
+        self.idx: họ biến -> mảng var.index() (vị trí trong vector solution_values), vd.
+        idx['q'][j, t], idx['i'][k - 1, t], idx['y'][k - 1, t] (cả w_trans),
+        idx['y_freight'][l, t, e] (l theo freight_legs);
+        s_price / r_price phẳng theo (supplier, bậc giá), supplier của từng phần tử ở
+        self.price_supplier.
+        """
+        d, K = self.data, self.K
+        T, J = d.T, len(d.suppliers)
+        ids = lambda variables, keys: np.array([variables[key].index() for key in keys], dtype=np.int64)
+        self.idx = {
+            'q': ids(self.q, [(j, t) for j in range(J) for t in range(T)]).reshape(J, T),
+            'z': ids(self.z, [(j, t) for j in range(J) for t in range(T)]).reshape(J, T),
+            'x': ids(self.x, range(T)), 'w_prod': ids(self.w_prod, range(T)),
+            'x2': ids(self.x2, range(T)), 'w_prod2': ids(self.w_prod2, range(T)),
+            'w_prod_group': ids(self.w_prod_group, range(d.base_T)),
+            'w_prod2_group': ids(self.w_prod2_group, range(d.base_T)),
+            'i': ids(self.i, [(k, t) for k in range(1, K + 1) for t in range(T)]).reshape(K, T),
+            'y': ids(self.y, [(k, t) for k in range(1, K) for t in range(T)]).reshape(K - 1, T),
+            'w_trans': ids(self.w_trans, [(k, t) for k in range(1, K) for t in range(T)]).reshape(K - 1, T),
+            's_price': ids(self.s_price, list(self.s_price)),
+            'r_price': ids(self.r_price, list(self.s_price)),
+        }
+        E = len(d.freight_actual)
+        keys = [(k, t, e) for k in self.freight_legs for t in range(T) for e in range(E)]
+        for name, variables in (('f_freight', self.f_freight), ('y_freight', self.y_freight)):
+            self.idx[name] = ids(variables, keys).reshape(len(self.freight_legs), T, E)
+        self.price_supplier = np.array([j for j, _ in self.s_price], dtype=np.int64)
+
     def add_constraints(self):
         print("Adding constraints...")
         T = self.data.T
@@ -87,166 +211,135 @@ class SupplyChainModel:
         
         # 1. SUPPLIER
         for j_idx, supplier in enumerate(self.data.suppliers):
+            # Cumulative capacity tại t là thừa nếu có t' > t với cap[t'] <= cap[t]
+            # (q >= 0 nên tổng tích lũy không giảm). Cap mở rộng theo m là hằng trong
+            # mỗi kỳ gốc -> chỉ giữ kỳ con cuối, số nonzero tuyến tính theo T.
+            cap = np.asarray(supplier['cumulative_capacity'])
+            suffix_min = np.minimum.accumulate(cap[::-1])[::-1]
+            binding = np.append(cap[:-1] < suffix_min[1:], True)
+
             total_purchased_cumulative = 0
             for t in range(T):
                 qty = self.q[j_idx, t]
-                self.solver.Add(qty >= supplier['min_order'] * self.z[j_idx, t])
-                self.solver.Add(qty <= self.data.global_max_order_size * self.z[j_idx, t])
+                self.min_order_rows[j_idx, t] = self.solver.Add(qty >= supplier['min_order'] * self.z[j_idx, t])
+                self.max_order_rows[j_idx, t] = self.solver.Add(qty <= self._max_order(j_idx, t) * self.z[j_idx, t])
                 
                 total_purchased_cumulative += qty
-                self.solver.Add(total_purchased_cumulative <= supplier['cumulative_capacity'][t])
-                
-                # Pricing Linearization
-                total_qty_horizon = sum(self.q[j_idx, t] for t in range(T))
-                intervals = supplier['price_intervals']
-                self.solver.Add(sum(self.s_price[j_idx, g] for g in range(len(intervals))) <= 1)
+                if binding[t]:
+                    self.cum_cap_rows[j_idx, t] = self.solver.Add(total_purchased_cumulative <= cap[t])
             
-            expr_qty = 0
-            for g, interval in enumerate(intervals):
-                lower = 0 if g == 0 else intervals[g-1]['max_q']
-                width = interval['max_q'] - lower
-                self.solver.Add(self.r_price[j_idx, g] <= width * self.s_price[j_idx, g])
-                expr_qty += (self.s_price[j_idx, g] * lower + self.r_price[j_idx, g])
-            self.solver.Add(total_qty_horizon == expr_qty)
-
-        # 2. PRODUCTION CONSTRAINTS - Site 1
-        for t_base in range(self.data.base_T):
-            start_sub = t_base * m
-            end_sub = (t_base + 1) * m
-            base_cap = self.data.prod_capacity[start_sub] 
+            # Pricing Linearization - 1 lần cho mỗi supplier (không lặp theo t)
+            total_qty_horizon = sum(self.q[j_idx, t] for t in range(T))
+            breaks = self.data.price_breaks[j_idx]
+            G = len(breaks.max_q)
+            self.solver.Add(sum(self.s_price[j_idx, g] for g in range(G)) <= 1)
             
-            cumulative_prod = 0
-            for t_sub in range(start_sub, end_sub):
-                cumulative_prod += self.x[t_sub]
-                self.solver.Add(self.x[t_sub] <= base_cap * self.w_prod[t_sub])
-            
-            self.solver.Add(cumulative_prod <= base_cap)
-
-            sum_w_sub = sum(self.w_prod[t_sub] for t_sub in range(start_sub, end_sub))
-            self.solver.Add(sum_w_sub <= m * self.w_prod_group[t_base])
-            for t_sub in range(start_sub, end_sub):
-                self.solver.Add(self.w_prod[t_sub] <= self.w_prod_group[t_base])
-        
-        # 2b. PRODUCTION CONSTRAINTS - Site 2 (chỉ cho K=5)
-        if self.data.K == 5:
+            expr_qty = 0
+            for g in range(G):
+                self.solver.Add(self.r_price[j_idx, g] <= breaks.width[g] * self.s_price[j_idx, g])
+                expr_qty += (self.s_price[j_idx, g] * breaks.lower[g] + self.r_price[j_idx, g])
+            self.price_rows[j_idx] = self.solver.Add(total_qty_horizon == expr_qty)
+            if self.tight:
+                tier_selected = sum(self.s_price[j_idx, g] for g in range(G))
+                for t in range(T):
+                    self.solver.Add(self.z[j_idx, t] <= tier_selected)
+
+        # 2. PRODUCTION CONSTRAINTS - theo các arc sản xuất của graph
+        for site in sorted(self.sites):
+            production = self.sites[site]['production']
+            x, w_prod, w_prod_group = self._site_vars(site)
             for t_base in range(self.data.base_T):
                 start_sub = t_base * m
                 end_sub = (t_base + 1) * m
-                base_cap2 = self.data.prod2_capacity[start_sub]
+                base_cap = production['capacity'][start_sub] 
                 
-                cumulative_prod2 = 0
+                cumulative_prod = 0
                 for t_sub in range(start_sub, end_sub):
-                    cumulative_prod2 += self.x2[t_sub]
-                    self.solver.Add(self.x2[t_sub] <= base_cap2 * self.w_prod2[t_sub])
+                    cumulative_prod += x[t_sub]
+                    self.prod_cap_rows[site, t_sub] = self.solver.Add(x[t_sub] <= base_cap * w_prod[t_sub])
                 
-                self.solver.Add(cumulative_prod2 <= base_cap2)
+                self.prod_block_rows[site, t_base] = self.solver.Add(cumulative_prod <= base_cap)
 
-                sum_w_sub2 = sum(self.w_prod2[t_sub] for t_sub in range(start_sub, end_sub))
-                self.solver.Add(sum_w_sub2 <= m * self.w_prod2_group[t_base])
+                sum_w_sub = sum(w_prod[t_sub] for t_sub in range(start_sub, end_sub))
+                self.solver.Add(sum_w_sub <= m * w_prod_group[t_base])
                 for t_sub in range(start_sub, end_sub):
-                    self.solver.Add(self.w_prod2[t_sub] <= self.w_prod2_group[t_base])
-        else:
-            # Nếu không phải 5-stage, fix x2 = 0
-            for t in range(T):
-                self.solver.Add(self.x2[t] == 0)
-
-        # 3. FLOW BALANCE - rẽ nhánh theo K
+                    self.solver.Add(w_prod[t_sub] <= w_prod_group[t_base])
+        
+        # Site không có trong graph: fix lượng sản xuất = 0
+        for site in (1, 2):
+            if site not in self.sites:
+                x = self._site_vars(site)[0]
+                for t in range(T):
+                    self.solver.Add(x[t] == 0)
+
+        # 3. FLOW BALANCE - mỗi node: vào (supplier + arc tới, trễ lead_time) + tồn đầu kỳ
+        #    == ra (arc đi) + tồn cuối kỳ (+ nhu cầu); capacity vận chuyển theo arc đi
+        num_sup = len(self.data.suppliers)
+        graph = self.graph
         for t in range(T):
-            num_sup = len(self.data.suppliers)
-            
-            if self.data.K == 4:
-                # ===== 4-STAGE FLOW (giữ nguyên logic cũ) =====
-                # Stage 1
-                in_1 = sum(self.q[j, t] for j in range(num_sup))
-                prev_1 = self.data.initial_inventory[1] if t == 0 else self.i[1, t-1]
-                self.solver.Add(in_1 + prev_1 == self.x[t] + self.i[1, t])
-
-                # Stage 2
-                prev_2 = self.data.initial_inventory[2] if t == 0 else self.i[2, t-1]
-                self.solver.Add(self.x[t] + prev_2 == self.y[2, t] + self.i[2, t])
-                self.solver.Add(self.y[2, t] <= self.data.trans_capacity[t] * self.w_trans[2, t])
-
-                # Stage 3 (Lead Time)
-                in_3 = 0
-                lt = self.data.lead_times[(2,3)]
-                if t >= lt: in_3 = self.y[2, t - lt]
-                prev_3 = self.data.initial_inventory[3] if t == 0 else self.i[3, t-1]
-                self.solver.Add(in_3 + prev_3 == self.y[3, t] + self.i[3, t])
-                self.solver.Add(self.y[3, t] <= self.data.trans_capacity[t] * self.w_trans[3, t])
-
-                # Stage 4
-                prev_4 = self.data.initial_inventory[4] if t == 0 else self.i[4, t-1]
-                self.solver.Add(self.y[3, t] + prev_4 == self.data.demand[t] + self.i[4, t])
-            
-            elif self.data.K == 5:
-                # ===== 5-STAGE FLOW =====
-                # Stage 1 - Mfg1
-                in_1 = sum(self.q[j, t] for j in range(num_sup))
-                prev_1 = self.data.initial_inventory[1] if t == 0 else self.i[1, t-1]
-                self.solver.Add(in_1 + prev_1 == self.x[t] + self.i[1, t])
-
-                # Stage 2 - WH1
-                prev_2 = self.data.initial_inventory[2] if t == 0 else self.i[2, t-1]
-                self.solver.Add(self.x[t] + prev_2 == self.y[2, t] + self.i[2, t])
-                self.solver.Add(self.y[2, t] <= self.data.trans_capacity[t] * self.w_trans[2, t])
-
-                # Stage 3 - Mfg2 (Site 2 CHỈ xử lý bán thành phẩm từ Site 1)
-                lt_23 = self.data.lead_times[(2, 3)]
-                in_3 = 0
-                if t >= lt_23:
-                    in_3 = self.y[2, t - lt_23]
-                prev_3 = self.data.initial_inventory[3] if t == 0 else self.i[3, t-1]
-                
-                # CONSTRAINT: Site 2 production output = shipment to WH2
-                self.solver.Add(self.y[3, t] == self.x2[t])
-                
-                # FLOW BALANCE: Input (từ WH1) = Production consumed + Inventory
-                # Site 2 chỉ có thể sản xuất khi có bán thành phẩm từ Site 1
-                self.solver.Add(in_3 + prev_3 == self.x2[t] + self.i[3, t])
-                self.solver.Add(self.y[3, t] <= self.data.trans_capacity[t] * self.w_trans[3, t])
-
-                # Stage 4 - WH2
-                lt_34 = self.data.lead_times.get((3, 4), 0)
-                in_4 = 0
-                if t >= lt_34:
-                    in_4 = self.y[3, t - lt_34]
-                prev_4 = self.data.initial_inventory[4] if t == 0 else self.i[4, t-1]
-                self.solver.Add(in_4 + prev_4 == self.y[4, t] + self.i[4, t])
-                self.solver.Add(self.y[4, t] <= self.data.trans_capacity[t] * self.w_trans[4, t])
-
-                # Stage 5 - Customer
-                lt_45 = self.data.lead_times.get((4, 5), 0)
-                in_5 = 0
-                if t >= lt_45:
-                    in_5 = self.y[4, t - lt_45]
-                prev_5 = self.data.initial_inventory[5] if t == 0 else self.i[5, t-1]
-                self.solver.Add(in_5 + prev_5 == self.data.demand[t] + self.i[5, t])
-
-        # 4. FREIGHT RATE - điều chỉnh theo K
+            for node in graph.nodes:
+                k = node['id']
+                out_arcs = [graph.arcs[a] for a in graph.arcs_out(k)]
+
+                # Arc sản xuất có vận chuyển (site 2): luồng giao đi bằng đúng lượng sản xuất
+                for arc in out_arcs:
+                    if arc['production'] and arc['transport_capacity'] is not None:
+                        site = arc['production']['site']
+                        self.site_ship_rows[site, t] = self.solver.Add(
+                            self.y[arc['leg'], t] == self._site_vars(site)[0][t])
+
+                inflow = sum(self.q[j, t] for j in graph.suppliers_of(k, num_sup))
+                for a in graph.arcs_in(k):
+                    arc = graph.arcs[a]
+                    if t >= arc['lead_time']:
+                        inflow += self._arrival(arc, t - arc['lead_time'])
+                prev = node['initial_inventory'] if t == 0 else self.i[k, t-1]
+                outflow = sum(self._departure(arc, t) for arc in out_arcs)
+                if node['demand'] is not None:
+                    outflow += node['demand'][t]
+                self.flow_rows[k, t] = self.solver.Add(inflow + prev == outflow + self.i[k, t])
+                if node['demand'] is not None:
+                    self.demand_rows[t] = self.flow_rows[k, t]
+
+                for arc in out_arcs:
+                    if arc['transport_capacity'] is not None:
+                        leg = arc['leg']
+                        self.trans_cap_rows[leg, t] = self.solver.Add(
+                            self.y[leg, t] <= arc['transport_capacity'][t] * self.w_trans[leg, t])
+
+        # 4. FREIGHT RATE - các leg có freight của graph
         intervals = self.data.freight_actual
         for t in range(T):
-            if self.data.K == 4:
-                freight_legs = [3]
-            elif self.data.K == 5:
-                freight_legs = [2, 4]
-            else:
-                freight_legs = []
-            
-            for k in freight_legs:
+            for k in self.freight_legs:
                 self.solver.Add(sum(self.y_freight[k, t, e] for e in range(len(intervals))) == self.y[k, t])
                 self.solver.Add(sum(self.f_freight[k, t, e] for e in range(len(intervals))) <= 1)
                 for e, iv in enumerate(intervals):
-                    self.solver.Add(self.y_freight[k, t, e] >= iv['min'] * self.f_freight[k, t, e])
-                    self.solver.Add(self.y_freight[k, t, e] <= iv['max'] * self.f_freight[k, t, e])
-
-        # 5. ENDING INVENTORY TARGET - generic cho K stages
-        final_stage = self.data.K
-        self.solver.Add(self.i[final_stage, T-1] == 100)
-        for k in range(1, final_stage):
-            self.solver.Add(self.i[k, T-1] == 0)
+                    self.freight_min_rows[k, t, e] = self.solver.Add(
+                        self.y_freight[k, t, e] >= iv['min'] * self.f_freight[k, t, e])
+                    self.freight_max_rows[k, t, e] = self.solver.Add(
+                        self.y_freight[k, t, e] <= self._freight_max(iv, t) * self.f_freight[k, t, e])
+
+        # 5. ENDING INVENTORY TARGET - node nhu cầu trước, sau đó các node còn lại
+        nodes = sorted(graph.nodes, key=lambda node: node['demand'] is None)
+        for node in nodes:
+            k = node['id']
+            self.ending_rows[k] = self.solver.Add(self.i[k, T-1] == node['ending_inventory'])
         
         print(f"Total constraints: {self.solver.NumConstraints()}")
 
+    def _max_order(self, j_idx, t):
+        """Big-M của q[j, t] <= M * z[j, t]."""
+        if not self.tight:
+            return self.data.global_max_order_size
+        return min(self.data.global_max_order_size, self.data.suppliers[j_idx]['cumulative_capacity'][t],
+                   self.data.price_breaks[j_idx].max_q[-1])
+
+    def _freight_max(self, iv, t):
+        """Cận trên của y_freight trong bậc cước iv ở kỳ t (bậc vượt capacity xe bị khóa)."""
+        if not self.tight:
+            return iv['max']
+        return min(iv['max'], self.data.trans_capacity[t])
+
     def set_objective(self):
         print("Setting objective function...")
         T = self.data.T
@@ -255,81 +348,442 @@ class SupplyChainModel:
         
         # 1. Purchasing Cost
         for j_idx, supplier in enumerate(self.data.suppliers):
-            intervals = supplier['price_intervals']
-            for g, interval in enumerate(intervals):
-                base_cost = 0
-                for pg in range(g):
-                    w = intervals[pg]['max_q'] - (0 if pg==0 else intervals[pg-1]['max_q'])
-                    base_cost += w * intervals[pg]['price']
-                total += (self.s_price[j_idx, g] * base_cost + self.r_price[j_idx, g] * interval['price'])
+            breaks = self.data.price_breaks[j_idx]
+            for g in range(len(breaks.max_q)):
+                total += (self.s_price[j_idx, g] * breaks.base_cost[g] + self.r_price[j_idx, g] * breaks.price[g])
             
-            is_selected = sum(self.s_price[j_idx, g] for g in range(len(intervals)))
+            is_selected = sum(self.s_price[j_idx, g] for g in range(len(breaks.max_q)))
             total += supplier['primary_cost'] * is_selected
             
             for t in range(T): 
                 total += supplier['secondary_cost'] * self.z[j_idx, t]
 
-        # 2. Production Cost - Site 1
-        for t_base in range(self.data.base_T):
-            fixed_cost = self.data.prod_fixed_cost[t_base * m]
-            total += fixed_cost * self.w_prod_group[t_base]
-            
-        for t in range(T):
-            total += self.data.prod_var_cost[t] * self.x[t]
-        
-        # 2b. Production Cost - Site 2 (chỉ cho K=5)
-        if self.data.K == 5:
+        # 2. Production Cost - theo các site sản xuất của graph
+        for site in sorted(self.sites):
+            production = self.sites[site]['production']
+            x, _, w_prod_group = self._site_vars(site)
             for t_base in range(self.data.base_T):
-                fixed_cost2 = self.data.prod2_fixed_cost[t_base * m]
-                total += fixed_cost2 * self.w_prod2_group[t_base]
-            
+                fixed_cost = production['fixed_cost'][t_base * m]
+                total += fixed_cost * w_prod_group[t_base]
+                
             for t in range(T):
-                total += self.data.prod2_var_cost[t] * self.x2[t]
+                total += production['var_cost'][t] * x[t]
 
         # 3. Holding Cost
         for t in range(T):
             # Tồn kho tại các stage
-            for k in range(1, self.data.K + 1):
+            for k in range(1, self.K + 1):
                 total += self.data.holding_cost[t] * self.i[k, t]
             
             # In-transit inventory
-            if self.data.K == 4:
-                intransit_legs = [2, 3]
-            elif self.data.K == 5:
-                intransit_legs = [2, 4]
-            else:
-                intransit_legs = []
-            
-            for k in intransit_legs:
+            for k in self.intransit_legs:
                 total += self.y[k, t] * self.data.holding_cost[t]
             
         # 4. Transportation Cost
         transport_intervals = self.data.freight_actual
         for t in range(T):
-            if self.data.K == 4:
-                freight_legs = [3]
-            elif self.data.K == 5:
-                freight_legs = [2, 4]
-            else:
-                freight_legs = []
-            
-            for k in freight_legs:
+            for k in self.freight_legs:
                 for e, iv in enumerate(transport_intervals):
                     total += iv['fixed_cost'] * self.f_freight[k, t, e]
                     total += iv['var_cost_per_unit'] * self.y_freight[k, t, e]
 
         self.solver.Minimize(total)
+        self._cost_parts = None
 
-    def solve(self):
+    def objective_parts(self):
+        """
+        Vector hệ số objective theo nhóm chi phí (purchasing, production_site1,
+        production_site2, holding, transport), cùng chỉ số với solution_values(solver);
+        objective = tổng các vector . values. Được cache, tính lại sau khi hệ số objective đổi.
+        """
+        if self._cost_parts is not None:
+            return self._cost_parts
+        d, idx = self.data, self.idx
+        parts = {key: np.zeros(self.solver.NumVariables())
+                 for key in ('purchasing', 'production_site1', 'production_site2', 'holding', 'transport')}
+
+        p = parts['purchasing']
+        for j, (supplier, breaks) in enumerate(zip(d.suppliers, d.price_breaks)):
+            rows = self.price_supplier == j
+            p[idx['s_price'][rows]] = breaks.base_cost + supplier['primary_cost']
+            p[idx['r_price'][rows]] = breaks.price
+            p[idx['z'][j]] = supplier['secondary_cost']
+
+        for site, arc in self.sites.items():
+            x, group = ('x', 'w_prod_group') if site == 1 else ('x2', 'w_prod2_group')
+            p = parts[f'production_site{site}']
+            p[idx[x]] = arc['production']['var_cost']
+            p[idx[group]] = np.asarray(arc['production']['fixed_cost'], dtype=float)[::d.m][:d.base_T]
+
+        p = parts['holding']
+        p[idx['i']] = d.holding_cost
+        for k in self.intransit_legs:
+            p[idx['y'][k - 1]] = d.holding_cost
+
+        p = parts['transport']
+        p[idx['f_freight']] = [iv['fixed_cost'] for iv in d.freight_actual]
+        p[idx['y_freight']] = [iv['var_cost_per_unit'] for iv in d.freight_actual]
+        self._cost_parts = parts
+        return parts
+
+    def set_hint(self, values):
+        """
+        MIP start cho SCIP: values = {tên biến: giá trị}, ví dụ nghiệm của instance m
+        thô hơn đã lift qua warm_start.lift_solution(). Gọi sau create_variables().
+        Tên không có trong model bị bỏ qua; hint thiếu biến được SCIP tự hoàn thiện.
+        """
+        by_name = {v.name(): v for v in self.solver.variables()}
+        names = [name for name in values if name in by_name]
+        self.solver.SetHint([by_name[name] for name in names], [float(values[name]) for name in names])
+        return len(names)
+
+    def set_objective_cutoff(self, cutoff):
+        """
+        Cận trên ban đầu cho objective (vd. chi phí của 1 phương án khả thi đã biết):
+        thêm ràng buộc objective <= cutoff để SCIP cắt bỏ mọi node không tốt hơn.
+        Gọi sau set_objective(); cutoff=None gỡ bỏ cận.
+        """
+        ub = self.infinity if cutoff is None else cutoff - self.solver.Objective().offset()
+        self._objective_row().SetUb(ub)
+
+    def set_objective_lower_bound(self, bound):
+        """
+        Cận dưới đã biết của objective (vd. giá trị relaxation giải bằng DP trong
+        lot_sizing_dp.py): thêm objective >= bound (cùng hàng với cutoff) để dual bound
+        của SCIP bắt đầu từ đó. bound=None gỡ bỏ cận.
+        """
+        lb = -self.infinity if bound is None else bound - self.solver.Objective().offset()
+        self._objective_row().SetLb(lb)
+
+    def _objective_row(self):
+        """Hàng lb <= objective <= ub dùng chung cho cutoff / lower bound (tạo lần đầu gọi)."""
+        if not hasattr(self, 'cutoff_constraint'):
+            objective = self.solver.Objective()
+            self.cutoff_constraint = self.solver.Constraint(-self.infinity, self.infinity)
+            for var in self.solver.variables():
+                coef = objective.GetCoefficient(var)
+                if coef:
+                    self.cutoff_constraint.SetCoefficient(var, coef)
+        return self.cutoff_constraint
+
+    # ------------------------------------------------------------------
+    # Incremental update: đổi tham số ngay trên solver đã build rồi resolve(),
+    # không dựng lại SupplyChainData / SupplyChainModel.
+    # ------------------------------------------------------------------
+    def _own_data(self):
+        """Copy data trước lần sửa đầu tiên để không đổi SupplyChainData của caller."""
+        if not getattr(self, '_data_owned', False):
+            self.data = copy.deepcopy(self.data)
+            self._data_owned = True
+
+    def _set_cost(self, var, coef):
+        self.solver.Objective().SetCoefficient(var, float(coef))
+        self._cost_parts = None
+        if hasattr(self, 'cutoff_constraint'):
+            self.cutoff_constraint.SetCoefficient(var, float(coef))
+
+    def update(self, **changes):
+        """
+        Đổi tham số theo kỳ / toàn cục ngay trên model đã build. Các field hỗ trợ
+        (cùng tên, cùng dạng với SupplyChainData):
+            demand                      -> vế phải ràng buộc cân bằng stage cuối
+            holding_cost                -> hệ số objective của i và hàng in-transit
+            prod_var_cost, prod_fixed_cost, prod2_var_cost, prod2_fixed_cost
+                                        -> hệ số objective của x / w_prod_group (site 1, 2)
+            prod_capacity, prod2_capacity
+                                        -> hệ số x <= cap * w_prod và vế phải tổng theo kỳ gốc
+            trans_capacity              -> hệ số y <= cap * w_trans
+            inventory_capacity          -> upper bound của i
+            freight_actual              -> chi phí + khoảng [min, max] của cước vận chuyển
+        Supplier: dùng update_supplier().
+        """
+        handlers = {
+            'demand': self._update_demand,
+            'holding_cost': self._update_holding_cost,
+            'prod_var_cost': lambda v: self._update_production_cost(1, var_cost=v),
+            'prod_fixed_cost': lambda v: self._update_production_cost(1, fixed_cost=v),
+            'prod2_var_cost': lambda v: self._update_production_cost(2, var_cost=v),
+            'prod2_fixed_cost': lambda v: self._update_production_cost(2, fixed_cost=v),
+            'prod_capacity': lambda v: self._update_prod_capacity(1, v),
+            'prod2_capacity': lambda v: self._update_prod_capacity(2, v),
+            'trans_capacity': self._update_trans_capacity,
+            'inventory_capacity': self._update_inventory_capacity,
+            'freight_actual': self._update_freight,
+        }
+        unknown = set(changes) - set(self.UPDATABLE_FIELDS)
+        if unknown:
+            raise ValueError(f"Không hỗ trợ update incremental cho: {sorted(unknown)}")
+        self._own_data()
+        for field, value in changes.items():
+            handlers[field](value)
+        if set(changes) & set(self.LOT_SIZING_FIELDS):
+            self._drop_lot_sizing_cuts()
+
+    def _drop_lot_sizing_cuts(self):
+        """
+        Bất đẳng thức lot-sizing tính từ demand / capacity / receipts cũ có thể cắt mất nghiệm
+        của tham số mới. pywraplp không xóa được dòng -> xóa hệ số, nới bound thành (-inf, inf);
+        với self.lot_sizing đã đặt, solve() kế tiếp thêm lại từ đầu.
+        """
+        for row in self.lot_sizing_rows or []:
+            row.Clear()
+            row.SetBounds(-self.infinity, self.infinity)
+        self.lot_sizing_rows = None
+
+    def _update_demand(self, demand):
+        demand = np.asarray(demand, dtype=float)
+        delta = demand - np.asarray(self.data.demand, dtype=float)
+        for t, row in self.demand_rows.items():
+            # demand nằm cùng vế với i[k, t] của node nhu cầu; pywraplp có thể đã đổi vế khi chuẩn hóa
+            # (vd. t = 0 khi vế trái là hằng số) -> lấy dấu từ hệ số của i[K, t]
+            shift = -row.GetCoefficient(self.i[self.demand_node, t]) * delta[t]
+            row.SetBounds(row.lb() + shift, row.ub() + shift)
+        self.data.demand = demand
+        self.graph.node(self.demand_node)['demand'] = demand
+
+    def _update_holding_cost(self, holding_cost):
+        holding_cost = np.asarray(holding_cost, dtype=float)
+        for t in range(self.data.T):
+            for k in range(1, self.K + 1):
+                self._set_cost(self.i[k, t], holding_cost[t])
+            for k in self.intransit_legs:
+                self._set_cost(self.y[k, t], holding_cost[t])
+        self.data.holding_cost = holding_cost
+
+    def _update_production_cost(self, site, var_cost=None, fixed_cost=None):
+        x, _, group = self._site_vars(site)
+        production = self.sites[site]['production'] if site in self.sites else {}
+        prefix = 'prod' if site == 1 else 'prod2'
+        if var_cost is not None:
+            var_cost = np.asarray(var_cost, dtype=float)
+            if production:
+                for t in range(self.data.T):
+                    self._set_cost(x[t], var_cost[t])
+                production['var_cost'] = var_cost
+            setattr(self.data, f'{prefix}_var_cost', var_cost)
+        if fixed_cost is not None:
+            fixed_cost = np.asarray(fixed_cost, dtype=float)
+            if production:
+                for t_base in range(self.data.base_T):
+                    self._set_cost(group[t_base], fixed_cost[t_base * self.data.m])
+                production['fixed_cost'] = fixed_cost
+            setattr(self.data, f'{prefix}_fixed_cost', fixed_cost)
+
+    def _update_prod_capacity(self, site, capacity):
+        capacity = np.asarray(capacity, dtype=float)
+        w_prod = self.w_prod if site == 1 else self.w_prod2
+        m = self.data.m
+        for (s, t), row in self.prod_cap_rows.items():
+            if s == site:
+                row.SetCoefficient(w_prod[t], -capacity[(t // m) * m])
+        for (s, t_base), row in self.prod_block_rows.items():
+            if s == site:
+                row.SetUb(capacity[t_base * m])
+        if site in self.sites:
+            self.sites[site]['production']['capacity'] = capacity
+        setattr(self.data, 'prod_capacity' if site == 1 else 'prod2_capacity', capacity)
+
+    def _update_trans_capacity(self, capacity):
+        capacity = np.asarray(capacity, dtype=float)
+        for (k, t), row in self.trans_cap_rows.items():
+            row.SetCoefficient(self.w_trans[k, t], -capacity[t])
+        for arc in self.graph.arcs:
+            if arc['transport_capacity'] is not None:
+                arc['transport_capacity'] = capacity
+        self.data.trans_capacity = capacity
+        if self.tight:
+            for (k, t, e), row in self.freight_max_rows.items():
+                row.SetCoefficient(self.f_freight[k, t, e], -self._freight_max(self.data.freight_actual[e], t))
+
+    def _update_inventory_capacity(self, capacity):
+        for var in self.i.values():
+            var.SetUb(capacity)
+        self.data.inventory_capacity = capacity
+
+    def _update_freight(self, intervals):
+        for (k, t, e), row in self.freight_min_rows.items():
+            iv = intervals[e]
+            row.SetCoefficient(self.f_freight[k, t, e], -iv['min'])
+            self.freight_max_rows[k, t, e].SetCoefficient(self.f_freight[k, t, e], -self._freight_max(iv, t))
+            self._set_cost(self.f_freight[k, t, e], iv['fixed_cost'])
+            self._set_cost(self.y_freight[k, t, e], iv['var_cost_per_unit'])
+        self.data.freight_actual = [dict(iv) for iv in intervals]
+
+    def update_supplier(self, j_idx, primary_cost=None, secondary_cost=None, prices=None,
+                        min_order=None, cumulative_capacity=None):
+        """
+        Đổi tham số của supplier j_idx ngay trên model: chi phí cố định, đơn giá từng
+        khoảng giá (prices = list theo price_intervals, giữ nguyên max_q), min order và
+        cumulative capacity.
+        """
+        self._own_data()
+        supplier = self.data.suppliers[j_idx]
+        intervals = supplier['price_intervals']
+        if primary_cost is not None:
+            supplier['primary_cost'] = primary_cost
+        if secondary_cost is not None:
+            supplier['secondary_cost'] = secondary_cost
+            for t in range(self.data.T):
+                self._set_cost(self.z[j_idx, t], secondary_cost)
+        if prices is not None:
+            for interval, price in zip(intervals, prices):
+                interval['price'] = price
+            self.data.refresh_price_breaks()
+        if primary_cost is not None or prices is not None:
+            breaks = self.data.price_breaks[j_idx]
+            for g in range(len(intervals)):
+                self._set_cost(self.s_price[j_idx, g], breaks.base_cost[g] + supplier['primary_cost'])
+                self._set_cost(self.r_price[j_idx, g], breaks.price[g])
+        if min_order is not None:
+            supplier['min_order'] = min_order
+            for t in range(self.data.T):
+                self.min_order_rows[j_idx, t].SetCoefficient(self.z[j_idx, t], -min_order)
+        if cumulative_capacity is not None:
+            cap = np.asarray(cumulative_capacity, dtype=float)
+            suffix_min = np.minimum.accumulate(cap[::-1])[::-1]
+            binding = np.append(cap[:-1] < suffix_min[1:], True)
+            for t in range(self.data.T):
+                if (j_idx, t) in self.cum_cap_rows:
+                    self.cum_cap_rows[j_idx, t].SetUb(cap[t])
+                elif binding[t]:
+                    # Dòng trước đây thừa nay có thể chặt -> thêm mới
+                    self.cum_cap_rows[j_idx, t] = self.solver.Add(
+                        sum(self.q[j_idx, tt] for tt in range(t + 1)) <= cap[t])
+            supplier['cumulative_capacity'] = cap
+            if self.tight:
+                for t in range(self.data.T):
+                    self.max_order_rows[j_idx, t].SetCoefficient(self.z[j_idx, t], -self._max_order(j_idx, t))
+
+    # Trạng thái đầu kỳ khi model chỉ là 1 cửa sổ của horizon dài (rolling_horizon.py)
+    def add_receipts(self, receipts):
+        """
+        Hàng đang đi đường từ trước kỳ 0: receipts = {(k, t): qty} cộng vào luồng vào
+        stage k ở kỳ t.
+        """
+        for (k, t), qty in receipts.items():
+            self.receipts[k, t] = self.receipts.get((k, t), 0.0) + qty
+            row = self.flow_rows[k, t]
+            shift = row.GetCoefficient(self.i[k, t]) * qty
+            row.SetBounds(row.lb() + shift, row.ub() + shift)
+        self._drop_lot_sizing_cuts()
+
+    def set_prior_purchases(self, prior):
+        """
+        Lượng đã mua từ mỗi supplier trước kỳ 0: bậc giá tính trên prior[j] + sum q[j, t]
+        (objective khi đó gồm cả chi phí của phần đã mua - một hằng số).
+        """
+        for j_idx, qty in enumerate(prior):
+            row = self.price_rows[j_idx]
+            shift = -row.GetCoefficient(self.q[j_idx, 0]) * qty
+            row.SetBounds(row.lb() + shift, row.ub() + shift)
+
+    def free_ending_inventory(self):
+        """Bỏ ràng buộc tồn kho cuối kỳ (cửa sổ không phải cuối horizon)."""
+        T = self.data.T
+        for k, row in self.ending_rows.items():
+            if row.GetCoefficient(self.i[k, T - 1]) > 0:
+                row.SetBounds(0, self.infinity)
+            else:
+                row.SetBounds(-self.infinity, 0)
+
+    def set_ending_inventory_target(self, targets):
+        """Tồn kho cuối kỳ >= targets[k] thay cho ràng buộc bằng (cửa sổ có look-ahead giới hạn)."""
+        T = self.data.T
+        for k, row in self.ending_rows.items():
+            coef = row.GetCoefficient(self.i[k, T - 1])
+            if coef > 0:
+                row.SetBounds(coef * targets[k], self.infinity)
+            else:
+                row.SetBounds(-self.infinity, coef * targets[k])
+
+    def resolve(self, callback=None, trace_path=None):
+        """
+        Giải lại sau update()/update_supplier() trên cùng solver. Nếu đã có nghiệm
+        trước đó, các biến nguyên của nghiệm cũ được dùng làm hint (SCIP hoàn thiện
+        phần liên tục bằng completesol nếu phương án cũ vẫn dùng được).
+        callback / trace_path: như solve().
+        """
+        if self.last_solution is not None:
+            pairs = [(var, value) for var, value in zip(self.solver.variables(), self.last_solution)
+                     if var.integer()]
+            self.solver.SetHint([var for var, _ in pairs], [value for _, value in pairs])
+        return self.solve(callback=callback, trace_path=trace_path)
+
+    def set_time_limit(self, seconds):
+        """Giới hạn thời gian cho mọi backend (pywraplp không cho đọc lại time limit)."""
+        self.time_limit = seconds
+        self.solver.SetTimeLimit(int(seconds * 1000))
+
+    def _search_params(self):
+        return {name: self.params.get(name) for name in ('rel_gap', 'abs_gap', 'emphasis', 'seed')}
+
+    def set_parameters(self, threads=None, time_limit=None, rel_gap=None, abs_gap=None, emphasis=None,
+                       seed=None, safe=None):
+        """
+        Tham số giải, áp dụng cho mọi lần solve() / resolve() sau đó (xem solver_backends.py):
+        threads, time_limit (giây), rel_gap / abs_gap (gap dừng), emphasis ('balanced',
+        'feasibility', 'optimality'), seed và safe (SCIP: SCIP_SAFE). Tham số None giữ giá trị
+        đã đặt trước đó.
+        Trả về list tham số backend không hỗ trợ (bị bỏ qua).
+        """
+        given = dict(threads=threads, time_limit=time_limit, rel_gap=rel_gap, abs_gap=abs_gap,
+                     emphasis=emphasis, seed=seed, safe=safe)
+        self.params.update({name: value for name, value in given.items() if value is not None})
+        if time_limit is not None:
+            self.set_time_limit(time_limit)
+        if self.backend == 'CP-SAT':
+            return []
+        if threads is not None and not self.solver.SetNumThreads(threads):
+            print(f"[WARN] {self.backend}: không đặt được threads = {threads}")
+        self.mp_params, specific, ignored = solver_parameters(self.backend, safe=self.params.get('safe'),
+                                                               **self._search_params())
+        if specific and not self.solver.SetSolverSpecificParametersAsString(specific):
+            print(f"[WARN] {self.backend}: tham số riêng bị từ chối:\n{specific}")
+        if ignored:
+            print(f"[WARN] {self.backend} không hỗ trợ {', '.join(ignored)} (bị bỏ qua)")
+        return ignored
+
+    def _solve_backend(self):
+        if self.backend == 'CP-SAT':
+            restore_bounds(self.cp_sat_fixed)
+            status, self.cp_sat_fixed, self.cp_sat_info = solve_cp_sat(
+                self.solver, self.time_limit, workers=self.params.get('threads'), **self._search_params())
+            return status
+        if self.mp_params is not None:
+            return self.solver.Solve(self.mp_params)
+        return self.solver.Solve()
+
+    def solve(self, callback=None, trace_path=None):
+        """
+        Giải model; True nếu tối ưu. callback(event) / trace_path (CSV): theo dõi incumbent,
+        dual bound, gap, số node trong lúc SCIP giải (solve_monitor.py); chuỗi sự kiện nằm
+        trong self.trace. callback trả về True để dừng sớm.
+        """
+        if self.lot_sizing and self.lot_sizing_rows is None:
+            self.lot_sizing_rows = []
+            print(f"Lot-sizing cuts ({self.lot_sizing}): {add_lot_sizing_cuts(self, self.lot_sizing)} rows")
         print("Solving...")
-        status = self.solver.Solve()
+        if (callback or trace_path) and self.backend == 'SCIP':
+            monitor = SolveMonitor(callback, trace_path)
+            with monitor.attach(self.solver):
+                status = self._solve_backend()
+            self.trace = monitor.trace
+        else:
+            if callback or trace_path:
+                print(f"[WARN] Theo dõi tiến trình chỉ hỗ trợ SCIP, không có cho {self.backend}")
+            status = self._solve_backend()
+        self.status = status
         self.cpu_time = self.solver.WallTime() / 1000.0  # Convert ms to seconds
         if status == pywraplp.Solver.OPTIMAL:
+            self.last_solution = solution_values(self.solver)
             obj_val = self.solver.Objective().Value()
             print(f"Objective value = {obj_val:,.0f}")
             print(f"CPU time = {self.cpu_time:.2f}s")
             return True
         else:
+            if self.backend == 'CP-SAT' and self.cp_sat_info and self.cp_sat_info['cp_status'] == 'OPTIMAL':
+                print(f"[CP-SAT] Tối ưu trên lưới 1/{self.cp_sat_info['scale']} (không phải tối ưu được chứng minh): "
+                      f"objective = {self.solver.Objective().Value():,.2f}")
             print('No optimal solution found.')
             return False
     
@@ -339,81 +793,21 @@ class SupplyChainModel:
     def get_cost_breakdown(self):
         """
         Trả về dict chứa breakdown cost: purchasing, production, holding, transport
+        (tích vô hướng objective_parts() với vector nghiệm lấy 1 lần).
         """
-        T = self.data.T
-        m = self.data.m
-        purch, prod1, prod2, hold, transp = 0.0, 0.0, 0.0, 0.0, 0.0
-
-        # 1. Purchasing Cost
-        for j_idx, supplier in enumerate(self.data.suppliers):
-            intervals = supplier['price_intervals']
-            for g, interval in enumerate(intervals):
-                base_cost = 0.0
-                for pg in range(g):
-                    w = intervals[pg]['max_q'] - (0 if pg == 0 else intervals[pg-1]['max_q'])
-                    base_cost += w * intervals[pg]['price']
-                purch += (self.s_price[j_idx, g].solution_value() * base_cost +
-                          self.r_price[j_idx, g].solution_value() * interval['price'])
-            
-            is_selected = sum(self.s_price[j_idx, g].solution_value() for g in range(len(intervals)))
-            purch += supplier['primary_cost'] * is_selected
-            for t in range(T):
-                purch += supplier['secondary_cost'] * self.z[j_idx, t].solution_value()
-
-        # 2. Production Cost - Site 1
-        for t_base in range(self.data.base_T):
-            fixed_cost = self.data.prod_fixed_cost[t_base * m]
-            prod1 += fixed_cost * self.w_prod_group[t_base].solution_value()
-        for t in range(T):
-            prod1 += self.data.prod_var_cost[t] * self.x[t].solution_value()
-        
-        # 2b. Production Cost - Site 2
-        if self.data.K == 5:
-            for t_base in range(self.data.base_T):
-                fixed_cost2 = self.data.prod2_fixed_cost[t_base * m]
-                prod2 += fixed_cost2 * self.w_prod2_group[t_base].solution_value()
-            for t in range(T):
-                prod2 += self.data.prod2_var_cost[t] * self.x2[t].solution_value()
-
-        # 3. Holding Cost
-        for t in range(T):
-            for k in range(1, self.data.K + 1):
-                hold += self.data.holding_cost[t] * self.i[k, t].solution_value()
-            
-            if self.data.K == 4:
-                intransit_legs = [2, 3]
-            elif self.data.K == 5:
-                intransit_legs = [2, 4]
-            else:
-                intransit_legs = []
-            
-            for k in intransit_legs:
-                hold += self.y[k, t].solution_value() * self.data.holding_cost[t]
-
-        # 4. Transportation Cost
-        intervals = self.data.freight_actual
-        for t in range(T):
-            if self.data.K == 4:
-                freight_legs = [3]
-            elif self.data.K == 5:
-                freight_legs = [2, 4]
-            else:
-                freight_legs = []
-            
-            for k in freight_legs:
-                for e, iv in enumerate(intervals):
-                    transp += (iv['fixed_cost'] * self.f_freight[k, t, e].solution_value() +
-                               iv['var_cost_per_unit'] * self.y_freight[k, t, e].solution_value())
-
+        values = solution_values(self.solver)
+        costs = {key: float(vec @ values[:len(vec)]) for key, vec in self.objective_parts().items()}
+        prod1, prod2 = costs['production_site1'], costs['production_site2']
         production_total = prod1 + prod2
+        total = costs['purchasing'] + production_total + costs['holding'] + costs['transport']
         return {
-            'purchasing': purch,
+            'purchasing': costs['purchasing'],
             'production': production_total,
             'production_site1': prod1,
             'production_site2': prod2,
-            'holding': hold,
-            'transport': transp,
-            'total': purch + production_total + hold + transp
+            'holding': costs['holding'],
+            'transport': costs['transport'],
+            'total': total
         }
 
     def get_purchasing_plan(self):
@@ -421,11 +815,8 @@ class SupplyChainModel:
         Trả về dict chứa purchasing plan theo từng kỳ và supplier
         Format: { t: [qty_sup0, qty_sup1, ...], ... }
         """
-        T = self.data.T
-        plan = {}
-        for t in range(T):
-            plan[t] = [self.q[j, t].solution_value() for j in range(len(self.data.suppliers))]
-        return plan
+        q = solution_values(self.solver)[self.idx['q']]
+        return {t: q[:, t].tolist() for t in range(self.data.T)}
 
     def print_detailed_results(self):
         """
@@ -439,7 +830,7 @@ class SupplyChainModel:
         print("COST BREAKDOWN:")
         print(f"  Purchasing:   {breakdown['purchasing']:,.0f}")
         print(f"  Production:   {breakdown['production']:,.0f}")
-        if self.data.K == 5:
+        if 2 in self.sites:
             print(f"    - Site 1:   {breakdown['production_site1']:,.0f}")
             print(f"    - Site 2:   {breakdown['production_site2']:,.0f}")
         print(f"  Holding:      {breakdown['holding']:,.0f}")
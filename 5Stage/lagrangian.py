@@ -0,0 +1,315 @@
+"""
+Lagrangian relaxation theo khối cho SupplyChainModel: cận dưới + phương án khả thi + gap
+cho instance lớn (nhiều kỳ, 5-stage) mà SCIP không đóng được gap.
+
+Ràng buộc cân bằng luồng (model.flow_rows, cộng y[3, t] == x2[t] ở 5-stage:
+model.site_ship_rows) là ràng buộc DUY NHẤT nối các khối biến:
+
+    supplier          q, z, s_price, r_price
+    production_site1  x, w_prod, w_prod_group
+    production_site2  x2, w_prod2, w_prod2_group
+    transport         y, w_trans, f_freight, y_freight
+    inventory         i
+
+Đưa các hàng nối (A x = b) vào objective với nhân tử lambda:
+
+    L(lambda) = lambda . b + sum_khối min { (c_B - A_B^T lambda) x_B : x_B thỏa ràng buộc của khối }
+
+Các khối giải độc lập (SCIP, song song bằng thread - Solve() nhả GIL). L(lambda) (tổng
+BestBound của các khối) là cận dưới hợp lệ của MILP với mọi lambda và thường chặt hơn LP
+relaxation vì tính nguyên giữ nguyên trong từng khối. Nhân tử:
+
+- khởi tạo bằng dual của LP relaxation (các hàng nối), nên L(lambda_0) >= cận LP;
+- cập nhật bằng subgradient bước Polyak: lambda += theta (UB - L) / |g|^2 g, với
+  g = b - A x là độ lệch luồng của nghiệm các khối; theta giảm một nửa sau `patience`
+  vòng L không tăng.
+
+Repair heuristic: cố định setup sản xuất (w_prod*, w_prod*_group) theo nghiệm khối
+production rồi giải model đầy đủ (nghiệm Lagrangian làm hint, time limit
+repair_time_limit). Nếu vô nghiệm, giữ các setup đã mở và cho mở thêm. Mỗi mẫu setup
+chỉ repair 1 lần. Dừng khi gap <= gap_tol, hết vòng lặp, theta quá nhỏ hoặc hết time_budget.
+
+Chạy:
+    python lagrangian.py --stages 5 --m 2 --cycles 4 --iterations 60
+    python lagrangian.py --stages 4 --m 1 --monolithic      # so với SCIP
+"""
+
+import argparse
+import contextlib
+import io
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from ortools.linear_solver import linear_solver_pb2, pywraplp
+
+from data_loader import SupplyChainData
+from rolling_horizon import OK_STATUS, _build, repeat_horizon, solve_monolithic
+from solver_backends import create_solver
+
+BLOCKS = (('supplier', ('q', 'z', 's_price', 'r_price')),
+          ('production_site1', ('x', 'w_prod', 'w_prod_group')),
+          ('production_site2', ('x2', 'w_prod2', 'w_prod2_group')),
+          ('transport', ('y', 'w_trans', 'f_freight', 'y_freight')),
+          ('inventory', ('i',)))
+LINKING_ROWS = (('flow', 'flow_rows'), ('site_ship', 'site_ship_rows'))
+SETUP_VARS = ('w_prod', 'w_prod_group', 'w_prod2', 'w_prod2_group')
+
+
+class Block:
+    """1 khối biến: SCIP riêng chứa các hàng chỉ dùng biến của khối."""
+
+    def __init__(self, name, cols, proto, rows, linked):
+        self.name = name
+        self.cols = cols
+        self.solver = create_solver('SCIP')
+        self.vars = [self.solver.Var(proto.variable[c].lower_bound, proto.variable[c].upper_bound,
+                                     proto.variable[c].is_integer, proto.variable[c].name) for c in cols]
+        local = {c: v for c, v in zip(cols, self.vars)}
+        for r in rows:
+            row = proto.constraint[r]
+            constraint = self.solver.Constraint(row.lower_bound, row.upper_bound)
+            for c, a in zip(row.var_index, row.coefficient):
+                constraint.SetCoefficient(local[c], a)
+        objective = self.solver.Objective()
+        for c, v in zip(cols, self.vars):
+            objective.SetCoefficient(v, proto.variable[c].objective_coefficient)
+        objective.SetMinimization()
+        # Chỉ biến nằm trong hàng nối đổi hệ số theo lambda
+        self.linked = np.flatnonzero(linked[cols])
+        self.values = self.bound = None
+
+    def solve(self, cost, time_limit=None):
+        """Giải với hệ số objective mới (cost: vector cả model). Khối không nối giải 1 lần."""
+        if self.values is not None and not len(self.linked):
+            return self
+        objective = self.solver.Objective()
+        for p in self.linked:
+            objective.SetCoefficient(self.vars[p], cost[self.cols[p]])
+        if time_limit:
+            self.solver.SetTimeLimit(int(time_limit * 1000))
+        status = self.solver.Solve()
+        if status not in OK_STATUS:
+            raise RuntimeError(f"Khối {self.name}: không giải được (status {status})")
+        self.values = np.array([v.solution_value() for v in self.vars])
+        # BestBound: cận hợp lệ cả khi dừng theo gap / time limit
+        self.bound = min(objective.BestBound(), objective.Value())
+        return self
+
+
+class LagrangianDecomposition:
+    """
+    Trên 1 SupplyChainModel dựng từ data. workers: số thread giải khối (mặc định = số khối);
+    sub_time_limit: giây cho mỗi lần giải khối (cận dưới vẫn hợp lệ nhờ BestBound);
+    repair_time_limit / repair_gap: giây và gap dừng (tương đối) cho mỗi lần repair - repair
+    chỉ cần phương án tốt, không cần chứng minh tối ưu. Sau run(): bound (L tốt nhất), objective
+    (phương án repair tốt nhất), gap, solution (giá trị mọi biến theo thứ tự
+    solver.variables()), multipliers (lambda tốt nhất theo (họ, key) của hàng nối, vd. ('flow', (2, t))) và history.
+    """
+
+    def __init__(self, data, workers=None, sub_time_limit=None, repair_time_limit=30, repair_gap=0.01):
+        self.data = data
+        self.model = _build(data, repair_time_limit)
+        self.solver = self.model.solver
+        self.integer = np.array([var.integer() for var in self.solver.variables()])
+        self.sub_time_limit = sub_time_limit
+        self.repair_params = pywraplp.MPSolverParameters()
+        self.repair_params.SetDoubleParam(pywraplp.MPSolverParameters.RELATIVE_MIP_GAP, repair_gap)
+        proto = linear_solver_pb2.MPModelProto()
+        self.solver.ExportModelToProto(proto)
+        self.n = len(proto.variable)
+        self.cost = np.array([v.objective_coefficient for v in proto.variable])
+        self.offset = proto.objective_offset
+        self._build_linking(proto)
+        self._build_blocks(proto)
+        self.workers = workers or len(self.blocks)
+        self.bound = self.objective = self.solution = self.multipliers = None
+        self.history = []
+        self._tried = set()
+
+    # ------------------------------------------------------------------ setup
+    def _build_linking(self, proto):
+        handles = [((family, key), row) for family, attr in LINKING_ROWS
+                   for key, row in getattr(self.model, attr).items()]
+        self.link_keys = [key for key, _ in handles]
+        self.link_rows = np.array([row.index() for _, row in handles], dtype=np.int64)
+        rows = [proto.constraint[r] for r in self.link_rows]
+        if any(row.lower_bound != row.upper_bound for row in rows):
+            raise ValueError("Hàng nối phải là ràng buộc đẳng thức")
+        self.rhs = np.array([row.lower_bound for row in rows])
+        self._nz_row = np.concatenate([np.full(len(row.var_index), p) for p, row in enumerate(rows)])
+        self._nz_col = np.array([c for row in rows for c in row.var_index], dtype=np.int64)
+        self._nz_coef = np.array([a for row in rows for a in row.coefficient])
+
+    def _build_blocks(self, proto):
+        col_block = np.full(self.n, -1, dtype=np.int64)
+        for b, (_, families) in enumerate(BLOCKS):
+            for family in families:
+                col_block[self.model.idx[family].ravel()] = b
+        if np.any(col_block < 0):
+            raise ValueError(f"Biến không thuộc khối nào: {np.flatnonzero(col_block < 0)[:5]}")
+        linking = set(self.link_rows.tolist())
+        rows_of = [[] for _ in BLOCKS]
+        for r, row in enumerate(proto.constraint):
+            if r in linking or not len(row.var_index):
+                continue
+            owners = set(col_block[list(row.var_index)].tolist())
+            if len(owners) > 1:
+                raise ValueError(f"Hàng {r} ({row.name}) nối nhiều khối nhưng không thuộc LINKING_ROWS")
+            rows_of[owners.pop()].append(r)
+        linked = np.zeros(self.n, dtype=bool)
+        linked[self._nz_col] = True
+        self.blocks = [Block(name, np.flatnonzero(col_block == b), proto, rows_of[b], linked)
+                       for b, (name, _) in enumerate(BLOCKS) if np.any(col_block == b)]
+
+    def lp_multipliers(self):
+        """Dual của các hàng nối trong LP relaxation (GLOP) và cận LP."""
+        proto = linear_solver_pb2.MPModelProto()
+        self.solver.ExportModelToProto(proto)
+        for var in proto.variable:
+            var.is_integer = False
+        lp = pywraplp.Solver.CreateSolver('GLOP')
+        lp.LoadModelFromProto(proto)
+        if lp.Solve() != pywraplp.Solver.OPTIMAL:
+            raise RuntimeError("LP relaxation không giải được")
+        constraints = lp.constraints()
+        return np.array([constraints[r].dual_value() for r in self.link_rows]), lp.Objective().Value()
+
+    # ------------------------------------------------------------------ Lagrangian
+    def lagrangian(self, lam, pool=None):
+        """(L(lambda), nghiệm các khối ghép thành vector cả model, subgradient b - A x)."""
+        cost = self.cost - np.bincount(self._nz_col, weights=self._nz_coef * lam[self._nz_row], minlength=self.n)
+        solve = lambda block: block.solve(cost, self.sub_time_limit)
+        blocks = list(pool.map(solve, self.blocks)) if pool is not None else [solve(b) for b in self.blocks]
+        x = np.zeros(self.n)
+        value = self.offset + lam @ self.rhs
+        for block in blocks:
+            x[block.cols] = block.values
+            value += block.bound
+        activity = np.bincount(self._nz_row, weights=self._nz_coef * x[self._nz_col], minlength=len(self.rhs))
+        return value, x, self.rhs - activity
+
+    # ------------------------------------------------------------------ repair
+    def repair(self, x):
+        """
+        Phương án khả thi từ nghiệm Lagrangian x: cố định setup sản xuất theo x; nếu vô
+        nghiệm (thiếu capacity), chỉ giữ các setup x đã mở và cho phép mở thêm. Trả về
+        objective hoặc None.
+        """
+        setup = np.concatenate([self.model.idx[name].ravel() for name in SETUP_VARS])
+        hint = np.round(x)
+        pattern = tuple(hint[setup].astype(int))
+        if pattern in self._tried:
+            return None
+        self._tried.add(pattern)
+        variables = self.solver.variables()
+        obj = None
+        for upper in (hint[setup], np.ones(len(setup))):
+            for c, ub in zip(setup, upper):
+                variables[c].SetBounds(hint[c], ub)
+            self.solver.SetHint(variables, np.where(self.integer, hint, x).tolist())
+            with contextlib.redirect_stdout(io.StringIO()):
+                status = self.solver.Solve(self.repair_params)
+            if status in OK_STATUS:
+                obj = self.solver.Objective().Value()
+                if self.objective is None or obj < self.objective:
+                    self.objective = obj
+                    self.solution = [var.solution_value() for var in variables]
+                break
+        for c in setup:
+            variables[c].SetBounds(0, 1)
+        return obj
+
+    # ------------------------------------------------------------------ main loop
+    def run(self, iterations=50, theta=2.0, patience=5, repair_every=10, gap_tol=1e-3, time_budget=None):
+        start = time.perf_counter()
+        lam, self.lp_bound = self.lp_multipliers()
+        best_lam, stall = lam, 0
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            for it in range(iterations):
+                t0 = time.perf_counter()
+                value, x, g = self.lagrangian(lam, pool)
+                sub_time = time.perf_counter() - t0
+                if self.bound is None or value > self.bound + 1e-9 * max(1.0, abs(value)):
+                    self.bound, best_lam, stall = value, lam, 0
+                else:
+                    stall += 1
+                    if stall >= patience:
+                        theta, stall = theta / 2, 0
+                repaired, t0 = None, time.perf_counter()
+                if it % repair_every == 0 or it == iterations - 1:
+                    repaired = self.repair(x)
+                norm = float(g @ g)
+                self.history.append({'iteration': it, 'lagrangian': value, 'bound': self.bound,
+                                     'objective': self.objective, 'repair': repaired, 'theta': theta,
+                                     'violation': float(np.abs(g).sum()), 'sub_time': sub_time,
+                                     'repair_time': time.perf_counter() - t0,
+                                     'elapsed': time.perf_counter() - start})
+                if norm < 1e-12 or (self.gap is not None and self.gap <= gap_tol) or theta < 1e-4:
+                    break
+                if time_budget and time.perf_counter() - start > time_budget:
+                    break
+                # Chưa có phương án khả thi: đích Polyak tạm = L + 5%
+                target = self.objective if self.objective is not None else value + 0.05 * max(1.0, abs(value))
+                lam = lam + theta * max(target - value, 1e-6 * max(1.0, abs(value))) / norm * g
+        if self.objective is None:
+            self.repair(x)
+        self.multipliers = dict(zip(self.link_keys, best_lam.tolist()))
+        return self.objective
+
+    @property
+    def gap(self):
+        if self.objective is None or self.bound is None:
+            return None
+        return (self.objective - self.bound) / max(1.0, abs(self.objective))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--stages', type=int, default=5, choices=[3, 4, 5])
+    parser.add_argument('--m', type=int, default=2)
+    parser.add_argument('--mode', default='Pm', choices=['Pm', 'Pmd'])
+    parser.add_argument('--cycles', type=int, default=1, help='số lần lặp mẫu 5 kỳ gốc')
+    parser.add_argument('--iterations', type=int, default=50)
+    parser.add_argument('--theta', type=float, default=2.0, help='hệ số bước Polyak ban đầu')
+    parser.add_argument('--patience', type=int, default=5, help='số vòng không tăng trước khi giảm theta')
+    parser.add_argument('--repair-every', type=int, default=10)
+    parser.add_argument('--repair-time-limit', type=float, default=30, help='giây cho mỗi lần repair')
+    parser.add_argument('--repair-gap', type=float, default=0.01, help='gap dừng của mỗi lần repair')
+    parser.add_argument('--workers', type=int, default=None, help='số thread giải khối')
+    parser.add_argument('--time-budget', type=float, default=None)
+    parser.add_argument('--monolithic', action='store_true', help='giải trực tiếp để so sánh')
+    parser.add_argument('--time-limit', type=float, default=600, help='giây cho lời giải monolithic')
+    args = parser.parse_args(argv)
+
+    data = SupplyChainData(m=args.m, mode=args.mode, num_stages=args.stages)
+    if args.cycles > 1:
+        data = repeat_horizon(data, args.cycles)
+    print(f"{args.stages}-stage, m={args.m}, {args.mode}: {data.base_T} kỳ gốc, T={data.T} kỳ con")
+
+    start = time.perf_counter()
+    lr = LagrangianDecomposition(data, args.workers, repair_time_limit=args.repair_time_limit,
+                                 repair_gap=args.repair_gap)
+    print(f"{len(lr.link_rows)} hàng nối, khối: "
+          + ", ".join(f"{b.name} ({len(b.cols)} biến)" for b in lr.blocks))
+    lr.run(args.iterations, args.theta, args.patience, args.repair_every, time_budget=args.time_budget)
+    elapsed = time.perf_counter() - start
+    fmt = lambda v: f"{v:,.1f}" if v is not None else '-'
+    for h in lr.history:
+        print(f"  it {h['iteration']:3d}: L = {fmt(h['lagrangian'])}, best = {fmt(h['bound'])}, "
+              f"UB = {fmt(h['objective'])}, theta = {h['theta']:.3g}, |b - Ax| = {h['violation']:.1f}, "
+              f"khối {h['sub_time'] * 1e3:.0f} ms" + (f", repair {fmt(h['repair'])} ({h['repair_time']:.1f}s)" if h['repair'] else ''))
+    print(f"LP bound          : {fmt(lr.lp_bound)}")
+    print(f"Lagrangian bound  : {fmt(lr.bound)}")
+    print(f"Phương án repair  : {fmt(lr.objective)}")
+    if lr.gap is not None:
+        print(f"Gap               : {100 * lr.gap:.2f}% ({elapsed:.2f}s)")
+
+    if args.monolithic:
+        result = solve_monolithic(data, args.time_limit)
+        print(f"Monolithic        : {fmt(result.get('objective'))}, bound {fmt(result.get('bound'))}, "
+              f"{result['solve_time']:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
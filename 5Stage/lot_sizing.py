@@ -0,0 +1,167 @@
+"""
+Bất đẳng thức hợp lệ (valid inequalities) cho cấu trúc lot-sizing của SupplyChainModel.
+
+Mỗi "họ" lot-sizing gồm 1 lượng theo kỳ, 1 biến setup theo kỳ và echelon stock phía sau:
+
+    purchase    qty = sum_j q[j, t]   setup = sum_j z[j, t]   echelon: stage 1..K
+    prod        qty = x[t]            setup = w_prod[t]       echelon: stage 2..K
+    prod2 (K=5) qty = x2[t]           setup = w_prod2[t]      echelon: stage 4..K
+
+Echelon stock E[l] = tồn kho các stage phía sau + hàng đang đi đường trên các leg có lead
+time (y[k, t-L+1..t]); cân bằng E[t] = E[t-1] + qty[t] - demand[t] (+ receipts) nên với
+D[t, l] = demand[t] + ... + demand[l]:
+
+    (l,S):  sum_{t in S} qty[t] <= sum_{t in S} D[t, l] * setup[t] + E[l],   S ⊆ {0..l}
+
+Cover theo capacity (nhóm kỳ gốc của sản xuất, từ đầu horizon): tổng capacity của các kỳ
+gốc có setup phải đủ cho nhu cầu tích lũy trừ echelon stock ban đầu và receipts:
+
+    sum_{b <= B} cap[b] * w_group[b] >= D[0, end(B)] - E[-1] - R[0, end(B)]
+
+(capacity không đổi -> chia cho cap và làm tròn lên: số kỳ gốc có setup tối thiểu).
+
+Hai cách thêm: 'upfront' thêm (l,S) với S = {t} cho mọi t <= l (O(T^2) dòng) cùng các
+cover; 'rounds' giải LP relaxation, thêm các (l,S) bị vi phạm (S = {t <= l : qty[t] >
+D[t, l] * setup[t]}), lặp tối đa `rounds` vòng.
+"""
+
+import math
+
+import numpy as np
+
+MODES = ('upfront', 'rounds')
+
+
+def _families(model):
+    d = model.data
+    T, J = d.T, len(d.suppliers)
+    transit = [(k, lt) for (k, _), lt in d.lead_times.items() if lt > 0]
+
+    def family(name, qty, setup, first_stage, groups=None):
+        echelon = []
+        for t in range(T):
+            terms = [model.i[k, t] for k in range(first_stage, d.K + 1)]
+            terms += [model.y[k, tau] for k, lt in transit if k >= first_stage - 1
+                      for tau in range(max(0, t - lt + 1), t + 1)]
+            echelon.append(terms)
+        return {'name': name, 'qty': qty, 'setup': setup, 'echelon': echelon,
+                'first_stage': first_stage, 'groups': groups}
+
+    families = [
+        family('purchase', [[model.q[j, t] for j in range(J)] for t in range(T)],
+               [[model.z[j, t] for j in range(J)] for t in range(T)], 1),
+        family('prod', [[model.x[t]] for t in range(T)], [[model.w_prod[t]] for t in range(T)], 2,
+               (model.w_prod_group, d.prod_capacity)),
+    ]
+    if d.K == 5:
+        families.append(family('prod2', [[model.x2[t]] for t in range(T)], [[model.w_prod2[t]] for t in range(T)], 4,
+                               (model.w_prod2_group, d.prod2_capacity)))
+    return families
+
+
+def _add_row(model, lb, ub, terms):
+    """terms: [(list biến, hệ số)] -> 1 dòng lb <= sum <= ub (gộp hệ số biến lặp lại)."""
+    coefs = {}
+    for variables, coef in terms:
+        for var in variables:
+            key = var.index()
+            coefs[key] = (var, coefs.get(key, (var, 0.0))[1] + coef)
+    row = model.solver.Constraint(lb, ub)
+    for var, coef in coefs.values():
+        row.SetCoefficient(var, coef)
+    model.lot_sizing_rows.append(row)
+    return row
+
+
+def _add_ls(model, fam, S, l, cum):
+    terms = [(fam['echelon'][l], -1.0)]
+    for t in S:
+        demand = cum[l + 1] - cum[t]
+        terms += [(fam['qty'][t], 1.0), (fam['setup'][t], -demand)]
+    _add_row(model, -model.infinity, 0.0, terms)
+
+
+def _add_covers(model, fam, cum):
+    """Cover theo capacity cho nhóm kỳ gốc của họ sản xuất (xem docstring module)."""
+    d = model.data
+    group, capacity = fam['groups']
+    m = d.m
+    stock = sum(d.initial_inventory[k] for k in range(fam['first_stage'], d.K + 1))
+    receipts = np.zeros(d.T)
+    for (k, t), qty in getattr(model, 'receipts', {}).items():
+        if k >= fam['first_stage']:
+            receipts[t] += qty
+    caps = np.array([capacity[b * m] for b in range(d.base_T)], dtype=float)
+    for B in range(d.base_T):
+        end = (B + 1) * m
+        need = cum[end] - stock - receipts[:end].sum()
+        if need <= 0:
+            continue
+        if np.all(caps[:B + 1] == caps[0]) and caps[0] > 0:
+            _add_row(model, math.ceil(need / caps[0] - 1e-9), model.infinity,
+                     [([group[b] for b in range(B + 1)], 1.0)])
+        else:
+            row = model.solver.Constraint(need, model.infinity)
+            for b in range(B + 1):
+                row.SetCoefficient(group[b], caps[b])
+            model.lot_sizing_rows.append(row)
+
+
+def _value(variables):
+    return sum(var.solution_value() for var in variables)
+
+
+def separate(model, fam, cum, tol=1e-6):
+    """(l,S) bị vi phạm bởi nghiệm hiện tại của solver: [(l, S)]."""
+    T = model.data.T
+    qty = [_value(v) for v in fam['qty']]
+    setup = [_value(v) for v in fam['setup']]
+    echelon = [_value(v) for v in fam['echelon']]
+    cuts = []
+    for l in range(T):
+        S = [t for t in range(l + 1) if qty[t] > (cum[l + 1] - cum[t]) * setup[t] + tol]
+        excess = sum(qty[t] - (cum[l + 1] - cum[t]) * setup[t] for t in S)
+        if excess > echelon[l] + tol * max(1.0, echelon[l]):
+            cuts.append((l, S))
+    return cuts
+
+
+def add_lot_sizing_cuts(model, mode='rounds', rounds=10):
+    """
+    Thêm bất đẳng thức lot-sizing vào model đã build (sau set_objective với 'rounds').
+    Trả về số dòng đã thêm; các dòng nằm trong model.lot_sizing_rows.
+    """
+    if mode not in MODES:
+        raise ValueError(f"mode phải là một trong {MODES}")
+    if not hasattr(model, 'lot_sizing_rows'):
+        model.lot_sizing_rows = []
+    d = model.data
+    cum = np.concatenate([[0.0], np.cumsum(np.asarray(d.demand, dtype=float))])
+    families = _families(model)
+    before = len(model.lot_sizing_rows)
+
+    for fam in families:
+        if fam['groups'] is not None:
+            _add_covers(model, fam, cum)
+
+    if mode == 'upfront':
+        for fam in families:
+            for l in range(d.T):
+                for t in range(l + 1):
+                    _add_ls(model, fam, [t], l, cum)
+        return len(model.lot_sizing_rows) - before
+
+    integers = [var for var in model.solver.variables() if var.integer()]
+    for _ in range(rounds):
+        for var in integers:
+            var.SetInteger(False)
+        model.solver.Solve()
+        # Đọc hết vi phạm trước khi thêm dòng (thêm dòng làm nghiệm LP mất hiệu lực)
+        found = [(fam, cut) for fam in families for cut in separate(model, fam, cum)]
+        for var in integers:
+            var.SetInteger(True)
+        if not found:
+            break
+        for fam, (l, S) in found:
+            _add_ls(model, fam, S, l, cum)
+    return len(model.lot_sizing_rows) - before
@@ -0,0 +1,329 @@
+"""
+Giải nhanh bằng quy hoạch động (Wagner-Whitin) cho instance 3-stage "đơn giản", fallback
+về MILP khi không chứng minh được tối ưu.
+
+Với K = 3, m = 1 (lead time 1 kỳ, setup sản xuất theo từng kỳ), holding cost như nhau ở mọi
+stage nên chi phí tồn kho của 1 đơn vị chỉ phụ thuộc lúc mua và lúc dùng. Bỏ mọi capacity,
+min / max order; thay phần mua bằng phân bổ rẻ nhất cả horizon (purchasing_bound), secondary
+cost bằng min theo supplier, cước bằng đơn giá / đơn vị tốt nhất của bảng cước
+(freight_rate). Khi chi phí sản xuất (biến đổi và setup) không giảm theo thời gian, có
+nghiệm tối ưu của bài nới lỏng này mà mua, sản xuất và giao hàng cùng kỳ, cùng lượng, theo
+ZIO. Vì vậy bài thu về lot-sizing 1 stage không capacity: wagner_whitin() giải đúng trong
+O(T^2). Giá trị tối ưu là cận dưới hợp lệ của MILP.
+
+solve_lot_sizing() dựng phương án đầy đủ (q, x, y, i) từ lịch DP rồi cho PlanEvaluator
+tính chi phí thật và kiểm tra mọi ràng buộc. Nếu phương án khả thi và chi phí bằng cận dưới
+thì đó là nghiệm tối ưu của MILP, không cần gọi solver. Trường hợp này xảy ra khi capacity
+không chặt, 1 supplier đủ cung cấp và cước tuyến tính.
+
+solve() gói cả quy trình:
+  - structure_reasons(data) khác rỗng: instance không có cấu trúc trên -> MILP thường.
+  - DP chứng minh được tối ưu: trả về LotSizingSolution (cùng API đọc kết quả với
+    SupplyChainModel).
+  - Ngược lại: MILP, phương án DP làm MIP start và cutoff nếu khả thi. Cận dưới DP luôn có
+    trong info; bound_row=True còn thêm nó vào model (set_objective_lower_bound). Mặc định
+    tắt: với dữ liệu gốc K3 m1 cận khá lỏng (~114k so với 135,554) mà hàng objective dày
+    làm SCIP chậm hơn (~6s so với ~4s).
+
+Chạy:
+    python lot_sizing_dp.py --stages 3 --m 1 --compare
+    python lot_sizing_dp.py --simple --compare     # biến thể không capacity, 1 supplier, cước tuyến tính
+"""
+
+import argparse
+import contextlib
+import copy
+import io
+import itertools
+import time
+
+import numpy as np
+
+from data_loader import SupplyChainData
+from dynamic_scm_milp import SupplyChainModel
+from plan_evaluator import PlanEvaluator, breakdown
+from stage_graph import StageGraph
+
+
+def wagner_whitin(demand, setup, unit_cost, holding):
+    """
+    Lot-sizing 1 stage không capacity. Đơn hàng ở kỳ s phủ nhu cầu các kỳ s..e-1 (ZIO), tốn
+    setup[s] (khi lượng > 0) + unit_cost[s] * lượng; mỗi đơn vị tồn cuối kỳ t tốn holding[t].
+    setup[s] = inf: không được đặt hàng ở kỳ s. O(T^2), vector hóa theo s.
+    Trả về (chi phí tối ưu, lượng đặt theo kỳ), hoặc (inf, None) nếu không khả thi.
+    """
+    demand = np.asarray(demand, dtype=float)
+    setup = np.asarray(setup, dtype=float)
+    unit_cost = np.asarray(unit_cost, dtype=float)
+    n = len(demand)
+    D = np.concatenate([[0.0], np.cumsum(demand)])
+    P = np.concatenate([[0.0], np.cumsum(holding)])
+    W = np.concatenate([[0.0], np.cumsum(demand * P[:-1])])
+    best = np.full(n + 1, np.inf)
+    best[0] = 0.0
+    prev = np.zeros(n + 1, dtype=np.int64)
+    for e in range(1, n + 1):
+        s = np.arange(e)
+        qty = D[e] - D[s]
+        # nhu cầu ở kỳ d trong [s, e) nằm trong kho cuối các kỳ s..d-1
+        hold = W[e] - W[s] - P[s] * qty
+        cost = best[s] + np.where(qty > 1e-9, setup[s] + unit_cost[s] * qty, 0.0) + hold
+        prev[e] = np.argmin(cost)
+        best[e] = cost[prev[e]]
+    if not np.isfinite(best[n]):
+        return np.inf, None
+    orders = np.zeros(n)
+    e = n
+    while e > 0:
+        orders[prev[e]] = D[e] - D[prev[e]]
+        e = prev[e]
+    return float(best[n]), orders
+
+
+def _supplier_caps(data):
+    return np.array([min(float(s['cumulative_capacity'][-1]), pb.max_q[-1])
+                     for s, pb in zip(data.suppliers, data.price_breaks)])
+
+
+def purchasing_bound(data, total):
+    """
+    Chi phí mua nhỏ nhất (bậc giá + primary cost) để mua đủ `total` trong cả horizon, không
+    xét thời điểm: min sum_j cost_j(Q_j), sum Q_j = total, 0 <= Q_j <= capacity cả horizon.
+    cost_j lõm (đơn giá không tăng theo bậc) nên tối ưu nằm ở đỉnh của miền: mọi supplier
+    trừ 1 ở 0 hoặc capacity. Trả về (chi phí, Q theo supplier) hoặc (inf, None).
+    """
+    caps = _supplier_caps(data)
+    J = len(caps)
+
+    def cost(Q):
+        return sum(float(pb.cost(q)) + s['primary_cost']
+                   for q, s, pb in zip(Q, data.suppliers, data.price_breaks) if q > 1e-9)
+
+    best, best_Q = np.inf, None
+    for free in range(J):
+        others = [j for j in range(J) if j != free]
+        for full in itertools.product((False, True), repeat=J - 1):
+            Q = np.zeros(J)
+            Q[others] = np.where(full, caps[others], 0.0)
+            rest = total - Q.sum()
+            if rest < -1e-9 or rest > caps[free] + 1e-9:
+                continue
+            Q[free] = max(rest, 0.0)
+            c = cost(Q)
+            if c < best:
+                best, best_Q = c, Q
+    return best, best_Q
+
+
+def freight_rate(tariff):
+    """Chi phí cước / đơn vị nhỏ nhất trên mọi lượng hợp lệ: bậc e rẻ nhất ở max_e."""
+    return min((iv['fixed_cost'] + iv['var_cost_per_unit'] * iv['max']) / iv['max'] for iv in tariff)
+
+
+def structure_reasons(data):
+    """Lý do instance không có cấu trúc lot-sizing ở trên (list rỗng = DP áp dụng được)."""
+    reasons = []
+    if data.K != 3:
+        return [f"K={data.K}: chỉ hỗ trợ 3-stage"]
+    if data.m != 1:
+        reasons.append(f"m={data.m}: setup theo nhóm kỳ gốc và lead time nhiều kỳ con")
+    if data.lead_times.get((1, 2), 0) != 0 or data.lead_times.get((2, 3), 0) != 1:
+        reasons.append(f"lead time {data.lead_times}: cần (1,2)=0, (2,3)=1")
+    if data.initial_inventory.get(1, 0) or data.initial_inventory.get(2, 0):
+        reasons.append("có tồn kho đầu kỳ ở stage 1 / 2")
+    for name in ('prod_var_cost', 'prod_fixed_cost'):
+        if np.any(np.diff(np.asarray(getattr(data, name), dtype=float)) < 0):
+            reasons.append(f"{name} giảm theo thời gian")
+    if np.any(np.asarray(data.holding_cost) < 0):
+        reasons.append("holding_cost âm")
+    for s, pb in zip(data.suppliers, data.price_breaks):
+        if np.any(np.diff(pb.price) > 0):
+            reasons.append(f"đơn giá bậc của {s['name']} không giảm dần")
+    return reasons
+
+
+class LotSizingSolution:
+    """
+    Kết quả DP: cận dưới (lower_bound), phương án đầy đủ (plan), chi phí thật
+    (costs, theo PlanEvaluator), feasible và optimal (khả thi và chi phí = cận dưới).
+    get_objective_value / get_cost_breakdown / get_purchasing_plan như SupplyChainModel.
+    """
+
+    def __init__(self, data, lower_bound, plan, costs, duration):
+        self.data = data
+        self.lower_bound = lower_bound
+        self.plan = plan
+        self.costs = costs
+        self.cpu_time = duration
+        self.feasible = costs is not None and bool(costs['feasible'])
+        self.optimal = self.feasible and costs['total'] <= lower_bound + 1e-6 * max(1.0, abs(lower_bound))
+
+    def get_objective_value(self):
+        return self.costs['total']
+
+    def get_cost_breakdown(self):
+        return breakdown(self.costs)
+
+    def get_purchasing_plan(self):
+        return {t: self.plan['q'][:, t].tolist() for t in range(self.data.T)}
+
+
+def _expand_plan(data, ship, allocation):
+    """Lịch giao hàng DP -> phương án (q, x, x2, y, i): mua, sản xuất, giao cùng kỳ."""
+    T, K, J = data.T, data.K, len(data.suppliers)
+    q = np.zeros((J, T))
+    remaining = allocation.copy()
+    bought = np.zeros(J)
+    order = np.argsort(-allocation)
+    for t in np.flatnonzero(ship > 0):
+        need = ship[t]
+        for j in order:
+            cap = float(data.suppliers[j]['cumulative_capacity'][t]) - bought[j]
+            take = min(need, remaining[j], max(cap, 0.0))
+            if take > 0:
+                q[j, t] += take
+                bought[j] += take
+                remaining[j] -= take
+                need -= take
+        # không phân bổ hết (capacity theo thời điểm): dồn phần còn lại cho supplier chính,
+        # PlanEvaluator sẽ báo vi phạm
+        q[order[0], t] += need
+    y = np.zeros((K - 1, T))
+    y[1] = ship
+    arrivals = np.concatenate([[0.0], ship[:-1]])
+    i = np.zeros((K, T))
+    i[K - 1] = data.initial_inventory[K] + np.cumsum(arrivals - np.asarray(data.demand, dtype=float))
+    return {'q': q, 'x': ship.copy(), 'x2': np.zeros(T), 'y': y, 'i': i}
+
+
+def solve_lot_sizing(data, evaluator=None):
+    """
+    DP cho instance thỏa structure_reasons(data) == []. Trả về LotSizingSolution, hoặc
+    None nếu bài nới lỏng vô nghiệm (vd. nhu cầu kỳ 0 vượt tồn kho đầu kỳ).
+    """
+    start = time.perf_counter()
+    T, K = data.T, data.K
+    graph = StageGraph.from_data(data)
+    last = graph.nodes[-1]
+    h = np.asarray(data.holding_cost, dtype=float)
+    rate = freight_rate(data.freight_actual) if 2 in graph.legs('freight') else 0.0
+    intransit = h if 2 in graph.legs('intransit') else np.zeros(T)
+
+    # Nhu cầu theo kỳ đến u = 0..T (u = T: tồn kho cuối kỳ), trừ dần tồn kho đầu kỳ
+    demand = np.append(np.asarray(data.demand, dtype=float), last['ending_inventory'])
+    cum = np.cumsum(demand)
+    net = np.diff(np.maximum(cum - last['initial_inventory'], 0.0), prepend=0.0)
+    P = np.concatenate([[0.0], np.cumsum(h)])
+    initial_holding = float((demand - net) @ P[:T + 1])
+
+    # Hàng đến kỳ u được mua, sản xuất và giao ở kỳ u - 1; không có hàng đến ở kỳ 0 và T
+    sec = min(s['secondary_cost'] for s in data.suppliers)
+    setup = np.full(T + 1, np.inf)
+    unit = np.zeros(T + 1)
+    setup[1:T] = sec + np.asarray(data.prod_fixed_cost, dtype=float)[:T - 1]
+    unit[1:T] = np.asarray(data.prod_var_cost, dtype=float)[:T - 1] + rate + intransit[:T - 1]
+    timing, orders = wagner_whitin(net, setup, unit, np.append(h, 0.0))
+    purchasing, allocation = purchasing_bound(data, net.sum())
+    if orders is None or allocation is None:
+        return None
+
+    plan = _expand_plan(data, orders[1:], allocation)
+    evaluator = evaluator or PlanEvaluator(data)
+    costs = evaluator.evaluate(**plan)
+    lower_bound = timing + purchasing + initial_holding
+    return LotSizingSolution(data, lower_bound, plan, costs, time.perf_counter() - start)
+
+
+def solve(data, tight=False, time_limit=None, bound_row=False):
+    """
+    DP nếu instance có cấu trúc lot-sizing và DP chứng minh được tối ưu, ngược lại MILP
+    (dùng phương án DP nếu khả thi, cận dưới DP nếu bound_row). Trả về (nghiệm, info): nghiệm là
+    LotSizingSolution hoặc SupplyChainModel đã giải; info gồm method ('dp' / 'milp'),
+    reasons, lower_bound, dp_cost, dp_time.
+    """
+    info = {'method': 'milp', 'reasons': structure_reasons(data), 'lower_bound': None,
+            'dp_cost': None, 'dp_time': None}
+    dp, evaluator = None, None
+    if not info['reasons']:
+        evaluator = PlanEvaluator(data)
+        dp = solve_lot_sizing(data, evaluator)
+    if dp is not None:
+        info.update(lower_bound=dp.lower_bound, dp_cost=dp.get_objective_value() if dp.feasible else None,
+                    dp_time=dp.cpu_time)
+        if dp.optimal:
+            info['method'] = 'dp'
+            return dp, info
+
+    model = SupplyChainModel(data, tight=tight)
+    with contextlib.redirect_stdout(io.StringIO()):
+        model.create_variables()
+        model.add_constraints()
+        model.set_objective()
+        if time_limit:
+            model.set_time_limit(time_limit)
+        if dp is not None:
+            if bound_row:
+                model.set_objective_lower_bound(dp.lower_bound)
+            if dp.feasible:
+                values = evaluator.decode(**dp.plan)[0]
+                model.set_hint(dict(zip(evaluator.var_names, values)))
+                model.set_objective_cutoff(dp.get_objective_value())
+        model.solve()
+    return model, info
+
+
+def _simple_variant(data):
+    """Biến thể không capacity chặt, chỉ 1 supplier (Sup2) và cước tuyến tính - cho demo."""
+    simple = copy.deepcopy(data)
+    supplier = dict(simple.suppliers[2], cumulative_capacity=np.full(simple.T, 5000.0))
+    supplier['price_intervals'] = [dict(iv) for iv in supplier['price_intervals']]
+    simple.suppliers = [supplier]
+    simple.refresh_price_breaks()
+    simple.global_max_order_size = 5000
+    simple.prod_capacity = np.full(simple.T, 5000.0)
+    simple.trans_capacity = np.full(simple.T, 5000.0)
+    simple.inventory_capacity = 5000
+    simple.freight_actual = [{"min": 0, "max": 5000, "fixed_cost": 0.0, "var_cost_per_unit": 9.0}]
+    return simple
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--stages', type=int, default=3, choices=[3, 4, 5])
+    parser.add_argument('--m', type=int, default=1)
+    parser.add_argument('--mode', default='Pm', choices=['Pm', 'Pmd'])
+    parser.add_argument('--simple', action='store_true', help='biến thể không capacity, 1 supplier, cước tuyến tính')
+    parser.add_argument('--compare', action='store_true', help='giải thêm MILP thường để so sánh')
+    parser.add_argument('--time-limit', type=float, default=None)
+    parser.add_argument('--bound-row', action='store_true', help='thêm cận dưới DP vào MILP khi fallback')
+    args = parser.parse_args(argv)
+
+    data = SupplyChainData(m=args.m, mode=args.mode, num_stages=args.stages)
+    if args.simple:
+        data = _simple_variant(data)
+
+    start = time.perf_counter()
+    solution, info = solve(data, time_limit=args.time_limit, bound_row=args.bound_row)
+    elapsed = time.perf_counter() - start
+    for reason in info['reasons']:
+        print(f"Không dùng DP: {reason}")
+    if info['lower_bound'] is not None:
+        dp_cost = f"{info['dp_cost']:,.2f}" if info['dp_cost'] is not None else "không khả thi"
+        print(f"DP: cận dưới {info['lower_bound']:,.2f}, phương án DP {dp_cost} ({info['dp_time'] * 1e3:.1f} ms)")
+    print(f"Phương pháp: {info['method']}, objective {solution.get_objective_value():,.2f}, {elapsed:.3f}s")
+
+    if args.compare:
+        model = SupplyChainModel(data)
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            model.create_variables()
+            model.add_constraints()
+            model.set_objective()
+            if args.time_limit:
+                model.set_time_limit(args.time_limit)
+            model.solve()
+        print(f"MILP thường: objective {model.get_objective_value():,.2f}, {time.perf_counter() - start:.3f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,409 @@
+"""
+Matrix-form builder cho cùng MILP với dynamic_scm_milp.SupplyChainModel.
+
+Thay vì gọi solver.NumVar / solver.Add cho từng biến, từng ràng buộc (mỗi lần dựng
+một cây LinearExpr trong Python), model được lắp thành mảng NumPy:
+
+    c            hệ số objective           (n_vars,)
+    col_lb/ub    bound của biến            (n_vars,)
+    integrality  biến nguyên/binary        (n_vars,) bool
+    A            ma trận ràng buộc dạng CSR (indptr, indices, data)
+    row_lb/ub    bound của từng dòng       (n_rows,)
+
+Cấu trúc mạng lấy từ StageGraph (stage_graph.py): mỗi node sinh 1 khối cân bằng
+luồng, mỗi arc sinh các khối capacity / sản xuất / cước của riêng nó (vector hóa theo t).
+Không có nhánh theo K: 3/4/5-stage là StageGraph.from_data(data), mạng dài hơn truyền
+graph riêng. Sau đó nạp 1 lần vào SCIP qua MPModelProto + Solver.LoadModelFromProto;
+kết quả là 1 pywraplp.Solver bình thường nên solve / nodes() / WallTime() dùng như
+SupplyChainModel. Có scipy thì proto được dựng thẳng từ mảng CSR trong C++
+(ModelBuilderHelper.fill_model_from_sparse_data); không có thì điền proto từng biến /
+từng dòng trong Python (build 5-stage: 0.50s -> 0.16s ở m=200, 1.20s -> 0.39s ở m=500).
+
+Khác biệt so với SupplyChainModel (không đổi nghiệm tối ưu):
+- Mỗi arc có đúng 1 biến luồng flow[a, t]: sản xuất site 1 (x), vận chuyển (y[k]) và
+  ở 5-stage cặp x2 / y3 (ràng buộc y3 == x2) đều là flow của arc tương ứng.
+- Không tạo biến không dùng (y/w_trans của leg 1, biến site 2 khi K != 5).
+- Hằng số (tồn kho đầu kỳ, nhu cầu) được chuyển sang vế phải.
+"""
+
+import numpy as np
+from ortools.linear_solver import linear_solver_pb2, pywraplp
+from ortools.linear_solver.python import model_builder_helper
+
+try:
+    from scipy import sparse
+except ImportError:  # scipy không bắt buộc: thiếu thì _load điền proto trong Python
+    sparse = None
+
+from data_loader import SupplyChainData
+from solver_backends import create_solver, solution_values
+from stage_graph import StageGraph
+
+
+class _SparseRows:
+    """Gom các khối ràng buộc dạng COO (row, col, val) rồi chuyển sang CSR."""
+
+    def __init__(self):
+        self.rows, self.cols, self.vals = [], [], []
+        self.lb, self.ub = [], []
+        self.n = 0
+
+    def add_block(self, n, terms, lb, ub):
+        """
+        Thêm n dòng. terms: list (row_offsets, col_indices, coef), row_offsets tính
+        từ dòng đầu của khối; coef là scalar hoặc mảng cùng độ dài col_indices.
+        """
+        for r, c, v in terms:
+            c = np.asarray(c, dtype=np.int64).ravel()
+            self.rows.append(self.n + np.broadcast_to(np.asarray(r, dtype=np.int64).ravel(), c.shape))
+            self.cols.append(c)
+            self.vals.append(np.broadcast_to(np.asarray(v, dtype=float).ravel(), c.shape))
+        self.lb.append(np.broadcast_to(np.asarray(lb, dtype=float), (n,)))
+        self.ub.append(np.broadcast_to(np.asarray(ub, dtype=float), (n,)))
+        self.n += n
+
+    def to_csr(self):
+        rows = np.concatenate(self.rows)
+        cols = np.concatenate(self.cols)
+        vals = np.concatenate(self.vals)
+        keep = vals != 0
+        rows, cols, vals = rows[keep], cols[keep], vals[keep]
+        order = np.argsort(rows, kind='stable')
+        indptr = np.zeros(self.n + 1, dtype=np.int64)
+        np.cumsum(np.bincount(rows, minlength=self.n), out=indptr[1:])
+        return indptr, cols[order], vals[order], np.concatenate(self.lb), np.concatenate(self.ub)
+
+
+class MatrixSupplyChainModel:
+    """
+    Cùng interface với SupplyChainModel (create_variables, add_constraints,
+    set_objective, solve, get_cost_breakdown, get_purchasing_plan).
+    graph: StageGraph của mạng; mặc định StageGraph.from_data(data).
+    Biến được lưu thành khối chỉ số NumPy trong self.idx, ví dụ self.idx['q'][j, t],
+    self.idx['flow'][a, t] (a = chỉ số arc trong graph.arcs).
+    """
+
+    def __init__(self, data, graph=None):
+        self.data = data
+        self.graph = graph if graph is not None else StageGraph.from_data(data)
+        self.solver = create_solver('SCIP')
+        if not self.solver:
+            raise Exception("SCIP backend not found.")
+        self.infinity = self.solver.infinity()
+
+        self.idx = {}
+        self.n_vars = 0
+        self._col_lb, self._col_ub, self._col_int = [], [], []
+        self.values = None
+
+    # ------------------------------------------------------------------ variables
+    def _new_vars(self, name, shape, lb=0.0, ub=np.inf, integer=False):
+        size = int(np.prod(shape))
+        block = np.arange(self.n_vars, self.n_vars + size).reshape(shape)
+        self.idx[name] = block
+        self._col_lb.append(np.broadcast_to(np.asarray(lb, dtype=float), shape).ravel())
+        self._col_ub.append(np.broadcast_to(np.asarray(ub, dtype=float), shape).ravel())
+        self._col_int.append(np.full(size, integer))
+        self.n_vars += size
+        return block
+
+    def _index_graph(self):
+        """Hàng của từng họ biến theo node / arc: arc a -> hàng trong khối tương ứng."""
+        d, g = self.data, self.graph
+        arcs = g.arcs
+        self.node_row = {node['id']: n for n, node in enumerate(g.nodes)}
+        self.prod_arcs = [a for a, arc in enumerate(arcs) if arc['production']]
+        self.trans_arcs = [a for a, arc in enumerate(arcs) if arc['transport_capacity'] is not None]
+        self.freight_arcs = [a for a, arc in enumerate(arcs) if arc['freight']]
+        self.tariffs = [g.tariff(a, d.freight_actual) for a in self.freight_arcs]
+        self.supply_of = {node['id']: g.suppliers_of(node['id'], len(d.suppliers)) for node in g.nodes}
+        self.node_inventory_capacity = np.array(
+            [node.get('inventory_capacity', d.inventory_capacity) for node in g.nodes], dtype=float)
+
+    def _new_freight_vars(self):
+        """
+        f_freight / y_freight: mảng phẳng, arc l chiếm 1 khối (T, E_l) liên tiếp (bậc cước
+        có thể khác nhau theo arc); self.freight_blocks[l] = (f[T, E_l], y[T, E_l]).
+        """
+        T = self.data.T
+        sizes = [T * len(tariff) for tariff in self.tariffs]
+        f = self._new_vars('f_freight', (sum(sizes),), 0, 1, True)
+        y = self._new_vars('y_freight', (sum(sizes),))
+        offsets = np.concatenate([[0], np.cumsum(sizes)]).astype(int)
+        self.freight_blocks = [(f[lo:hi].reshape(T, -1), y[lo:hi].reshape(T, -1))
+                               for lo, hi in zip(offsets[:-1], offsets[1:])]
+
+    def _arc_cols(self, a):
+        """Cột luồng của arc a, trục cuối là kỳ t (multi-product: (P, T))."""
+        return self.idx['flow'][a]
+
+    def create_variables(self):
+        d, g = self.data, self.graph
+        T, J = d.T, len(d.suppliers)
+        self._index_graph()
+
+        self._new_vars('q', (J, T))
+        self._new_vars('z', (J, T), 0, 1, True)
+        # Thứ tự cột như layout cũ (luồng, setup sản xuất, tồn kho, ...). SCIP có lúc báo tối
+        # ưu sai tùy thứ tự cột; verify_matrix_model.py giải cả thứ tự hoán vị với SCIP_SAFE.
+        self._new_vars('flow', (len(g.arcs), T))
+        self._new_vars('w_prod', (len(self.prod_arcs), T), 0, 1, True)
+        self._new_vars('w_prod_group', (len(self.prod_arcs), d.base_T), 0, 1, True)
+        self._new_vars('i', (g.K, T), 0, self.node_inventory_capacity[:, None])
+        self._new_vars('w_trans', (len(self.trans_arcs), T), 0, 1, True)
+
+        # Pricing: gộp (j, g) của mọi supplier vào 1 mảng phẳng
+        self.price_sup = np.concatenate([np.full(len(pb.max_q), j)
+                                         for j, pb in enumerate(d.price_breaks)])
+        self._new_vars('s_price', (len(self.price_sup),), 0, 1, True)
+        self._new_vars('r_price', (len(self.price_sup),))
+        self._new_freight_vars()
+
+    # ---------------------------------------------------------------- constraints
+    def _flow_terms(self, a, coef=1.0, group=False):
+        """Term (row_offsets, cols, coef) của tổng luồng arc a theo kỳ t (hoặc theo kỳ gốc)."""
+        cols = self._arc_cols(a)
+        t = np.broadcast_to(np.arange(self.data.T), cols.shape)
+        return (t // self.data.m if group else t, cols, coef)
+
+    # Các khối theo arc dưới đây dùng chung cho mọi biến thể (MultiProductModel chỉ đổi
+    # _arc_cols): luồng của arc là tổng các cột _arc_cols(a) cùng kỳ t.
+    def _add_production_rows(self, rows):
+        d, g = self.data, self.graph
+        T, m, B = d.T, d.m, d.base_T
+        idx = self.idx
+        t_all = np.arange(T)
+        inf = np.inf
+        block_of = t_all // m
+        for p, a in enumerate(self.prod_arcs):
+            w, wg = idx['w_prod'][p], idx['w_prod_group'][p]
+            cap_t = np.asarray(g.arcs[a]['production']['capacity'], dtype=float)
+            rows.add_block(T, [self._flow_terms(a), (t_all, w, -cap_t)], -inf, 0.0)
+            rows.add_block(B, [self._flow_terms(a, group=True)], -inf, cap_t[::m])
+            rows.add_block(B, [(block_of, w, 1.0), (np.arange(B), wg, -m)], -inf, 0.0)
+            rows.add_block(T, [(t_all, w, 1.0), (t_all, wg[block_of], -1.0)], -inf, 0.0)
+
+    def _add_transport_rows(self, rows):
+        d, g = self.data, self.graph
+        T = d.T
+        idx = self.idx
+        t_all = np.arange(T)
+        inf = np.inf
+
+        for r, a in enumerate(self.trans_arcs):
+            cap_t = np.asarray(g.arcs[a]['transport_capacity'], dtype=float)
+            rows.add_block(T, [self._flow_terms(a), (t_all, idx['w_trans'][r], -cap_t)], -inf, 0.0)
+
+        # 4. FREIGHT RATE - mỗi arc chịu cước 1 khối, bậc cước riêng của arc
+        for a, tariff, (f, yf) in zip(self.freight_arcs, self.tariffs, self.freight_blocks):
+            E = len(tariff)
+            f_min = np.array([iv['min'] for iv in tariff], dtype=float)
+            f_max = np.array([iv['max'] for iv in tariff], dtype=float)
+            t_rep = np.repeat(t_all, E)
+            n = T * E
+            rows.add_block(T, [(t_rep, yf, 1.0), self._flow_terms(a, -1.0)], 0.0, 0.0)
+            rows.add_block(T, [(t_rep, f, 1.0)], -inf, 1.0)
+            rows.add_block(n, [(np.arange(n), yf, 1.0), (np.arange(n), f, -np.tile(f_min, T))], 0.0, inf)
+            rows.add_block(n, [(np.arange(n), yf, 1.0), (np.arange(n), f, -np.tile(f_max, T))], -inf, 0.0)
+
+    def add_constraints(self):
+        d, g = self.data, self.graph
+        T = d.T
+        idx = self.idx
+        q, z, flow = idx['q'], idx['z'], idx['flow']
+        rows = _SparseRows()
+        t_all = np.arange(T)
+        inf = np.inf
+
+        # 1. SUPPLIER
+        for j, supplier in enumerate(d.suppliers):
+            rows.add_block(T, [(t_all, q[j], 1.0), (t_all, z[j], -supplier['min_order'])], 0.0, inf)
+            rows.add_block(T, [(t_all, q[j], 1.0), (t_all, z[j], -d.global_max_order_size)], -inf, 0.0)
+
+            # Cumulative capacity, bỏ các dòng thừa (xem SupplyChainModel)
+            cap = np.asarray(supplier['cumulative_capacity'], dtype=float)
+            suffix_min = np.minimum.accumulate(cap[::-1])[::-1]
+            binding = np.flatnonzero(np.append(cap[:-1] < suffix_min[1:], True))
+            r, c = np.nonzero(np.arange(T)[None, :] <= binding[:, None])
+            rows.add_block(len(binding), [(r, q[j, c], 1.0)], -inf, cap[binding])
+
+        # Pricing linearization
+        s, r_price = idx['s_price'], idx['r_price']
+        lower, width = self._price_lower_width()
+        J = len(d.suppliers)
+        rows.add_block(J, [(self.price_sup, s, 1.0)], -inf, 1.0)
+        rows.add_block(len(s), [(np.arange(len(s)), r_price, 1.0), (np.arange(len(s)), s, -width)], -inf, 0.0)
+        rows.add_block(J, [(np.repeat(np.arange(J), T), q.ravel(), 1.0),
+                           (self.price_sup, s, -lower), (self.price_sup, r_price, -1.0)], 0.0, 0.0)
+
+        # 2. PRODUCTION - mỗi arc sản xuất 1 khối
+        self._add_production_rows(rows)
+
+        # 3. FLOW BALANCE - mỗi node 1 khối:
+        #    sum in-arc flow[t - lt] + q + i[t-1] - sum out-arc flow[t] - i[t] = -init + demand
+        for node in g.nodes:
+            i_n = idx['i'][self.node_row[node['id']]]
+            rhs = np.zeros(T)
+            rhs[0] -= node['initial_inventory']
+            terms = [(t_all, i_n, -1.0), (t_all[1:], i_n[:-1], 1.0)]
+            supply = self.supply_of[node['id']]
+            if supply:
+                terms.append((np.tile(t_all, len(supply)), q[supply], 1.0))
+            for a in g.arcs_in(node['id']):
+                lt = g.arcs[a]['lead_time']
+                terms.append((t_all[lt:], flow[a, :T - lt], 1.0))
+            for a in g.arcs_out(node['id']):
+                terms.append((t_all, flow[a], -1.0))
+            if node['demand'] is not None:
+                rhs += np.asarray(node['demand'], dtype=float)
+            rows.add_block(T, terms, rhs, rhs)
+
+        # Transport capacity + 4. FREIGHT RATE - mỗi arc 1 khối
+        self._add_transport_rows(rows)
+
+        # 5. ENDING INVENTORY TARGET
+        end = np.array([node['ending_inventory'] for node in g.nodes], dtype=float)
+        rows.add_block(g.K, [(np.arange(g.K), idx['i'][:, T - 1], 1.0)], end, end)
+
+        self.indptr, self.indices, self.coefs, self.row_lb, self.row_ub = rows.to_csr()
+        self.n_rows = rows.n
+
+    def _price_lower_width(self):
+        breaks = self.data.price_breaks
+        self._price = np.concatenate([pb.price for pb in breaks])
+        self._base_cost = np.concatenate([pb.base_cost for pb in breaks])
+        return np.concatenate([pb.lower for pb in breaks]), np.concatenate([pb.width for pb in breaks])
+
+    # ------------------------------------------------------------------ objective
+    def objective_parts(self):
+        """
+        Vector chi phí cho từng nhóm (purchasing, production_site<n>, holding, transport);
+        c = tổng các vector này.
+        """
+        d, g = self.data, self.graph
+        m = d.m
+        idx = self.idx
+        sites = [g.arcs[a]['production']['site'] for a in self.prod_arcs]
+        keys = ['purchasing'] + [f'production_site{site}' for site in sorted(set(sites) | {1, 2})] \
+            + ['holding', 'transport']
+        parts = {key: np.zeros(self.n_vars) for key in keys}
+
+        self._price_lower_width()
+        primary = np.array([s['primary_cost'] for s in d.suppliers], dtype=float)
+        secondary = np.array([s['secondary_cost'] for s in d.suppliers], dtype=float)
+        p = parts['purchasing']
+        p[idx['s_price']] = self._base_cost + primary[self.price_sup]
+        p[idx['r_price']] = self._price
+        p[idx['z']] = secondary[:, None]
+
+        for row, (a, site) in enumerate(zip(self.prod_arcs, sites)):
+            production = g.arcs[a]['production']
+            p = parts[f'production_site{site}']
+            p[idx['w_prod_group'][row]] = np.asarray(production['fixed_cost'])[::m]
+            p[self._arc_cols(a)] += production['var_cost']
+
+        p = parts['holding']
+        p[idx['i']] = d.holding_cost
+        for a, arc in enumerate(g.arcs):
+            if arc['intransit']:
+                p[self._arc_cols(a)] += d.holding_cost
+
+        p = parts['transport']
+        for a, arc in enumerate(g.arcs):
+            if arc['unit_cost']:
+                p[self._arc_cols(a)] += arc['unit_cost']
+        for tariff, (f, yf) in zip(self.tariffs, self.freight_blocks):
+            p[f] = np.array([iv['fixed_cost'] for iv in tariff], dtype=float)
+            p[yf] = np.array([iv['var_cost_per_unit'] for iv in tariff], dtype=float)
+        return parts
+
+    def set_objective(self):
+        self.cost_parts = self.objective_parts()
+        self.c = sum(self.cost_parts.values())
+        self.col_lb = np.concatenate(self._col_lb)
+        self.col_ub = np.concatenate(self._col_ub)
+        self.integrality = np.concatenate(self._col_int)
+        self._load()
+
+    def _load(self):
+        """Nạp (c, A, bounds, integrality) vào SCIP qua MPModelProto."""
+        proto = self._sparse_proto() if sparse is not None else self._python_proto()
+        error = self.solver.LoadModelFromProto(proto)
+        if error:
+            raise ValueError(f"LoadModelFromProto failed: {error}")
+        self.proto = proto
+
+    def _sparse_proto(self):
+        """MPModelProto dựng từ mảng CSR trong C++ (cần scipy cho csr_matrix)."""
+        helper = model_builder_helper.ModelBuilderHelper()
+        matrix = sparse.csr_matrix((self.coefs, self.indices, self.indptr),
+                                   shape=(len(self.row_lb), len(self.c)), dtype=float)
+        helper.fill_model_from_sparse_data(self.col_lb.astype(float), self.col_ub.astype(float),
+                                           self.c.astype(float), self.row_lb.astype(float),
+                                           self.row_ub.astype(float), matrix)
+        for col in np.flatnonzero(self.integrality).tolist():
+            helper.set_var_integrality(col, True)
+        return model_builder_helper.to_mpmodel_proto(helper)
+
+    def _python_proto(self):
+        """MPModelProto điền từng biến / từng dòng trong Python (khi không có scipy)."""
+        proto = linear_solver_pb2.MPModelProto()
+        for lb, ub, obj, integer in zip(self.col_lb.tolist(), self.col_ub.tolist(),
+                                        self.c.tolist(), self.integrality.tolist()):
+            proto.variable.add(lower_bound=lb, upper_bound=ub,
+                               objective_coefficient=obj, is_integer=integer)
+        indptr = self.indptr.tolist()
+        indices, coefs = self.indices.tolist(), self.coefs.tolist()
+        for r, (lb, ub) in enumerate(zip(self.row_lb.tolist(), self.row_ub.tolist())):
+            lo, hi = indptr[r], indptr[r + 1]
+            proto.constraint.add(lower_bound=lb, upper_bound=ub,
+                                 var_index=indices[lo:hi], coefficient=coefs[lo:hi])
+        return proto
+
+    def build(self):
+        self.create_variables()
+        self.add_constraints()
+        self.set_objective()
+        return self
+
+    # ---------------------------------------------------------------------- solve
+    def solve(self):
+        print("Solving...")
+        status = self.solver.Solve()
+        self.cpu_time = self.solver.WallTime() / 1000.0
+        if status == pywraplp.Solver.OPTIMAL:
+            self.values = solution_values(self.solver)
+            obj_val = self.solver.Objective().Value()
+            print(f"Objective value = {obj_val:,.0f}")
+            print(f"CPU time = {self.cpu_time:.2f}s")
+            return True
+        print('No optimal solution found.')
+        return False
+
+    def get_objective_value(self):
+        return self.solver.Objective().Value()
+
+    def get_cost_breakdown(self):
+        costs = {key: float(vec @ self.values) for key, vec in self.cost_parts.items()}
+        sites = {key: val for key, val in costs.items() if key.startswith('production_site')}
+        production = sum(sites.values())
+        return {
+            'purchasing': costs['purchasing'],
+            'production': production,
+            **sites,
+            'holding': costs['holding'],
+            'transport': costs['transport'],
+            'total': costs['purchasing'] + production + costs['holding'] + costs['transport'],
+        }
+
+    def get_purchasing_plan(self):
+        q = self.values[self.idx['q']]
+        return {t: q[:, t].tolist() for t in range(self.data.T)}
+
+
+if __name__ == "__main__":
+    for K in (3, 4, 5):
+        model = MatrixSupplyChainModel(SupplyChainData(m=1, mode='Pm', num_stages=K)).build()
+        print(f"=== {K}-stage: {model.n_vars} vars, {model.n_rows} rows, {len(model.coefs)} nnz ===")
+        if model.solve():
+            print(model.get_cost_breakdown())
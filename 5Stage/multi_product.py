@@ -0,0 +1,180 @@
+"""
+Mở rộng nhiều sản phẩm (multi-product) cho matrix model.
+
+Mỗi sản phẩm p có nhu cầu, tồn kho đầu/cuối kỳ và luồng riêng trên mọi node/arc của
+StageGraph; các tài nguyên sau dùng CHUNG cho mọi sản phẩm:
+
+- Supplier: min order / max order (z[j, t] theo supplier), cumulative capacity và bậc
+  giá chiết khấu tính trên TỔNG lượng mua từ supplier (mọi sản phẩm cộng lại).
+- Sản xuất: capacity theo kỳ con / kỳ gốc và setup (w_prod, w_prod_group) của mỗi arc.
+- Vận chuyển: capacity + w_trans và bậc cước tính trên tổng luồng của arc (1 xe chở chung).
+- Kho: sum_p i[p, k, t] <= inventory_capacity.
+
+Biến mua q chỉ được tạo cho các cặp (product, supplier) thực sự tồn tại (data.pairs),
+nên số biến tăng theo số cặp chứ không theo P x J.
+
+Với num_products=1 và density=1 (mọi supplier), model trùng MatrixSupplyChainModel.
+"""
+
+import numpy as np
+
+from data_loader import SupplyChainData
+from matrix_model import MatrixSupplyChainModel, _SparseRows
+
+
+class MultiProductData(SupplyChainData):
+    """
+    SupplyChainData + danh mục sản phẩm sinh ngẫu nhiên (seed cố định):
+
+        P                 số sản phẩm
+        product_weight    (P,) tỷ trọng nhu cầu, tổng = 1 (tổng nhu cầu giữ như bài gốc)
+        product_demand    (P, T) = demand * product_weight[p]
+        pairs             (n_pairs, 2) int: các cặp (product, supplier) được phép mua
+        anchor_supplier   supplier có cumulative capacity cuối kỳ lớn nhất - luôn có trong
+                          danh sách của mọi sản phẩm để bài toán luôn khả thi
+    Mỗi supplier khác xuất hiện trong danh sách của 1 sản phẩm với xác suất density.
+    """
+
+    def __init__(self, num_products=1, m=1, mode='Pm', num_stages=4, density=0.5, seed=0):
+        super().__init__(m=m, mode=mode, num_stages=num_stages)
+        rng = np.random.default_rng(seed)
+        P, J = num_products, len(self.suppliers)
+        self.P = P
+
+        weight = rng.uniform(0.5, 1.5, P) if P > 1 else np.ones(1)
+        self.product_weight = weight / weight.sum()
+        self.product_demand = self.product_weight[:, None] * self.demand[None, :]
+
+        self.anchor_supplier = int(np.argmax([s['cumulative_capacity'][-1] for s in self.suppliers]))
+        available = rng.random((P, J)) < density
+        available[:, self.anchor_supplier] = True
+        self.pairs = np.argwhere(available)
+
+
+class MultiProductModel(MatrixSupplyChainModel):
+    """
+    Cùng quy trình build / solve / get_cost_breakdown với MatrixSupplyChainModel.
+    Khối chỉ số:
+        q[n, t]         n = chỉ số cặp trong data.pairs
+        flow[p, a, t]   i[p, k, t]
+        z, w_prod, w_prod_group, w_trans, s_price, r_price, f_freight, y_freight: dùng chung.
+    """
+
+    def _arc_cols(self, a):
+        return self.idx['flow'][:, a]
+
+    def create_variables(self):
+        d, g = self.data, self.graph
+        T, J, P = d.T, len(d.suppliers), d.P
+        self._index_graph()
+        self.pair_product, self.pair_supplier = d.pairs[:, 0], d.pairs[:, 1]
+
+        self._new_vars('q', (len(d.pairs), T))
+        self._new_vars('z', (J, T), 0, 1, True)
+        self._new_vars('flow', (P, len(g.arcs), T))
+        self._new_vars('w_prod', (len(self.prod_arcs), T), 0, 1, True)
+        self._new_vars('w_prod_group', (len(self.prod_arcs), d.base_T), 0, 1, True)
+        self._new_vars('i', (P, g.K, T))
+        self._new_vars('w_trans', (len(self.trans_arcs), T), 0, 1, True)
+
+        self.price_sup = np.concatenate([np.full(len(pb.max_q), j)
+                                         for j, pb in enumerate(d.price_breaks)])
+        self._new_vars('s_price', (len(self.price_sup),), 0, 1, True)
+        self._new_vars('r_price', (len(self.price_sup),))
+        self._new_freight_vars()
+
+    def add_constraints(self):
+        d, g = self.data, self.graph
+        T, P = d.T, d.P
+        J = len(d.suppliers)
+        idx = self.idx
+        q, z, flow = idx['q'], idx['z'], idx['flow']
+        rows = _SparseRows()
+        t_all = np.arange(T)
+        inf = np.inf
+
+        # 1. SUPPLIER - trên tổng lượng mua của supplier j ở kỳ t (dòng j*T + t)
+        sup_t = (self.pair_supplier[:, None] * T + t_all).ravel()
+        jt = np.arange(J * T)
+        min_order = np.array([s['min_order'] for s in d.suppliers], dtype=float)
+        rows.add_block(J * T, [(sup_t, q, 1.0), (jt, z, -np.repeat(min_order, T))], 0.0, inf)
+        rows.add_block(J * T, [(sup_t, q, 1.0), (jt, z, -d.global_max_order_size)], -inf, 0.0)
+
+        for j, supplier in enumerate(d.suppliers):
+            cap = np.asarray(supplier['cumulative_capacity'], dtype=float)
+            suffix_min = np.minimum.accumulate(cap[::-1])[::-1]
+            binding = np.flatnonzero(np.append(cap[:-1] < suffix_min[1:], True))
+            q_j = q[self.pair_supplier == j]
+            r, c = np.nonzero(np.arange(T)[None, :] <= binding[:, None])
+            n_j = len(q_j)
+            rows.add_block(len(binding), [(np.repeat(r, n_j), q_j[:, c].T, 1.0)], -inf, cap[binding])
+
+        # Pricing linearization - bậc giá trên tổng lượng mua cả horizon của supplier
+        s, r_price = idx['s_price'], idx['r_price']
+        lower, width = self._price_lower_width()
+        rows.add_block(J, [(self.price_sup, s, 1.0)], -inf, 1.0)
+        rows.add_block(len(s), [(np.arange(len(s)), r_price, 1.0), (np.arange(len(s)), s, -width)], -inf, 0.0)
+        rows.add_block(J, [(np.repeat(self.pair_supplier, T), q, 1.0),
+                           (self.price_sup, s, -lower), (self.price_sup, r_price, -1.0)], 0.0, 0.0)
+
+        # 2. PRODUCTION - capacity / setup chung, luồng là tổng theo sản phẩm
+        self._add_production_rows(rows)
+
+        # 3. FLOW BALANCE - mỗi node 1 khối P*T dòng (dòng p*T + t)
+        pt = np.arange(P * T).reshape(P, T)
+        weight = d.product_weight[:, None]
+        for node in g.nodes:
+            i_n = idx['i'][:, self.node_row[node['id']]]
+            rhs = np.zeros((P, T))
+            rhs[:, 0] -= node['initial_inventory'] * d.product_weight
+            terms = [(pt, i_n, -1.0), (pt[:, 1:], i_n[:, :-1], 1.0)]
+            supplied = np.isin(self.pair_supplier, self.supply_of[node['id']])
+            if supplied.any():
+                terms.append((pt[self.pair_product[supplied]], q[supplied], 1.0))
+            for a in g.arcs_in(node['id']):
+                lt = g.arcs[a]['lead_time']
+                terms.append((pt[:, lt:], flow[:, a, :T - lt], 1.0))
+            for a in g.arcs_out(node['id']):
+                terms.append((pt, flow[:, a], -1.0))
+            if node['demand'] is not None:
+                rhs += weight * np.asarray(node['demand'], dtype=float)[None, :]
+            rhs = rhs.ravel()
+            rows.add_block(P * T, terms, rhs, rhs)
+
+        # Kho dùng chung: sum_p i[p, k, t] <= inventory_capacity (dòng k*T + t)
+        kt = np.arange(g.K * T).reshape(g.K, T)
+        rows.add_block(g.K * T, [(np.broadcast_to(kt, idx['i'].shape), idx['i'], 1.0)],
+                       -inf, np.repeat(self.node_inventory_capacity, T))
+
+        # Transport capacity + 4. FREIGHT RATE - trên tổng luồng của arc (xe chở chung)
+        self._add_transport_rows(rows)
+
+        # 5. ENDING INVENTORY TARGET - chia theo tỷ trọng sản phẩm
+        end = np.array([node['ending_inventory'] for node in g.nodes], dtype=float)
+        end = (d.product_weight[:, None] * end[None, :]).ravel()
+        rows.add_block(P * g.K, [(np.arange(P * g.K), idx['i'][:, :, T - 1], 1.0)], end, end)
+
+        self.indptr, self.indices, self.coefs, self.row_lb, self.row_ub = rows.to_csr()
+        self.n_rows = rows.n
+
+    def get_purchasing_plan(self):
+        """Tổng lượng mua theo supplier: {t: [q_0, ..., q_J-1]} (cùng dạng MatrixSupplyChainModel)."""
+        q = self.values[self.idx['q']]
+        J = len(self.data.suppliers)
+        total = np.zeros((J, self.data.T))
+        np.add.at(total, self.pair_supplier, q)
+        return {t: total[:, t].tolist() for t in range(self.data.T)}
+
+    def get_product_plan(self, p):
+        """Lượng mua của sản phẩm p: {supplier j: [q theo kỳ]}."""
+        q = self.values[self.idx['q']]
+        return {int(j): q[n].tolist() for n, j in enumerate(self.pair_supplier) if self.pair_product[n] == p}
+
+
+if __name__ == "__main__":
+    for P in (1, 5):
+        model = MultiProductModel(MultiProductData(num_products=P, density=1.0 if P == 1 else 0.5)).build()
+        print(f"=== {P} product(s): {len(model.data.pairs)} pairs, {model.n_vars} vars, "
+              f"{model.n_rows} rows, {len(model.coefs)} nnz ===")
+        if model.solve():
+            print(model.get_cost_breakdown())
@@ -0,0 +1,243 @@
+"""
+Sweep 1 tham số bất kỳ của SupplyChainData (không chỉ m): inventory_capacity,
+prod_capacity, primary_cost của 1 supplier, fixed_cost của 1 khoảng cước, scale demand...
+
+Tham số được chỉ bằng đường dẫn dạng chấm:
+    inventory_capacity
+    demand                              (mảng -> giá trị là HỆ SỐ SCALE của mảng gốc)
+    suppliers.2.primary_cost
+    suppliers.0.price_intervals.1.price
+    freight_actual.3.fixed_cost
+Tham số vô hướng được gán thẳng giá trị; tham số là mảng theo kỳ được nhân với giá trị.
+
+Lưới giá trị được chia thành các đoạn liên tiếp (chunk) chạy song song trên
+ProcessPoolExecutor. Trong 1 chunk, các điểm lân cận được giải nối tiếp trên CÙNG một
+SupplyChainModel: nếu tham số sửa được tại chỗ (SupplyChainModel.update / update_supplier)
+thì chỉ update + resolve(); nếu không thì dựng model mới với nghiệm điểm trước làm hint.
+Mỗi dòng kết quả được ghi (flush) ra CSV ngay khi chunk của nó xong.
+Tham số solver (--threads --time-limit --rel-gap --abs-gap --emphasis --seed --safe) áp cho mọi
+điểm (SupplyChainModel.set_parameters).
+
+Chạy:
+    python param_sweep.py --param inventory_capacity=300,350,400,450
+    python param_sweep.py --param suppliers.2.primary_cost --scale 0.8 0.9 1.0 1.1 1.2
+    python param_sweep.py --param demand --param prod_capacity --scale 0.9 1.0 1.1 --out tornado.csv
+    python param_sweep.py --param inventory_capacity=300,400 --time-limit 60 --rel-gap 1e-3 --seed 1
+"""
+
+import argparse
+import contextlib
+import copy
+import csv
+import io
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+from ortools.linear_solver import pywraplp
+
+from data_loader import SupplyChainData
+from dynamic_scm_milp import SupplyChainModel
+from solver_backends import add_solver_arguments, solution_values, solver_params_from_args
+
+CSV_FIELDS = ['param', 'value', 'base_value', 'status', 'objective', 'purchasing', 'production',
+              'holding', 'transport', 'solve_time', 'incremental']
+
+
+def _split(path):
+    return [int(tok) if tok.isdigit() else tok for tok in path.split('.')]
+
+
+def get_param(data, path):
+    tokens = _split(path)
+    obj = getattr(data, tokens[0])
+    for tok in tokens[1:]:
+        obj = obj[tok]
+    return obj
+
+
+def set_param(data, path, value):
+    """
+    Gán tham số `path` của data (sửa tại chỗ). Mảng/list số -> nhân với value,
+    vô hướng -> gán value. Trả về giá trị mới.
+    """
+    tokens = _split(path)
+    current = get_param(data, path)
+    if isinstance(current, (np.ndarray, list)):
+        new = np.asarray(current, dtype=float) * value
+    else:
+        new = value
+    if len(tokens) == 1:
+        setattr(data, tokens[0], new)
+    else:
+        parent = get_param(data, '.'.join(str(tok) for tok in tokens[:-1]))
+        parent[tokens[-1]] = new
+    if 'price_intervals' in tokens:
+        data.refresh_price_breaks()
+    return new
+
+
+def _is_incremental(path):
+    """Tham số sửa được tại chỗ trên SupplyChainModel đã build hay không."""
+    tokens = _split(path)
+    if tokens[0] in SupplyChainModel.UPDATABLE_FIELDS:
+        return tokens[0] != 'freight_actual' or tokens[-1] in ('min', 'max', 'fixed_cost', 'var_cost_per_unit')
+    if tokens[0] == 'suppliers' and len(tokens) == 3:
+        return tokens[2] in SupplyChainModel.UPDATABLE_SUPPLIER_FIELDS
+    if tokens[0] == 'suppliers' and len(tokens) == 5:
+        return tokens[2] == 'price_intervals' and tokens[4] == 'price'
+    return False
+
+
+def _apply_incremental(model, data, path):
+    tokens = _split(path)
+    if tokens[0] == 'suppliers':
+        j = tokens[1]
+        supplier = data.suppliers[j]
+        if tokens[2] == 'price_intervals':
+            model.update_supplier(j, prices=[iv['price'] for iv in supplier['price_intervals']])
+        else:
+            model.update_supplier(j, **{tokens[2]: supplier[tokens[2]]})
+    else:
+        model.update(**{tokens[0]: getattr(data, tokens[0])})
+
+
+def _build(data, hint=None, solver_params=None):
+    model = SupplyChainModel(data)
+    model.create_variables()
+    model.add_constraints()
+    model.set_objective()
+    if solver_params:
+        model.set_parameters(**solver_params)
+    if hint:
+        model.set_hint(hint)
+    return model
+
+
+def solve_chunk(task):
+    """
+    Giải 1 đoạn liên tiếp của lưới - chạy trong worker.
+    task = (m, mode, num_stages, path, values, solver_params). Trả về list dòng kết quả (dict theo CSV_FIELDS).
+    """
+    m, mode, num_stages, path, values, solver_params = task
+    base = SupplyChainData(m=m, mode=mode, num_stages=num_stages)
+    base_value = get_param(base, path)
+    incremental = _is_incremental(path)
+
+    rows = []
+    model, prev_values = None, None
+    with contextlib.redirect_stdout(io.StringIO()):
+        for value in values:
+            data = copy.deepcopy(base)
+            set_param(data, path, value)
+            start = time.perf_counter()
+            if model is not None and incremental:
+                _apply_incremental(model, data, path)
+                success = model.resolve()
+            else:
+                model = _build(data, hint=prev_values, solver_params=solver_params)
+                success = model.solve()
+            elapsed = time.perf_counter() - start
+
+            # Hết time limit mà có incumbent: ghi nghiệm đó (status 'feasible') như sweep.solve_task
+            feasible = not success and model.status == pywraplp.Solver.FEASIBLE
+            row = {'param': path, 'value': value,
+                   'base_value': base_value if np.isscalar(base_value) else 1.0,
+                   'status': 'optimal' if success else ('feasible' if feasible else 'not_optimal'),
+                   'solve_time': elapsed, 'incremental': incremental and len(rows) > 0}
+            if success or feasible:
+                prev_values = dict(zip((v.name() for v in model.solver.variables()),
+                                       solution_values(model.solver).tolist()))
+                breakdown = model.get_cost_breakdown()
+                row.update(objective=model.get_objective_value(),
+                           **{key: breakdown[key] for key in ('purchasing', 'production', 'holding', 'transport')})
+            rows.append(row)
+    return rows
+
+
+def run_param_sweep(grid, out_path, m=1, mode='Pm', num_stages=4, chunk_size=4, max_workers=None,
+                    solver_params=None):
+    """
+    grid = { path: [value, ...] }. Giải mọi điểm, ghi từng dòng ra CSV out_path ngay khi
+    xong. solver_params: xem SupplyChainModel.set_parameters. Trả về list toàn bộ dòng kết quả (sắp theo param, value).
+    """
+    tasks = []
+    for path, values in grid.items():
+        values = list(values)
+        for i in range(0, len(values), chunk_size):
+            tasks.append((m, mode, num_stages, path, values[i:i + chunk_size], solver_params))
+    if max_workers is None:
+        max_workers = min(len(tasks), os.cpu_count() or 1)
+
+    results = []
+    with open(out_path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=CSV_FIELDS)
+        writer.writeheader()
+        f.flush()
+
+        def emit(rows):
+            for row in rows:
+                writer.writerow(row)
+                print(f"{row['param']:<36} = {row['value']:<10g} -> "
+                      f"{row.get('objective', float('nan')):>12,.1f} ({row['solve_time']:.2f}s)"
+                      f"{' incumbent' if row['status'] == 'feasible' else ''}", flush=True)
+            f.flush()
+            results.extend(rows)
+
+        if max_workers <= 1:
+            for task in tasks:
+                emit(solve_chunk(task))
+        else:
+            with ProcessPoolExecutor(max_workers=max_workers) as pool:
+                for future in as_completed([pool.submit(solve_chunk, task) for task in tasks]):
+                    emit(future.result())
+
+    order = {path: i for i, path in enumerate(grid)}
+    return sorted(results, key=lambda row: (order[row['param']], row['value']))
+
+
+def tornado_grid(base, paths, scales):
+    """Lưới tornado: tham số vô hướng -> base * scale, tham số mảng -> scale."""
+    grid = {}
+    for path in paths:
+        current = get_param(base, path)
+        if isinstance(current, (np.ndarray, list)):
+            grid[path] = list(scales)
+        else:
+            grid[path] = [current * s for s in scales]
+    return grid
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--param', action='append', required=True,
+                        help='PATH hoặc PATH=v1,v2,... (lặp lại cho nhiều tham số)')
+    parser.add_argument('--scale', type=float, nargs='+', default=[0.8, 0.9, 1.0, 1.1, 1.2],
+                        help='hệ số cho các --param không kèm giá trị (tornado)')
+    parser.add_argument('--m', type=int, default=1)
+    parser.add_argument('--mode', default='Pm', choices=['Pm', 'Pmd'])
+    parser.add_argument('--stages', type=int, default=4, choices=[3, 4, 5])
+    parser.add_argument('--chunk-size', type=int, default=4)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--out', default='param_sweep.csv')
+    add_solver_arguments(parser)
+    args = parser.parse_args(argv)
+
+    base = SupplyChainData(m=args.m, mode=args.mode, num_stages=args.stages)
+    grid = {}
+    for spec in args.param:
+        path, _, values = spec.partition('=')
+        if values:
+            grid[path] = [float(v) for v in values.split(',')]
+        else:
+            grid.update(tornado_grid(base, [path], args.scale))
+
+    results = run_param_sweep(grid, args.out, m=args.m, mode=args.mode, num_stages=args.stages,
+                              chunk_size=args.chunk_size, max_workers=args.workers,
+                              solver_params=solver_params_from_args(args))
+    print(f"Saved {len(results)} rows: {args.out}")
+
+
+if __name__ == "__main__":
+    main()
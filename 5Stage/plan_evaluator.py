@@ -0,0 +1,377 @@
+"""
+Tính chi phí và kiểm tra ràng buộc cho phương án bất kỳ (q, x, x2, y, i) mà không cần
+giải MILP - vd. phương án lập tay trong spreadsheet, nghiệm của heuristic, hay hàng triệu
+phương án ngẫu nhiên cho Monte Carlo. Mọi phép tính vector hóa theo batch.
+
+Phương án (cùng layout với SupplyChainModel.idx, batch B ở trục đầu, bỏ trục B nếu chỉ
+có 1 phương án):
+    q   (B, J, T)        lượng mua từ supplier j ở kỳ t
+    x   (B, T)           sản xuất site 1
+    x2  (B, T)           sản xuất site 2 (K = 5; None -> 0)
+    y   (B, K - 1, T)    luồng leg k ở hàng k - 1 (hàng 0 = leg 1 không dùng trong model)
+    i   (B, K, T)        tồn kho stage k ở hàng k - 1
+
+Biến nhị phân / biến bậc giá, bậc cước không cần nhập: decode() suy ra lựa chọn rẻ nhất
+cho phương án (z = q > 0, setup nhóm kỳ gốc khi có sản xuất trong nhóm, bậc giá theo tổng
+lượng mua cả horizon, bậc cước rẻ nhất chứa luồng y) và dựng vector biến đầy đủ của
+SupplyChainModel. Sau đó:
+
+- Chi phí = vector biến . hệ số objective_parts() của model (đúng hệ số set_objective()
+  đặt cho solver), tách theo COMPONENTS; breakdown() gộp lại như get_cost_breakdown().
+- Ràng buộc = mọi hàng của model (xuất 1 lần qua ExportModelToProto) và bound của biến;
+  vượt quá tol là vi phạm. Hàng có handle trong model (min_order_rows, flow_rows, ...)
+  mang tên họ ràng buộc + key, hàng còn lại mang tên các họ biến của hàng (vd. 'x2').
+
+Dùng:
+    evaluator = PlanEvaluator(data)
+    costs = evaluator.evaluate(q, x, x2, y, i)        # dict COMPONENTS + total, violation, feasible
+    evaluator.violations(q, x, x2, y, i)              # list vi phạm của 1 phương án
+    evaluator.violation_counts(q, x, x2, y, i)        # số phương án vi phạm mỗi họ ràng buộc
+    evaluator.inventories(q, x, x2, y)                # tồn kho suy ra từ luồng (K, T)
+
+Benchmark / Monte Carlo quanh nghiệm tối ưu:
+    python plan_evaluator.py --stages 4 --m 1 --plans 200000 --noise 0.05
+"""
+
+import argparse
+import contextlib
+import io
+import time
+
+import numpy as np
+from ortools.linear_solver import linear_solver_pb2
+
+from data_loader import SupplyChainData
+from dynamic_scm_milp import SupplyChainModel
+from solver_backends import solution_values
+
+COMPONENTS = ('price_breaks', 'primary_ordering', 'secondary_ordering',
+              'production_site1', 'setup_site1', 'production_site2', 'setup_site2',
+              'holding', 'intransit_holding', 'freight')
+# Nhóm như get_cost_breakdown()
+BREAKDOWN = {
+    'purchasing': ('price_breaks', 'primary_ordering', 'secondary_ordering'),
+    'production_site1': ('production_site1', 'setup_site1'),
+    'production_site2': ('production_site2', 'setup_site2'),
+    'holding': ('holding', 'intransit_holding'),
+    'transport': ('freight',),
+}
+# Handle ràng buộc của SupplyChainModel -> tên họ ràng buộc trong báo cáo vi phạm
+ROW_FAMILIES = (('min_order', 'min_order_rows'), ('max_order', 'max_order_rows'),
+                ('cumulative_capacity', 'cum_cap_rows'), ('price_quantity', 'price_rows'),
+                ('prod_capacity', 'prod_cap_rows'), ('prod_block', 'prod_block_rows'),
+                ('trans_capacity', 'trans_cap_rows'), ('flow', 'flow_rows'),
+                ('freight_min', 'freight_min_rows'), ('freight_max', 'freight_max_rows'),
+                ('ending_inventory', 'ending_rows'))
+
+
+def breakdown(costs):
+    """Gộp dict COMPONENTS (vô hướng hoặc mảng theo batch) thành các khóa của get_cost_breakdown()."""
+    groups = {key: sum(costs[c] for c in parts) for key, parts in BREAKDOWN.items()}
+    groups['production'] = groups['production_site1'] + groups['production_site2']
+    groups['total'] = costs['total']
+    return groups
+
+
+def plan_from_model(model, values=None):
+    """Phương án (q, x, x2, y, i) của nghiệm model (mặc định nghiệm hiện tại của solver)."""
+    if values is None:
+        values = solution_values(model.solver)
+    return {name: values[model.idx[name]] for name in ('q', 'x', 'x2', 'y', 'i')}
+
+
+class PlanEvaluator:
+    def __init__(self, data, tol=1e-6, model=None):
+        """
+        model: SupplyChainModel đã create_variables / add_constraints / set_objective
+        (mặc định dựng model thường, không giải). Các hàng thêm sau (lot-sizing, tight)
+        cũng được kiểm tra.
+        """
+        if model is None:
+            model = SupplyChainModel(data)
+            with contextlib.redirect_stdout(io.StringIO()):
+                model.create_variables()
+                model.add_constraints()
+                model.set_objective()
+        self.data = model.data
+        self.model = model
+        self.tol = tol
+        self.idx = model.idx
+        self.n = model.solver.NumVariables()
+        self._build_costs()
+        self._build_rows()
+        self._build_tariffs()
+
+    # ------------------------------------------------------------------ setup
+    def _build_costs(self):
+        """Ma trận (n, len(COMPONENTS)): objective_parts() tách theo họ biến."""
+        d, idx, model = self.data, self.idx, self.model
+        parts = model.objective_parts()
+        cols = lambda *names: np.concatenate([idx[name].ravel() for name in names])
+
+        def masked(vec, *names):
+            out = np.zeros(self.n)
+            c = cols(*names)
+            out[c] = vec[c]
+            return out
+
+        primary = np.zeros(self.n)
+        for j, supplier in enumerate(d.suppliers):
+            primary[idx['s_price'][model.price_supplier == j]] = supplier['primary_cost']
+        vectors = {
+            'price_breaks': masked(parts['purchasing'], 's_price', 'r_price') - primary,
+            'primary_ordering': primary,
+            'secondary_ordering': masked(parts['purchasing'], 'z'),
+            'production_site1': masked(parts['production_site1'], 'x'),
+            'setup_site1': masked(parts['production_site1'], 'w_prod_group'),
+            'production_site2': masked(parts['production_site2'], 'x2'),
+            'setup_site2': masked(parts['production_site2'], 'w_prod2_group'),
+            'holding': masked(parts['holding'], 'i'),
+            'intransit_holding': masked(parts['holding'], 'y'),
+            'freight': parts['transport'],
+        }
+        self.cost_matrix = np.stack([vectors[c] for c in COMPONENTS], axis=1)
+
+    def _build_rows(self):
+        """Ràng buộc của model (gom theo số nonzero của hàng), bound của biến, nhãn từng hàng."""
+        proto = linear_solver_pb2.MPModelProto()
+        self.model.solver.ExportModelToProto(proto)
+        self.var_names = [v.name for v in proto.variable]
+        self.col_lb = np.array([v.lower_bound for v in proto.variable])
+        self.col_ub = np.array([v.upper_bound for v in proto.variable])
+        self.row_lb = np.array([c.lower_bound for c in proto.constraint])
+        self.row_ub = np.array([c.upper_bound for c in proto.constraint])
+        lengths = np.array([len(c.var_index) for c in proto.constraint], dtype=np.int64)
+        self.indptr = np.concatenate([[0], np.cumsum(lengths)])
+        self.indices = np.array([v for c in proto.constraint for v in c.var_index], dtype=np.int64)
+        self.coefs = np.array([a for c in proto.constraint for a in c.coefficient])
+        # Hàng cùng độ dài L xử lý chung: activity = sum_l coef[:, l] * V[ind[:, l]]
+        self._buckets = []
+        for L in np.unique(lengths[lengths > 0]):
+            rows = np.flatnonzero(lengths == L)
+            pos = self.indptr[rows][:, None] + np.arange(L)
+            self._buckets.append((rows, self.indices[pos], self.coefs[pos][..., None]))
+        # Biến suy ra trong _decode luôn nằm trong bound -> chỉ kiểm tra bound của biến nhập vào
+        self._plan_cols = np.concatenate([self.idx[name].ravel() for name in ('q', 'x', 'x2', 'y', 'i')])
+
+        col_family = np.empty(self.n, dtype=object)
+        for name, index in self.idx.items():
+            col_family[index.ravel()] = name
+        self.row_family = [None] * len(lengths)
+        self.row_key = [None] * len(lengths)
+        for family, attr in ROW_FAMILIES:
+            for key, row in getattr(self.model, attr).items():
+                self.row_family[row.index()], self.row_key[row.index()] = family, key
+        for r, family in enumerate(self.row_family):
+            if family is None:
+                names = col_family[self.indices[self.indptr[r]:self.indptr[r + 1]]]
+                self.row_family[r] = '/'.join(sorted(set(names)))
+        self.families = sorted(set(self.row_family)) + ['bound']
+        family_id = {family: f for f, family in enumerate(self.families)}
+        self._row_family_id = np.array([family_id[f] for f in self.row_family], dtype=np.int64)
+
+    def _build_tariffs(self):
+        tariff = self.data.freight_actual
+        self._fr_lo = np.array([iv['min'] for iv in tariff], dtype=float)
+        self._fr_hi = np.array([iv['max'] for iv in tariff], dtype=float)
+        self._fr_fixed = np.array([iv['fixed_cost'] for iv in tariff], dtype=float)
+        self._fr_var = np.array([iv['var_cost_per_unit'] for iv in tariff], dtype=float)
+
+    # ------------------------------------------------------------------ decode
+    def _as_batch(self, q, x, x2, y, i):
+        d = self.data
+        J, T, K = len(d.suppliers), d.T, d.K
+        q = np.asarray(q, dtype=float).reshape(-1, J, T)
+        B = q.shape[0]
+        x = np.broadcast_to(np.asarray(x, dtype=float).reshape(-1, T), (B, T))
+        x2 = np.zeros((B, T)) if x2 is None else np.broadcast_to(np.asarray(x2, dtype=float).reshape(-1, T), (B, T))
+        y = np.broadcast_to(np.asarray(y, dtype=float).reshape(-1, K - 1, T), (B, K - 1, T))
+        i = np.broadcast_to(np.asarray(i, dtype=float).reshape(-1, K, T), (B, K, T))
+        return q, x, x2, y, i
+
+    def decode(self, q, x, x2, y, i):
+        """Vector biến đầy đủ (B, NumVariables) với lựa chọn nhị phân / bậc rẻ nhất."""
+        return self._decode(*self._as_batch(q, x, x2, y, i)).T
+
+    def _decode(self, q, x, x2, y, i):
+        """Như decode() nhưng chuyển vị: (NumVariables, B), mỗi cột là 1 phương án."""
+        d, idx, tol = self.data, self.idx, self.tol
+        B, T = x.shape
+        plans = np.arange(B)
+        V = np.zeros((self.n, B))
+        batch_last = lambda a: np.moveaxis(a, 0, -1)
+
+        V[idx['q']] = batch_last(q)
+        V[idx['z']] = batch_last(q > tol)
+        for name, w, group, flow in (('x', 'w_prod', 'w_prod_group', x), ('x2', 'w_prod2', 'w_prod2_group', x2)):
+            V[idx[name]] = flow.T
+            V[idx[w]] = flow.T > tol
+            V[idx[group]] = (flow > tol).reshape(B, d.base_T, d.m).any(axis=2).T
+        V[idx['i']] = batch_last(i)
+        V[idx['y']] = batch_last(y)
+        V[idx['w_trans']] = batch_last(y > tol)
+
+        # Bậc giá theo tổng lượng mua cả horizon (vượt bậc cuối -> bậc cuối, r > width bị báo vi phạm)
+        total = q.sum(axis=2)
+        for j, breaks in enumerate(d.price_breaks):
+            sel = self.model.price_supplier == j
+            g = np.minimum(breaks.tier(total[:, j]), len(breaks.max_q) - 1)
+            active = total[:, j] > tol
+            V[idx['s_price'][sel][g], plans] = active
+            V[idx['r_price'][sel][g], plans] = np.where(active, total[:, j] - breaks.lower[g], 0.0)
+
+        # Bậc cước rẻ nhất chứa y; y rơi vào khe giữa các bậc -> bậc gần nhất (báo vi phạm min/max)
+        for l, k in enumerate(self.model.freight_legs):
+            flow = y[:, k - 1, :, None]
+            inside = (flow >= self._fr_lo - tol) & (flow <= self._fr_hi + tol)
+            cost = np.where(inside, self._fr_fixed + self._fr_var * flow, np.inf)
+            gap = np.maximum(np.maximum(self._fr_lo - flow, flow - self._fr_hi), 0.0)
+            e = np.where(inside.any(axis=2), cost.argmin(axis=2), gap.argmin(axis=2))
+            active = flow[..., 0] > tol
+            V[idx['f_freight'][l][np.arange(T), e], plans[:, None]] = active
+            V[idx['y_freight'][l][np.arange(T), e], plans[:, None]] = np.where(active, flow[..., 0], 0.0)
+        return V
+
+    def inventories(self, q, x, x2, y):
+        """
+        Tồn kho (K, T) suy ra từ luồng của 1 phương án: mỗi hàng cân bằng flow_rows[k, t]
+        (a i[k, t] + b i[k, t-1] + luồng == rhs) giải tuần tự theo t.
+        """
+        model, K, T = self.model, self.data.K, self.data.T
+        activity, _, _ = self._excess(self._decode(*self._as_batch(q, x, x2, y, np.zeros((K, T)))))
+        i = np.zeros((K, T))
+        for k in range(1, K + 1):
+            for t in range(T):
+                row = model.flow_rows[k, t]
+                carry = row.GetCoefficient(model.i[k, t - 1]) * i[k - 1, t - 1] if t > 0 else 0.0
+                i[k - 1, t] = (row.lb() - activity[row.index(), 0] - carry) / row.GetCoefficient(model.i[k, t])
+        return i
+
+    # ------------------------------------------------------------------ evaluate
+    def _excess(self, V):
+        """
+        V (NumVariables, B) -> (activity (hàng, B), mức vượt ràng buộc (hàng, B), mức vượt
+        bound của biến nhập vào (len(_plan_cols), B)); 0 nếu thỏa.
+        """
+        activity = np.zeros((len(self.row_lb), V.shape[1]))
+        for rows, ind, coef in self._buckets:
+            acc = V[ind[:, 0]] * coef[:, 0]
+            for l in range(1, ind.shape[1]):
+                acc += V[ind[:, l]] * coef[:, l]
+            activity[rows] = acc
+        row = np.maximum(np.maximum(self.row_lb[:, None] - activity, activity - self.row_ub[:, None]), 0.0)
+        plan = V[self._plan_cols]
+        col = np.maximum(np.maximum(self.col_lb[self._plan_cols, None] - plan,
+                                    plan - self.col_ub[self._plan_cols, None]), 0.0)
+        return activity, row, col
+
+    def _chunks(self, plan):
+        q, x, x2, y, i = self._as_batch(*plan)
+        chunk = max(1, (1 << 22) // max(self.n, len(self.row_lb)))
+        for start in range(0, q.shape[0], chunk):
+            s = slice(start, start + chunk)
+            yield self._decode(q[s], x[s], x2[s], y[s], i[s])
+
+    def evaluate(self, q, x, x2, y, i):
+        """
+        dict: mỗi COMPONENTS, total, violation (mức vượt lớn nhất trên mọi ràng buộc và
+        bound) và feasible (violation <= tol). Mảng (B,), vô hướng nếu nhập 1 phương án.
+        """
+        costs, violation = [], []
+        for V in self._chunks((q, x, x2, y, i)):
+            costs.append(self.cost_matrix.T @ V)
+            _, row, col = self._excess(V)
+            violation.append(np.maximum(row.max(axis=0, initial=0.0), col.max(axis=0, initial=0.0)))
+        costs, violation = np.concatenate(costs, axis=1), np.concatenate(violation)
+        result = dict(zip(COMPONENTS, costs))
+        result['total'] = costs.sum(axis=0)
+        result['violation'] = violation
+        result['feasible'] = violation <= self.tol
+        if np.ndim(q) == 2:
+            result = {key: value[0].item() for key, value in result.items()}
+        return result
+
+    def violation_counts(self, q, x, x2, y, i):
+        """{họ ràng buộc: số phương án vi phạm ít nhất 1 hàng của họ} (chỉ họ có vi phạm)."""
+        counts = np.zeros(len(self.families), dtype=np.int64)
+        for V in self._chunks((q, x, x2, y, i)):
+            _, row, col = self._excess(V)
+            bad = np.zeros((len(self.families), V.shape[1]), dtype=bool)
+            rows, plans = np.nonzero(row > self.tol)
+            bad[self._row_family_id[rows], plans] = True
+            bad[-1] = (col > self.tol).any(axis=0)
+            counts += bad.sum(axis=1)
+        return {family: int(c) for family, c in zip(self.families, counts) if c}
+
+    def _expr(self, r):
+        span = slice(self.indptr[r], self.indptr[r + 1])
+        terms = []
+        for v, a in zip(self.indices[span], self.coefs[span]):
+            sign = '-' if a < 0 else '+'
+            term = self.var_names[v] if abs(a) == 1 else f"{abs(a):g} {self.var_names[v]}"
+            terms.append(f"{sign} {term}")
+        return ' '.join(terms).lstrip('+ ')
+
+    def violations(self, q, x, x2, y, i, plan=0):
+        """
+        Mọi vi phạm của phương án thứ `plan` trong batch, giảm dần theo mức vượt: list dict
+        constraint (họ), key, expr, activity, lb, ub, excess.
+        """
+        q, x, x2, y, i = self._as_batch(q, x, x2, y, i)
+        s = slice(plan, plan + 1)
+        V = self._decode(q[s], x[s], x2[s], y[s], i[s])
+        activity, row, col = self._excess(V)
+        found = []
+        for r in np.flatnonzero(row[:, 0] > self.tol):
+            found.append({'constraint': self.row_family[r], 'key': self.row_key[r], 'expr': self._expr(r),
+                          'activity': float(activity[r, 0]), 'lb': float(self.row_lb[r]),
+                          'ub': float(self.row_ub[r]), 'excess': float(row[r, 0])})
+        for c in np.flatnonzero(col[:, 0] > self.tol):
+            v = self._plan_cols[c]
+            found.append({'constraint': 'bound', 'key': self.var_names[v], 'expr': self.var_names[v],
+                          'activity': float(V[v, 0]), 'lb': float(self.col_lb[v]),
+                          'ub': float(self.col_ub[v]), 'excess': float(col[c, 0])})
+        return sorted(found, key=lambda item: -item['excess'])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--stages', type=int, default=4, choices=[3, 4, 5])
+    parser.add_argument('--m', type=int, default=1)
+    parser.add_argument('--mode', default='Pm', choices=['Pm', 'Pmd'])
+    parser.add_argument('--plans', type=int, default=100000, help='số phương án ngẫu nhiên')
+    parser.add_argument('--noise', type=float, default=0.05, help='độ lệch chuẩn tương đối nhân vào q')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    data = SupplyChainData(m=args.m, mode=args.mode, num_stages=args.stages)
+    model = SupplyChainModel(data)
+    with contextlib.redirect_stdout(io.StringIO()):
+        model.create_variables()
+        model.add_constraints()
+        model.set_objective()
+        if not model.solve():
+            raise SystemExit("MILP không giải được tối ưu")
+    evaluator = PlanEvaluator(data)
+    plan = plan_from_model(model)
+    costs = evaluator.evaluate(**plan)
+    print(f"Nghiệm MILP: objective {model.get_objective_value():,.2f} | evaluator {costs['total']:,.2f} "
+          f"| vi phạm {len(evaluator.violations(**plan))}")
+    for name in COMPONENTS:
+        print(f"  {name:<20} {costs[name]:12,.2f}")
+
+    # Monte Carlo: nhân q với nhiễu, các mảng khác giữ nguyên
+    rng = np.random.default_rng(args.seed)
+    q = plan['q'] * rng.normal(1.0, args.noise, (args.plans,) + plan['q'].shape).clip(min=0.0)
+    batch = dict(plan, q=q)
+    start = time.perf_counter()
+    result = evaluator.evaluate(**batch)
+    elapsed = time.perf_counter() - start
+    print(f"{args.plans:,} phương án trong {elapsed:.2f}s ({args.plans / elapsed * 60:,.0f} phương án/phút), "
+          f"khả thi {result['feasible'].mean():.1%}, total trung bình {result['total'].mean():,.1f}")
+    for family, count in sorted(evaluator.violation_counts(**batch).items(), key=lambda kv: -kv[1]):
+        print(f"  {family:<24} {count:>10,} phương án vi phạm")
+
+
+if __name__ == "__main__":
+    main()
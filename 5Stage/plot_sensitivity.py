@@ -13,6 +13,7 @@ import matplotlib.pyplot as plt
 import numpy as np
 from data_loader import SupplyChainData
 from dynamic_scm_milp import SupplyChainModel
+from result_cache import solve_cached
 
 def collect_data(num_stages=4):
     """
@@ -47,12 +48,10 @@ def collect_data(num_stages=4):
         for m in m_values:
             print(f"Running {num_stages}-stage: m={m}, mode={mode}...")
             data = SupplyChainData(m=m, mode=mode, num_stages=num_stages)
-            model = SupplyChainModel(data)
-            model.create_variables()
-            model.add_constraints()
-            model.set_objective()
+            # Dùng lại kết quả đã giải (vd. bởi run_sensitivity.py) nếu có trong cache
+            model, obj_val, _, _ = solve_cached(data, SupplyChainModel)
             
-            if model.solve():
+            if obj_val != float('inf'):
                 # Lấy Cost Breakdown
                 breakdown = model.get_cost_breakdown()
                 results[mode]['purchasing'].append(breakdown['purchasing'])
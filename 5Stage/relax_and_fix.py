@@ -0,0 +1,208 @@
+"""
+Relax-and-fix + fix-and-optimize cho các biến nhị phân của SupplyChainModel.
+
+Phần khó của bài toán là các biến nhị phân: z[j, t], w_prod[t], w_prod_group[b],
+w_trans[k, t], f_freight[k, t, e] (và w_prod2 / w_prod2_group ở 5-stage) theo thời gian,
+cộng s_price[j, g] (bậc giá trên cả horizon). Tất cả chạy trên CÙNG 1 solver, chỉ đổi
+tính nguyên / bound của biến giữa các lần giải:
+
+1. LP relaxation: nới mọi biến nguyên -> cận dưới (bound) cho cả horizon.
+2. Relax-and-fix: cửa sổ `window` kỳ gốc giữ nguyên, kỳ trước đã cố định, kỳ sau nới
+   thành liên tục; giải, cố định `step` kỳ gốc đầu cửa sổ rồi dịch cửa sổ. s_price luôn
+   nguyên (ít biến, liên quan cả horizon). Cửa sổ cuối cho nghiệm khả thi đầu tiên.
+3. Fix-and-optimize: lần lượt mở lại binaries của từng cửa sổ (các biến khác cố định theo
+   nghiệm tốt nhất, nghiệm đó làm hint), giải lại, nhận nếu objective giảm. Lặp tới khi 1
+   lượt không cải thiện hoặc hết `passes` lượt.
+
+Horizon vài trăm kỳ con được tạo bằng rolling_horizon.repeat_horizon().
+
+Chạy:
+    python relax_and_fix.py --cycles 20 --m 4 --window 3 --step 2 --time-budget 900   # T = 400
+    python relax_and_fix.py --cycles 4 --m 2 --monolithic --time-limit 300   # so với giải trực tiếp
+"""
+
+import argparse
+import contextlib
+import io
+import time
+
+from ortools.linear_solver import pywraplp
+
+from data_loader import SupplyChainData
+from rolling_horizon import GROUP_VARS, OK_STATUS, PERIOD_VARS, _build, _key, repeat_horizon, solve_monolithic
+
+
+def binary_blocks(model):
+    """
+    Binaries theo kỳ gốc: ({kỳ gốc: [var, ...]}, [binaries không theo kỳ]).
+    Biến theo kỳ con t thuộc kỳ gốc t // m.
+    """
+    m = model.data.m
+    blocks = {b: [] for b in range(model.data.base_T)}
+    for attr, _, pos in PERIOD_VARS:
+        for key, var in getattr(model, attr).items():
+            if var.integer():
+                blocks[_key(key)[pos] // m].append(var)
+    for attr, _ in GROUP_VARS:
+        for b, var in getattr(model, attr).items():
+            blocks[b].append(var)
+    return blocks, list(model.s_price.values())
+
+
+class RelaxAndFix:
+    """
+    Heuristic trên 1 SupplyChainModel đã build. time_limit: giây cho mỗi lần giải con;
+    time_budget: giây cho cả run() - fix-and-optimize dừng khi hết (pha xây dựng luôn chạy hết).
+    Sau run(): objective, bound (LP relaxation), solution (giá trị mọi biến của nghiệm tốt
+    nhất, theo thứ tự solver.variables()) và history (thống kê từng lần giải).
+    """
+
+    def __init__(self, data, window=3, step=2, passes=2, time_limit=None, time_budget=None):
+        if not 1 <= step <= window:
+            raise ValueError("Cần 1 <= step <= window")
+        self.data = data
+        self.window, self.step, self.passes = window, step, passes
+        self.time_budget = time_budget
+        self.model = _build(data, time_limit)
+        self.solver = self.model.solver
+        self.blocks, self.global_binaries = binary_blocks(self.model)
+        self.binaries = [var for block in self.blocks.values() for var in block] + self.global_binaries
+        self.objective = self.bound = self.solution = None
+        self.history = []
+        self.started = time.perf_counter()
+
+    def _solve(self, phase, label):
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            status = self.solver.Solve()
+        obj = self.solver.Objective().Value() if status in OK_STATUS else None
+        self.history.append({'phase': phase, 'window': label, 'status': status, 'objective': obj,
+                             'time': time.perf_counter() - start})
+        return obj
+
+    def _window_vars(self, start):
+        return [var for b in range(start, min(start + self.window, self.data.base_T)) for var in self.blocks[b]]
+
+    @staticmethod
+    def _fix(variables, values=None):
+        # Đọc hết giá trị trước: SetBounds đầu tiên làm nghiệm hiện tại của solver mất hiệu lực
+        if values is None:
+            values = {var.index(): var.solution_value() for var in variables}
+        for var in variables:
+            value = round(values[var.index()])
+            var.SetBounds(value, value)
+
+    def lp_bound(self):
+        for var in self.binaries:
+            var.SetInteger(False)
+        self.bound = self._solve('lp', None)
+        for var in self.binaries:
+            var.SetInteger(True)
+        return self.bound
+
+    def relax_and_fix(self):
+        """Pha xây dựng. Trả về objective của nghiệm khả thi đầu tiên (None nếu thất bại)."""
+        base_T = self.data.base_T
+        for var in self.binaries:
+            var.SetInteger(False)
+        for var in self.global_binaries:
+            var.SetInteger(True)
+
+        start = 0
+        while start < base_T:
+            window_vars = self._window_vars(start)
+            for var in window_vars:
+                var.SetInteger(True)
+            last = start + self.window >= base_T
+            obj = self._solve('relax-and-fix', start)
+            if obj is None:
+                return None
+            if last:
+                break
+            self._fix([var for b in range(start, start + self.step) for var in self.blocks[b]])
+            start += self.step
+
+        self._accept(obj)
+        return obj
+
+    def _accept(self, obj):
+        self.objective = obj
+        self.solution = [var.solution_value() for var in self.solver.variables()]
+
+    def fix_and_optimize(self):
+        """Pha cải thiện trên nghiệm hiện có. Trả về objective tốt nhất."""
+        variables = self.solver.variables()
+        self._fix(self.binaries, self.solution)
+        for _ in range(self.passes):
+            improved = False
+            for start in range(0, self.data.base_T, self.step):
+                if self.time_budget and time.perf_counter() - self.started > self.time_budget:
+                    return self.objective
+                window_vars = self._window_vars(start) + self.global_binaries
+                for var in window_vars:
+                    var.SetBounds(0, 1)
+                self.solver.SetHint(variables, self.solution)
+                obj = self._solve('fix-and-optimize', start)
+                if obj is not None and obj < self.objective - 1e-6 * max(1.0, abs(self.objective)):
+                    self._accept(obj)
+                    improved = True
+                self._fix(window_vars, self.solution)
+            if not improved:
+                break
+        return self.objective
+
+    def run(self):
+        self.started = time.perf_counter()
+        self.lp_bound()
+        if self.relax_and_fix() is not None:
+            self.fix_and_optimize()
+        return self.objective
+
+    @property
+    def gap(self):
+        if self.objective is None or self.bound is None:
+            return None
+        return (self.objective - self.bound) / max(1.0, abs(self.objective))
+
+    def phase_time(self, phase):
+        return sum(h['time'] for h in self.history if h['phase'] == phase)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--stages', type=int, default=4, choices=[3, 4, 5])
+    parser.add_argument('--m', type=int, default=4)
+    parser.add_argument('--mode', default='Pm', choices=['Pm', 'Pmd'])
+    parser.add_argument('--cycles', type=int, default=20, help='số lần lặp mẫu 5 kỳ gốc')
+    parser.add_argument('--window', type=int, default=3, help='kỳ gốc')
+    parser.add_argument('--step', type=int, default=2, help='số kỳ gốc cố định mỗi bước')
+    parser.add_argument('--passes', type=int, default=2, help='số lượt fix-and-optimize tối đa')
+    parser.add_argument('--window-time-limit', type=float, default=30, help='giây cho mỗi lần giải con')
+    parser.add_argument('--time-budget', type=float, default=None, help='giây cho cả heuristic')
+    parser.add_argument('--monolithic', action='store_true', help='giải trực tiếp để so sánh')
+    parser.add_argument('--time-limit', type=float, default=600, help='giây cho lời giải monolithic')
+    args = parser.parse_args(argv)
+
+    data = repeat_horizon(SupplyChainData(m=args.m, mode=args.mode, num_stages=args.stages), args.cycles)
+    print(f"{args.stages}-stage, m={args.m}, {args.mode}: {data.base_T} kỳ gốc, T={data.T} kỳ con")
+
+    rf = RelaxAndFix(data, args.window, args.step, args.passes, args.window_time_limit, args.time_budget)
+    print(f"{len(rf.binaries)} binaries, {rf.solver.NumVariables()} biến, {rf.solver.NumConstraints()} rows")
+    rf.run()
+    first = next((h['objective'] for h in reversed(rf.history) if h['phase'] == 'relax-and-fix'), None)
+    fmt = lambda v: f"{v:,.1f}" if v is not None else '-'
+    print(f"LP bound          : {fmt(rf.bound)} ({rf.phase_time('lp'):.2f}s)")
+    print(f"Relax-and-fix     : {fmt(first)} ({rf.phase_time('relax-and-fix'):.2f}s)")
+    print(f"Fix-and-optimize  : {fmt(rf.objective)} ({rf.phase_time('fix-and-optimize'):.2f}s)")
+    if rf.gap is not None:
+        print(f"Gap vs LP bound   : {100 * rf.gap:.2f}%")
+
+    if args.monolithic:
+        mono = solve_monolithic(data, args.time_limit)
+        label = 'optimal' if mono['status'] == pywraplp.Solver.OPTIMAL else 'time limit'
+        print(f"Monolithic        : {fmt(mono['objective'])} ({label}, {mono['solve_time']:.2f}s, "
+              f"bound {fmt(mono['bound'])})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,206 @@
+"""
+Cache kết quả giải (content-addressed) dùng chung cho run_sensitivity.py và plot_sensitivity.py.
+
+Mỗi instance được định danh bằng SHA-256 của:
+  - toàn bộ tham số trong SupplyChainData (vars(data), dạng JSON chuẩn hóa),
+  - cấu hình solver (backend, ...),
+  - mã nguồn của module model và mọi module trong repo mà nó import, đệ quy (stage_graph,
+    lot_sizing, data_loader, solver_backends, model 5Stage/ mà model thư mục khác kế thừa...):
+    đổi công thức ở bất kỳ đâu => cache tự động mất hiệu lực.
+
+Mỗi bản ghi lưu: objective, get_cost_breakdown(), get_purchasing_plan(),
+giá trị của mọi biến và thời gian giải. Chỉ lưu các lần giải OPTIMAL.
+"""
+
+import hashlib
+import inspect
+import json
+import os
+import sys
+import time
+
+from ortools.linear_solver import pywraplp
+
+from solver_backends import solution_values
+
+CACHE_DIR = os.environ.get(
+    'SCM_CACHE_DIR',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), '.scm_cache')
+)
+CACHE_ENABLED = os.environ.get('SCM_NO_CACHE', '') == ''
+# Module có file nằm dưới thư mục này là mã của project (tính vào hash của model)
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _canonical(obj):
+    """Chuyển obj về dạng JSON-able, thứ tự ổn định (dict key tuple -> str)."""
+    if isinstance(obj, dict):
+        return {str(k): _canonical(v) for k, v in sorted(obj.items(), key=lambda kv: str(kv[0]))}
+    if isinstance(obj, (list, tuple)):
+        return [_canonical(v) for v in obj]
+    if hasattr(obj, 'tolist'):  # numpy array / numpy scalar
+        return _canonical(obj.tolist())
+    if isinstance(obj, float) and obj.is_integer():
+        return int(obj)
+    return obj
+
+
+def _local_modules(model_cls):
+    """
+    Module của model_cls (cả MRO) cùng mọi module của repo mà chúng import, đệ quy
+    (stage_graph, lot_sizing, data_loader, solver_backends, ...): {đường dẫn tương đối: module}.
+    Module ngoài REPO_DIR (numpy, ortools, thư viện chuẩn) bỏ qua.
+    """
+    found = {}
+    stack = [inspect.getmodule(cls) for cls in model_cls.__mro__[:-1]]
+    while stack:
+        module = stack.pop()
+        path = os.path.abspath(getattr(module, '__file__', None) or os.sep)
+        if not path.startswith(REPO_DIR + os.sep):
+            continue
+        rel = os.path.relpath(path, REPO_DIR)
+        if rel in found:
+            continue
+        found[rel] = module
+        for value in vars(module).values():
+            if inspect.ismodule(value):
+                stack.append(value)
+            elif isinstance(getattr(value, '__module__', None), str):
+                stack.append(sys.modules.get(value.__module__))
+    return found
+
+
+def _model_source_hash(model_cls):
+    """SHA-256 mã nguồn mọi module local của model (sửa 1 module bất kỳ => key mới)."""
+    modules = _local_modules(model_cls)
+    if not modules:
+        return hashlib.sha256(model_cls.__qualname__.encode('utf-8')).hexdigest()
+    digest = hashlib.sha256()
+    for rel, module in sorted(modules.items()):
+        try:
+            src = inspect.getsource(module)
+        except (OSError, TypeError):
+            src = module.__name__
+        digest.update(f'{rel}\n{src}'.encode('utf-8'))
+    return digest.hexdigest()
+
+
+def instance_key(data, model_cls, solver_settings=None):
+    """Hash chuẩn của (data, model, solver settings)."""
+    payload = {
+        'data': _canonical(vars(data)),
+        'solver': _canonical(solver_settings or {'backend': 'SCIP'}),
+        'model': _model_source_hash(model_cls),
+    }
+    blob = json.dumps(payload, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(blob.encode('utf-8')).hexdigest()
+
+
+class CachedSolution:
+    """
+    Kết quả đã giải, đọc lại từ cache. Có cùng API đọc kết quả với SupplyChainModel
+    (get_objective_value, get_cost_breakdown, get_purchasing_plan) để run/plot
+    dùng thay model thật mà không phải giải lại.
+    """
+
+    def __init__(self, data, record):
+        self.data = data
+        self.record = record
+        self.cpu_time = record.get('cpu_time', 0.0)
+
+    def get_objective_value(self):
+        return self.record['objective']
+
+    def get_cost_breakdown(self):
+        return dict(self.record['cost_breakdown'])
+
+    def get_purchasing_plan(self):
+        return {int(t): list(vals) for t, vals in self.record['purchasing_plan'].items()}
+
+    def get_variable_values(self):
+        return dict(self.record['variables'])
+
+    def value(self, name):
+        return self.record['variables'][name]
+
+
+def solution_record(model, duration):
+    """Bản ghi JSON-able (picklable) của một model đã giải xong."""
+    return {
+        'objective': model.solver.Objective().Value(),
+        'cost_breakdown': model.get_cost_breakdown(),
+        'purchasing_plan': {str(t): vals for t, vals in model.get_purchasing_plan().items()},
+        'variables': dict(zip((v.name() for v in model.solver.variables()), solution_values(model.solver).tolist())),
+        'cpu_time': getattr(model, 'cpu_time', duration),
+        'duration': duration,
+    }
+
+
+def load(key, cache_dir=None):
+    path = os.path.join(cache_dir or CACHE_DIR, f'{key}.json')
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None  # file hỏng -> coi như miss, sẽ giải lại và ghi đè
+
+
+def store(key, record, cache_dir=None):
+    cache_dir = cache_dir or CACHE_DIR
+    os.makedirs(cache_dir, exist_ok=True)
+    path = os.path.join(cache_dir, f'{key}.json')
+    tmp = f'{path}.{os.getpid()}.tmp'
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(record, f)
+    os.replace(tmp, path)  # ghi atomic, an toàn khi nhiều process cùng ghi
+
+
+def solve_cached(data, model_cls, use_cache=None, cache_dir=None, solver_settings=None, hint=None,
+                 cutoff=None):
+    """
+    Giải instance `data` bằng `model_cls`, dùng lại kết quả trong cache nếu có.
+    solver_settings = {'backend': ..., tham số của set_parameters()} (threads, rel_gap, seed, ...)
+    được áp lên model (backend qua model_cls(data, backend=...)) và nằm trong cache key.
+    hint = {tên biến: giá trị} là MIP start, cutoff là cận trên ban đầu cho objective.
+    Cả hai không ảnh hưởng cache key, vì chỉ thay đổi tốc độ tìm nghiệm chứ không đổi
+    bài toán; nếu cutoff quá chặt (INFEASIBLE) thì giải lại không có cutoff, còn nghiệm
+    FEASIBLE do hết time limit được trả về như bình thường (model.status).
+    Trả về: (model_or_cached, objective_value, duration, from_cache)
+    """
+    if use_cache is None:
+        use_cache = CACHE_ENABLED
+    key = instance_key(data, model_cls, solver_settings) if use_cache else None
+
+    if use_cache:
+        record = load(key, cache_dir)
+        if record is not None:
+            return CachedSolution(data, record), record['objective'], record['duration'], True
+
+    settings = dict(solver_settings or {})
+    model = model_cls(data, backend=settings.pop('backend', 'SCIP'))
+    start_time = time.time()
+    model.create_variables()
+    model.add_constraints()
+    model.set_objective()
+    if settings:
+        model.set_parameters(**settings)
+    if hint:
+        model.set_hint(hint)
+    if cutoff is not None:
+        model.set_objective_cutoff(cutoff)
+    success = model.solve()
+    if cutoff is not None and model.status == pywraplp.Solver.INFEASIBLE:
+        # Chỉ cutoff quá chặt mới làm bài vô nghiệm; FEASIBLE (hết time limit) giữ incumbent
+        model.set_objective_cutoff(None)
+        success = model.solve()
+    duration = time.time() - start_time
+
+    if not success:
+        return model, float('inf'), duration, False
+
+    obj_val = model.solver.Objective().Value()
+    if use_cache:
+        store(key, solution_record(model, duration), cache_dir)
+    return model, obj_val, duration, False
@@ -0,0 +1,327 @@
+"""
+Rolling horizon cho horizon dài: thay vì giải 1 MILP cho cả T kỳ con, giải lần lượt các
+cửa sổ W kỳ gốc, cố định (freeze) F kỳ gốc đầu của mỗi cửa sổ rồi dịch cửa sổ đi F kỳ.
+
+Giữa hai cửa sổ, trạng thái được mang sang làm dữ liệu đầu kỳ của cửa sổ sau:
+- tồn kho cuối phần đã freeze của mỗi stage -> initial_inventory,
+- lượng đã mua từ mỗi supplier -> trừ vào cumulative capacity và cộng vào lượng tính bậc
+  giá (SupplyChainModel.set_prior_purchases),
+- hàng đang đi đường trên leg có lead time -> receipts (SupplyChainModel.add_receipts).
+Cửa sổ và freeze tính theo kỳ gốc nên nhóm setup sản xuất (m kỳ con) không bị cắt.
+
+Phần sau cửa sổ (tail): mỗi cửa sổ mang thêm L kỳ gốc look-ahead (mặc định L = W) trong đó
+biến nguyên được nới thành liên tục (LP). Phần sau look-ahead lấy từ LP relaxation cả
+horizon (giải 1 lần trước vòng lặp): tồn kho cuối look-ahead phải >= tồn kho LP tại kỳ đó
+(set_ending_inventory_target), và lượng mua LP sau look-ahead được tính vào bậc giá
+(set_prior_purchases) - chiết khấu theo sản lượng cả horizon, thiếu phần này cửa sổ chọn
+supplier như thể chỉ còn vài kỳ (4-stage T=100, L=3: +4.6% -> +1.4% so với tail đầy đủ).
+Capacity, lead time và cumulative capacity đều là ràng buộc liên tục nên tail LP + tồn kho
+mục tiêu giữ được khả thi của phần sau: vd. 4-stage có capacity sản xuất 270 < nhu cầu 300
+và lead time 1 kỳ, cửa sổ cắt cụt không thấy nhu cầu ngay sau cửa sổ nên không sản xuất
+trước và cửa sổ kế tiếp vô nghiệm. Mỗi cửa sổ có W + L kỳ gốc nên tổng công việc tuyến tính
+theo horizon. lookahead=None: tail là toàn bộ phần còn lại của horizon (mỗi cửa sổ ~T kỳ,
+tổng ~T^2/F - chỉ để so sánh; relax-and-fix trên cùng 1 model đầy đủ là relax_and_fix.py).
+tail=False: cửa sổ cắt cụt đúng W kỳ, bỏ ràng buộc tồn kho cuối (free_ending_inventory);
+nhanh hơn nhưng có thể thất bại như trên.
+
+Kế hoạch ghép từ các phần freeze được đánh giá lại trên model đầy đủ (cố định các biến
+quyết định, giải phần còn lại) để có chi phí thật và kiểm tra khả thi cả horizon; so với
+lời giải monolithic khi cả hai cùng giải xong.
+
+Horizon dài được tạo bằng repeat_horizon(): lặp lại mẫu 5 kỳ gốc của bài gốc.
+
+Chạy:
+    python rolling_horizon.py --cycles 4 --m 2 --window 3 5 --freeze 1 2
+    python rolling_horizon.py --cycles 4 --m 2 --window 3 --freeze 2 --lookahead 1 3 --full-tail
+    python rolling_horizon.py --cycles 10 --m 4 --window 4 --freeze 2 --no-monolithic
+    python rolling_horizon.py --cycles 1 --m 1 --window 2 3 --freeze 1 --no-tail
+"""
+
+import argparse
+import contextlib
+import copy
+import io
+import itertools
+import time
+
+import numpy as np
+from ortools.linear_solver import pywraplp
+
+from data_loader import SupplyChainData
+from dynamic_scm_milp import SupplyChainModel
+
+# Dữ liệu theo kỳ con của SupplyChainData (cắt / lặp theo cửa sổ)
+PERIOD_ARRAYS = ('demand', 'holding_cost', 'prod_fixed_cost', 'prod_var_cost', 'prod_capacity',
+                 'trans_capacity', 'prod2_fixed_cost', 'prod2_var_cost', 'prod2_capacity')
+
+# (thuộc tính của SupplyChainModel, tiền tố tên biến, vị trí chỉ số kỳ con trong key)
+PERIOD_VARS = [('q', 'q', 1), ('z', 'z', 1), ('x', 'x', 0), ('w_prod', 'w_prod', 0),
+               ('x2', 'x2', 0), ('w_prod2', 'w_prod2', 0), ('i', 'i', 1), ('y', 'y', 1),
+               ('w_trans', 'w_trans', 1), ('f_freight', 'f', 1), ('y_freight', 'y_fr', 1)]
+# Biến theo kỳ gốc
+GROUP_VARS = [('w_prod_group', 'w_prod_group'), ('w_prod2_group', 'w_prod2_group')]
+
+OK_STATUS = (pywraplp.Solver.OPTIMAL, pywraplp.Solver.FEASIBLE)
+
+
+def repeat_horizon(data, cycles):
+    """
+    Horizon dài cycles x base_T kỳ gốc: lặp lại mọi mảng theo kỳ; cumulative capacity
+    của supplier cộng dồn theo chu kỳ, max_q của bậc giá nhân cycles (chiết khấu theo sản
+    lượng cả horizon).
+    """
+    long = copy.deepcopy(data)
+    for name in PERIOD_ARRAYS:
+        setattr(long, name, np.tile(np.asarray(getattr(data, name)), cycles))
+    for supplier in long.suppliers:
+        cap = np.asarray(supplier['cumulative_capacity'], dtype=float)
+        supplier['cumulative_capacity'] = np.concatenate([cap + c * cap[-1] for c in range(cycles)])
+        for interval in supplier['price_intervals']:
+            interval['max_q'] *= cycles
+    long.refresh_price_breaks()
+    long.base_T = data.base_T * cycles
+    long.T = data.T * cycles
+    return long
+
+
+def window_data(data, start, length, inventory, prior):
+    """Dữ liệu cửa sổ [start, start + length) kỳ gốc với trạng thái đầu kỳ đã mang sang."""
+    m = data.m
+    lo, hi = start * m, (start + length) * m
+    win = copy.deepcopy(data)
+    for name in PERIOD_ARRAYS:
+        setattr(win, name, np.asarray(getattr(data, name))[lo:hi])
+    for supplier, qty in zip(win.suppliers, prior):
+        cap = np.asarray(supplier['cumulative_capacity'], dtype=float)[lo:hi]
+        supplier['cumulative_capacity'] = np.maximum(cap - qty, 0.0)
+    win.base_T, win.T = length, hi - lo
+    win.initial_inventory = dict(inventory)
+    return win
+
+
+def _key(key):
+    return key if isinstance(key, tuple) else (key,)
+
+
+def _values(model, t_end, b_end, t_offset, b_offset):
+    """{tên biến trên horizon đầy đủ: giá trị} của các kỳ con < t_end và kỳ gốc < b_end."""
+    values = {}
+    for attr, prefix, pos in PERIOD_VARS:
+        for key, var in getattr(model, attr).items():
+            key = _key(key)
+            if key[pos] < t_end:
+                key = key[:pos] + (key[pos] + t_offset,) + key[pos + 1:]
+                values['_'.join([prefix] + [str(k) for k in key])] = var.solution_value()
+    for attr, prefix in GROUP_VARS:
+        for b, var in getattr(model, attr).items():
+            if b < b_end:
+                values[f'{prefix}_{b + b_offset}'] = var.solution_value()
+    return values
+
+
+def _build(data, time_limit=None):
+    model = SupplyChainModel(data)
+    with contextlib.redirect_stdout(io.StringIO()):
+        model.create_variables()
+        model.add_constraints()
+        model.set_objective()
+    if time_limit:
+        model.solver.SetTimeLimit(int(time_limit * 1000))
+    return model
+
+
+def relax_after(model, t_end, b_end):
+    """Nới biến nguyên của các kỳ con >= t_end và kỳ gốc >= b_end thành liên tục."""
+    for attr, _, pos in PERIOD_VARS:
+        for key, var in getattr(model, attr).items():
+            if _key(key)[pos] >= t_end and var.integer():
+                var.SetInteger(False)
+    for attr, _ in GROUP_VARS:
+        for b, var in getattr(model, attr).items():
+            if b >= b_end:
+                var.SetInteger(False)
+
+
+def lp_relaxation(data):
+    """
+    LP relaxation cả horizon: (tồn kho {(stage, kỳ con): giá trị}, lượng mua [supplier, kỳ con])
+    - tồn kho mục tiêu và lượng mua sau look-ahead của tail; None nếu LP không giải được.
+    """
+    model = _build(data)
+    relax_after(model, 0, 0)
+    with contextlib.redirect_stdout(io.StringIO()):
+        status = model.solver.Solve()
+    if status != pywraplp.Solver.OPTIMAL:
+        return None
+    inventory = {key: var.solution_value() for key, var in model.i.items()}
+    purchases = np.array([[model.q[j, t].solution_value() for t in range(data.T)]
+                          for j in range(len(data.suppliers))])
+    return inventory, purchases
+
+
+def rolling_horizon(data, window, freeze, time_limit=None, tail=True, lookahead=None):
+    """
+    Giải `data` bằng rolling horizon: cửa sổ `window` kỳ gốc, freeze `freeze` kỳ gốc
+    (1 <= freeze <= window). time_limit: giây cho mỗi cửa sổ (chấp nhận nghiệm FEASIBLE).
+    tail: thêm phần sau cửa sổ dưới dạng LP - `lookahead` kỳ gốc kèm tồn kho mục tiêu từ
+    LP relaxation cả horizon, hoặc toàn bộ phần còn lại nếu lookahead=None (xem docstring module).
+    Trả về dict: plan {tên biến: giá trị}, windows (thống kê từng cửa sổ), solve_time,
+    status ('ok' hoặc 'failed').
+    """
+    if not 1 <= freeze <= window:
+        raise ValueError("Cần 1 <= freeze <= window")
+    if lookahead is not None and lookahead < 0:
+        raise ValueError("Cần lookahead >= 0")
+    relaxed = lp_relaxation(data) if tail and lookahead is not None else None
+    m, K, J = data.m, data.K, len(data.suppliers)
+    lead_legs = [(k, lt) for (k, _), lt in data.lead_times.items() if lt > 0]
+
+    inventory = dict(data.initial_inventory)
+    prior = np.zeros(J)
+    pending = {}    # hàng đang đi đường: {(stage, kỳ con tuyệt đối): qty}
+    plan, windows = {}, []
+    start, total_time = 0, 0.0
+
+    while start < data.base_T:
+        length = min(window, data.base_T - start)
+        last = start + length >= data.base_T
+        keep = length if last else freeze
+        span = length
+        if tail:
+            span = data.base_T - start if lookahead is None else min(length + lookahead, data.base_T - start)
+        t0, t_span, t_keep = start * m, span * m, keep * m
+
+        t_start = time.perf_counter()
+        model = _build(window_data(data, start, span, inventory, prior), time_limit)
+        model.add_receipts({(k, t - t0): qty for (k, t), qty in pending.items() if t0 <= t < t0 + t_span})
+        if tail:
+            relax_after(model, length * m, length)
+        if start + span < data.base_T and relaxed is not None:
+            # Phần sau look-ahead: tồn kho mục tiêu và lượng mua của LP (tính vào bậc giá)
+            target, purchases = relaxed
+            model.set_ending_inventory_target({k: target[k, t0 + t_span - 1] for k in range(1, K + 1)})
+            model.set_prior_purchases(prior + purchases[:, t0 + t_span:].sum(axis=1))
+        else:
+            model.set_prior_purchases(prior)
+            if start + span < data.base_T:
+                model.free_ending_inventory()
+        with contextlib.redirect_stdout(io.StringIO()):
+            status = model.solver.Solve()
+        elapsed = time.perf_counter() - t_start
+        total_time += elapsed
+        windows.append({'start': start, 'length': length, 'freeze': keep, 'time': elapsed,
+                        'status': status, 'objective': model.get_objective_value() if status in OK_STATUS else None})
+        if status not in OK_STATUS:
+            return {'plan': plan, 'windows': windows, 'solve_time': total_time, 'status': 'failed'}
+
+        # Mang trạng thái sang cửa sổ sau
+        plan.update(_values(model, t_keep, keep, t0, start))
+        inventory = {k: model.i[k, t_keep - 1].solution_value() for k in range(1, K + 1)}
+        for j in range(J):
+            prior[j] += sum(model.q[j, t].solution_value() for t in range(t_keep))
+        for k, lt in lead_legs:
+            for t in range(t_keep):
+                if t + lt >= t_keep:
+                    arrival = (k + 1, t0 + t + lt)
+                    pending[arrival] = pending.get(arrival, 0.0) + model.y[k, t].solution_value()
+        start += keep
+
+    return {'plan': plan, 'windows': windows, 'solve_time': total_time, 'status': 'ok'}
+
+
+def evaluate_plan(data, plan, tol=1e-5):
+    """
+    Chi phí thật của kế hoạch trên model đầy đủ: cố định các quyết định có trong plan (biến
+    nguyên làm tròn; q, x, x2, y cho phép sai số tol), giải phần còn lại (bậc giá, tồn kho,
+    phân bổ vào bậc cước). Trả về (objective, cost breakdown) hoặc (None, None) nếu plan
+    không khả thi.
+    """
+    model = _build(data)
+    for var in model.solver.variables():
+        value = plan.get(var.name())
+        if value is None or var.name().startswith(('i_', 'y_fr_')):
+            continue
+        if var.integer():
+            var.SetBounds(round(value), round(value))
+        else:
+            var.SetBounds(max(var.lb(), value - tol), value + tol)
+    with contextlib.redirect_stdout(io.StringIO()):
+        if not model.solve():
+            return None, None
+    return model.get_objective_value(), model.get_cost_breakdown()
+
+
+def solve_monolithic(data, time_limit=None):
+    """Giải cả horizon 1 lần. Trả về dict objective, bound, solve_time, status."""
+    start = time.perf_counter()
+    model = _build(data, time_limit)
+    with contextlib.redirect_stdout(io.StringIO()):
+        status = model.solver.Solve()
+    result = {'solve_time': time.perf_counter() - start, 'status': status, 'objective': None, 'bound': None}
+    if status in OK_STATUS:
+        result['objective'] = model.get_objective_value()
+        result['bound'] = model.solver.Objective().BestBound()
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--stages', type=int, default=4, choices=[3, 4, 5])
+    parser.add_argument('--m', type=int, default=2)
+    parser.add_argument('--mode', default='Pm', choices=['Pm', 'Pmd'])
+    parser.add_argument('--cycles', type=int, default=4, help='số lần lặp mẫu 5 kỳ gốc')
+    parser.add_argument('--window', type=int, nargs='+', default=[3, 5], help='kỳ gốc')
+    parser.add_argument('--freeze', type=int, nargs='+', default=[1, 2], help='kỳ gốc')
+    parser.add_argument('--window-time-limit', type=float, default=None, help='giây cho mỗi cửa sổ')
+    parser.add_argument('--time-limit', type=float, default=600, help='giây cho lời giải monolithic')
+    parser.add_argument('--no-monolithic', action='store_true')
+    parser.add_argument('--no-tail', action='store_true', help='cửa sổ cắt cụt, không có tail LP')
+    parser.add_argument('--lookahead', type=int, nargs='+', default=None,
+                        help='kỳ gốc của tail LP sau cửa sổ (mặc định = window)')
+    parser.add_argument('--full-tail', action='store_true', help='thêm cấu hình tail = toàn bộ phần còn lại')
+    args = parser.parse_args(argv)
+
+    data = repeat_horizon(SupplyChainData(m=args.m, mode=args.mode, num_stages=args.stages), args.cycles)
+    print(f"{args.stages}-stage, m={args.m}, {args.mode}: {data.base_T} kỳ gốc, T={data.T} kỳ con")
+
+    mono = None
+    if not args.no_monolithic:
+        mono = solve_monolithic(data, args.time_limit)
+        exact = mono['status'] == pywraplp.Solver.OPTIMAL
+        label = 'optimal' if exact else ('feasible' if mono['objective'] is not None else 'no solution')
+        obj = f"{mono['objective']:,.1f}" if mono['objective'] is not None else '-'
+        print(f"Monolithic: {obj} ({label}, {mono['solve_time']:.2f}s)")
+
+    print(f"{'W':>3} | {'F':>3} | {'L':>4} | {'windows':>7} | {'time(s)':>8} | {'cost':>12} | {'gap vs mono':>11}")
+    print("-" * 67)
+    for window, freeze in itertools.product(args.window, args.freeze):
+        if freeze > window:
+            continue
+        lookaheads = args.lookahead or [window]
+        if args.no_tail:
+            lookaheads = [0]
+        elif args.full_tail:
+            lookaheads = lookaheads + [None]
+        for lookahead in lookaheads:
+            run_config(data, window, freeze, lookahead, args, mono)
+
+
+def run_config(data, window, freeze, lookahead, args, mono):
+    result = rolling_horizon(data, window, freeze, args.window_time_limit, tail=not args.no_tail,
+                             lookahead=lookahead)
+    cost = None
+    if result['status'] == 'ok':
+        cost, _ = evaluate_plan(data, result['plan'])
+        cost_str = f"{cost:12,.1f}" if cost is not None else f"{'infeasible':>12}"
+    else:
+        cost_str = f"{'failed@' + str(result['windows'][-1]['start']):>12}"
+    gap = '-'
+    if cost is not None and mono and mono['objective'] is not None:
+        gap = f"{100 * (cost - mono['objective']) / mono['objective']:.2f}%"
+    label = 'all' if lookahead is None else str(lookahead)
+    print(f"{window:>3} | {freeze:>3} | {label:>4} | {len(result['windows']):>7} | {result['solve_time']:8.2f} | "
+          f"{cost_str} | {gap:>11}", flush=True)
+
+
+if __name__ == "__main__":
+    main()
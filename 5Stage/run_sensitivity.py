@@ -1,33 +1,74 @@
-import time
-from data_loader import SupplyChainData
-from dynamic_scm_milp import SupplyChainModel
+import argparse
+
+from solver_backends import add_solver_arguments, solver_params_from_args
+from sweep import run_pm_pmd_grid
 
 
 BASE_PERIOD_DAYS = 12
 
-def solve_one(m, mode, num_stages=4):
+
+def format_cost(rec):
+    """Objective của 1 record sweep: '-' nếu không có nghiệm, '*' nếu chỉ là incumbent (time limit)."""
+    if rec['solution'] is None:
+        return '-'
+    return f"{rec['obj']:,.0f}" + ('' if rec['optimal'] else '*')
+
+
+def missing_solution(res):
+    """True (và in ghi chú) nếu Pm hoặc Pmd của m không có nghiệm nào để in breakdown / plan."""
+    missing = [mode for mode in ('pm', 'pmd') if res[f'model_{mode}'] is None]
+    if missing:
+        print(f"\nm = {res['m']}: bỏ qua, {' và '.join(mode.capitalize() for mode in missing)} không có nghiệm")
+    return bool(missing)
+
+
+def incumbent_note(res):
+    not_optimal = [mode for mode in ('Pm', 'Pmd') if not res[f'optimal_{mode.lower()}']]
+    return f" | {'/'.join(not_optimal)}: incumbent, chưa tối ưu" if not_optimal else ''
+
+def solve_grid(m_values, num_stages, max_workers=None, warm_start='base', seed_pmd=False, solver_params=None):
     """
-    Chạy 1 lần mô hình với hệ số m, mode ('Pm' hoặc 'Pmd'), và số stages.
-    Trả về: (data, model, objective_value, cpu_time)
+    Giải song song lưới m x {Pm, Pmd} (xem sweep.py) và in từng dòng bảng
+    (Table 8 / Table 13) theo thứ tự m ngay khi cặp Pm/Pmd của m đó giải xong.
+    warm_start='base' (mặc định) / 'previous': warm start m > 1 từ nghiệm m thô hơn (xem
+    sweep.py); None: giải độc lập.
+    seed_pmd=True: Pmd được seed bằng nghiệm Pm cùng m (MIP start + cutoff).
+    solver_params: tham số solver cho mọi instance (xem SupplyChainModel.set_parameters).
+    Trả về list results (mỗi phần tử 1 dict theo m) như vòng lặp tuần tự cũ. Cost kèm '*' là
+    incumbent chưa chứng minh tối ưu (vd. --time-limit), '-' là không có nghiệm.
     """
-    data = SupplyChainData(m=m, mode=mode, num_stages=num_stages)
-    model = SupplyChainModel(data)
+    results = []
 
-    start_time = time.time()
-    model.create_variables()
-    model.add_constraints()
-    model.set_objective()
-    success = model.solve()
-    end_time = time.time()
+    def print_row(m, rec_pm, rec_pmd):
+        T = rec_pm['T']
+        len_per = BASE_PERIOD_DAYS / m
+        obj_pm, cpu_pm = rec_pm['obj'], rec_pm['cpu']
+        obj_pmd, cpu_pmd = rec_pmd['obj'], rec_pmd['cpu']
 
-    duration = end_time - start_time
-    
-    if success:
-        obj_val = model.solver.Objective().Value()
-    else:
-        obj_val = float('inf')
+        print(
+            f"{m:<3} | {len_per:<10.2f} | {T:<7} | "
+            f"{format_cost(rec_pm):>12} | {cpu_pm:>10.4f} | "
+            f"{format_cost(rec_pmd):>12} | {cpu_pmd:>10.4f}",
+            flush=True
+        )
 
-    return data, model, obj_val, duration
+        results.append({
+            'm': m,
+            'T': T,
+            'len_per': len_per,
+            'model_pm': rec_pm['solution'],
+            'model_pmd': rec_pmd['solution'],
+            'obj_pm': obj_pm,
+            'obj_pmd': obj_pmd,
+            'optimal_pm': rec_pm['optimal'],
+            'optimal_pmd': rec_pmd['optimal'],
+            'cpu_pm': cpu_pm,
+            'cpu_pmd': cpu_pmd
+        })
+
+    run_pm_pmd_grid(m_values, num_stages, on_row=print_row, max_workers=max_workers,
+                    warm_start=warm_start, seed_pmd=seed_pmd, solver_params=solver_params)
+    return results
 
 def print_purchasing_plan_comparison(model_pm, model_pmd, T, m):
     """
@@ -52,7 +93,7 @@ def print_purchasing_plan_comparison(model_pm, model_pmd, T, m):
               f"{vals_pmd[0]:<8.0f} {vals_pmd[1]:<8.0f} {vals_pmd[2]:<6.0f} {vals_pmd[3]:<6.0f}")
     print("-" * 80)
 
-def run_analysis_4stage():
+def run_analysis_4stage(max_workers=None, warm_start='base', seed_pmd=False, solver_params=None):
     """
     Chạy sensitivity analysis cho 4-stage model (giống code gốc)
     """
@@ -73,36 +114,8 @@ def run_analysis_4stage():
     )
     print("-" * 110)
 
-    results = []
-
-    for m in m_values:
-        # 1) Chạy model với Pm (demand dồn cuối kỳ con)
-        data_pm, model_pm, obj_pm, cpu_pm = solve_one(m, mode='Pm', num_stages=4)
-
-        # 2) Chạy model với Pmd (demand chia đều các kỳ con)
-        data_pmd, model_pmd, obj_pmd, cpu_pmd = solve_one(m, mode='Pmd', num_stages=4)
-
-        T = data_pm.T
-        len_per = BASE_PERIOD_DAYS / m
-
-        # In 1 dòng giống cấu trúc Table 8
-        print(
-            f"{m:<3} | {len_per:<10.2f} | {T:<7} | "
-            f"{obj_pm:>12,.0f} | {cpu_pm:>10.4f} | "
-            f"{obj_pmd:>12,.0f} | {cpu_pmd:>10.4f}"
-        )
-
-        results.append({
-            'm': m,
-            'T': T,
-            'len_per': len_per,
-            'model_pm': model_pm,
-            'model_pmd': model_pmd,
-            'obj_pm': obj_pm,
-            'obj_pmd': obj_pmd,
-            'cpu_pm': cpu_pm,
-            'cpu_pmd': cpu_pmd
-        })
+    results = solve_grid(m_values, num_stages=4, max_workers=max_workers, warm_start=warm_start,
+                         seed_pmd=seed_pmd, solver_params=solver_params)
 
     print("-" * 110)
     print()
@@ -113,6 +126,8 @@ def run_analysis_4stage():
     print("=" * 110)
     
     for res in results:
+        if missing_solution(res):
+            continue
         m = res['m']
         T = res['T']
         model_pm = res['model_pm']
@@ -122,7 +137,7 @@ def run_analysis_4stage():
         breakdown_pmd = model_pmd.get_cost_breakdown()
         
         print(f"\n{'='*60}")
-        print(f"m = {m} | Periods = {T}")
+        print(f"m = {m} | Periods = {T}{incumbent_note(res)}")
         print(f"{'='*60}")
         print(f"{'Cost Component':<20} | {'Pm':>15} | {'Pmd':>15} | {'Diff':>12}")
         print("-" * 60)
@@ -144,6 +159,8 @@ def run_analysis_4stage():
     print("=" * 110)
     
     for res in results:
+        if missing_solution(res):
+            continue
         m = res['m']
         T = res['T']
         model_pm = res['model_pm']
@@ -155,7 +172,7 @@ def run_analysis_4stage():
     print("DONE 4-STAGE ANALYSIS.")
     print("=" * 110)
 
-def run_analysis_5stage():
+def run_analysis_5stage(max_workers=None, warm_start='base', seed_pmd=False, solver_params=None):
     """
     Chạy sensitivity analysis cho 5-stage model (Table 13 trong paper)
     """
@@ -176,35 +193,8 @@ def run_analysis_5stage():
     )
     print("-" * 110)
 
-    results = []
-
-    for m in m_values:
-        # 1) Chạy model với Pm
-        data_pm, model_pm, obj_pm, cpu_pm = solve_one(m, mode='Pm', num_stages=5)
-
-        # 2) Chạy model với Pmd
-        data_pmd, model_pmd, obj_pmd, cpu_pmd = solve_one(m, mode='Pmd', num_stages=5)
-
-        T = data_pm.T
-        len_per = BASE_PERIOD_DAYS / m
-
-        print(
-            f"{m:<3} | {len_per:<10.2f} | {T:<7} | "
-            f"{obj_pm:>12,.0f} | {cpu_pm:>10.4f} | "
-            f"{obj_pmd:>12,.0f} | {cpu_pmd:>10.4f}"
-        )
-
-        results.append({
-            'm': m,
-            'T': T,
-            'len_per': len_per,
-            'model_pm': model_pm,
-            'model_pmd': model_pmd,
-            'obj_pm': obj_pm,
-            'obj_pmd': obj_pmd,
-            'cpu_pm': cpu_pm,
-            'cpu_pmd': cpu_pmd
-        })
+    results = solve_grid(m_values, num_stages=5, max_workers=max_workers, warm_start=warm_start,
+                         seed_pmd=seed_pmd, solver_params=solver_params)
 
     print("-" * 110)
     print()
@@ -215,6 +205,8 @@ def run_analysis_5stage():
     print("=" * 110)
     
     for res in results:
+        if missing_solution(res):
+            continue
         m = res['m']
         T = res['T']
         model_pm = res['model_pm']
@@ -224,7 +216,7 @@ def run_analysis_5stage():
         breakdown_pmd = model_pmd.get_cost_breakdown()
         
         print(f"\n{'='*70}")
-        print(f"m = {m} | Periods = {T} | 5-STAGE (2 production sites)")
+        print(f"m = {m} | Periods = {T} | 5-STAGE (2 production sites){incumbent_note(res)}")
         print(f"{'='*70}")
         print(f"{'Cost Component':<20} | {'Pm':>15} | {'Pmd':>15} | {'Diff':>12}")
         print("-" * 70)
@@ -248,6 +240,16 @@ def run_analysis_5stage():
     print("=" * 110)
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--warm-start', default='base', choices=['base', 'previous', 'none'],
+                        help='MIP start cho m > 1 lift từ nghiệm m thô hơn (none: giải độc lập)')
+    parser.add_argument('--seed-pmd', action='store_true', help='seed Pmd bằng nghiệm Pm cùng m')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='số process giải song song (mặc định = số core, 1 = tuần tự)')
+    add_solver_arguments(parser)
+    args = parser.parse_args()
+    options = dict(max_workers=args.workers, warm_start=None if args.warm_start == 'none' else args.warm_start, seed_pmd=args.seed_pmd,
+                   solver_params=solver_params_from_args(args) or None)
     # Chạy cả 4-stage và 5-stage
-    run_analysis_4stage()
-    run_analysis_5stage()
\ No newline at end of file
+    run_analysis_4stage(**options)
+    run_analysis_5stage(**options)
\ No newline at end of file
@@ -0,0 +1,115 @@
+"""
+Đọc log của SCIP khi giải qua pywraplp.
+
+SCIP ghi log thẳng ra file descriptor 1 (stdout mức C), không đi qua sys.stdout
+của Python, nên phải chuyển hướng ở mức fd để bắt được log.
+"""
+
+import contextlib
+import os
+import re
+import sys
+import tempfile
+
+
+@contextlib.contextmanager
+def capture_c_stdout():
+    """
+    Chuyển fd 1 sang file tạm trong lúc chạy block. Yield 1 dict; sau khi thoát
+    context, dict['text'] chứa toàn bộ output mức C (log SCIP).
+    """
+    captured = {'text': ''}
+    sys.stdout.flush()
+    saved_fd = os.dup(1)
+    with tempfile.TemporaryFile(mode='w+b') as tmp:
+        os.dup2(tmp.fileno(), 1)
+        try:
+            yield captured
+        finally:
+            sys.stdout.flush()
+            os.dup2(saved_fd, 1)
+            os.close(saved_fd)
+            tmp.seek(0)
+            captured['text'] = tmp.read().decode('utf-8', errors='replace')
+
+
+def _to_float(token):
+    token = token.strip().rstrip('%').strip()
+    if token in ('', '--', '-'):
+        return None
+    if token.lower() in ('inf', 'infinite', '+inf'):
+        return float('inf')
+    try:
+        return float(token)
+    except ValueError:
+        return None
+
+
+def parse_progress_line(line, header=None):
+    """
+    Parse 1 dòng log SCIP theo header bảng tiến trình hiện tại (None nếu chưa gặp).
+    Trả về (header, row): header mới nếu dòng là header, row là dict (xem
+    parse_progress_rows) nếu dòng là 1 dòng tiến trình, ngược lại None.
+    """
+    if '|' not in line:
+        return header, None
+    cells = [c.strip() for c in line.split('|')]
+    if cells[0].endswith('time') and 'node' in cells:
+        return cells, None
+    if header is None or len(cells) != len(header):
+        return header, None
+    m_time = re.search(r'([\d.]+)s$', cells[0])
+    if not m_time:
+        return header, None
+    rec = dict(zip(header, cells))
+    return header, {
+        'heur': cells[0][:m_time.start()].strip(),
+        'time': float(m_time.group(1)),
+        'node': _to_float(rec.get('node', '')),
+        'left': _to_float(rec.get('left', '')),
+        'lp_iter': _to_float(rec.get('LP iter', '')),
+        'dualbound': _to_float(rec.get('dualbound', '')),
+        'primalbound': _to_float(rec.get('primalbound', '')),
+        'gap': _to_float(rec.get('gap', '')),
+    }
+
+
+def parse_progress_rows(text):
+    """
+    Parse bảng tiến trình của SCIP (time | node | left | ... | dualbound | primalbound | gap).
+    Trả về list dict: heur, time, node, left, lp_iter, dualbound, primalbound, gap (gap theo %).
+    heur là ký tự ở đầu dòng ('*' branching, 'r', 'd', 'L', ... heuristic) khi dòng được in vì
+    có incumbent mới, '' nếu là dòng định kỳ.
+    """
+    rows = []
+    header = None
+    for line in text.splitlines():
+        header, row = parse_progress_line(line, header)
+        if row is not None:
+            rows.append(row)
+    return rows
+
+
+def parse_scip_log(text):
+    """
+    Trích số liệu tổng kết từ log SCIP: presolve_time, solving_time, nodes,
+    primal_bound, dual_bound, gap (%), root_lp_bound (LP gốc, trước cut) và
+    root_dual_bound (cận dưới khi kết thúc node gốc, sau cut).
+    Trường nào không có trong log thì là None.
+    """
+    def find(pattern):
+        match = re.search(pattern, text)
+        return _to_float(match.group(1)) if match else None
+
+    progress = parse_progress_rows(text)
+    root_rows = [row for row in progress if row['node'] is not None and row['node'] <= 1]
+    return {
+        'presolve_time': find(r'Presolving Time\s*:\s*([\d.]+)'),
+        'solving_time': find(r'Solving Time \(sec\)\s*:\s*([\d.]+)'),
+        'nodes': find(r'Solving Nodes\s*:\s*(\d+)'),
+        'primal_bound': find(r'Primal Bound\s*:\s*([-+\deE.]+|infinity)'),
+        'dual_bound': find(r'Dual Bound\s*:\s*([-+\deE.]+|infinity)'),
+        'gap': find(r'Gap\s*:\s*([\d.]+|infinite)'),
+        'root_lp_bound': progress[0]['dualbound'] if progress else None,
+        'root_dual_bound': root_rows[-1]['dualbound'] if root_rows else None,
+    }
@@ -0,0 +1,230 @@
+"""
+Theo dõi tiến trình khi SCIP đang giải (qua pywraplp không có callback native cho Python):
+bật log SCIP, chuyển fd 1 sang pipe và 1 thread đọc từng dòng log ngay khi SCIP in ra
+(Solve() nhả GIL nên thread chạy song song), parse bảng tiến trình (scip_log.py) thành
+sự kiện:
+
+    incumbent   primal bound tốt hơn (hoặc dòng có ký tự heuristic '*', 'r', ...)
+    bound       dual bound thay đổi
+    progress    dòng định kỳ (mỗi display/freq node)
+    done        tổng kết cuối (primal / dual bound, gap, nodes từ parse_scip_log)
+
+Mỗi sự kiện là dict theo TRACE_FIELDS: elapsed (giây từ lúc bắt đầu, đồng hồ của máy),
+scip_time, node, left, primal, dual, gap (%), heur và since_improvement (giây kể từ lần
+cuối primal hoặc dual cải thiện - lớn dần nghĩa là đang "đứng"). callback(event) được gọi
+từ thread đọc log; trả về True để dừng solve (solver.InterruptSolve(), status sẽ không
+còn OPTIMAL). Exception trong callback (hoặc khi ghi trace) cũng dừng solve; thread đọc
+vẫn đọc hết log, exception được ghi ở monitor.error và raise lại khi ra khỏi attach()
+(tức từ model.solve()). Solver đã bị InterruptSolve() không Solve() lại được (SCIP của
+OR-Tools 9.15 báo lỗi ở lần giải sau) - dựng lại model. trace_path: ghi CSV từng dòng
+(flush ngay) để xem trong lúc đang chạy.
+
+Dùng qua SupplyChainModel.solve(callback=..., trace_path=...) hoặc:
+
+    monitor = SolveMonitor(callback=print, trace_path='trace.csv')
+    with monitor.attach(model.solver):
+        model.solver.Solve()
+    monitor.trace   # list sự kiện
+
+Log SCIP thô không ra màn hình, trừ khi echo=True. print() của Python trong callback
+vẫn ra stdout gốc.
+
+fd 1 được chuyển cho CẢ PROCESS: mọi thứ ghi vào fd 1 trong lúc attach (log của solver khác
+đang giải ở thread khác - vd. các khối của lagrangian.py -, print() từ thread khác khi
+sys.stdout là stdout gốc, thư viện C) đều vào pipe và bị parse lẫn với log SCIP. Vì vậy
+mỗi lúc chỉ một monitor được attach (attach lần hai raise RuntimeError), và không nên
+theo dõi solve khi thread khác đang giải hoặc in ra stdout.
+
+Tóm tắt trace (để chọn time limit: incumbent cuối đến lúc nào, gap về 1% / 0.1% lúc nào,
+khoảng "đứng" dài nhất):
+    python solve_monitor.py trace.csv
+"""
+
+import argparse
+import contextlib
+import csv
+import os
+import sys
+import threading
+import time
+
+from scip_log import parse_progress_line, parse_scip_log
+
+GAP_MILESTONES = (10.0, 1.0, 0.1)
+TRACE_FIELDS = ['elapsed', 'event', 'scip_time', 'node', 'left', 'primal', 'dual', 'gap', 'heur',
+                'since_improvement']
+# fd 1 là của cả process: chỉ 1 monitor được chuyển hướng nó tại một thời điểm
+_FD1_LOCK = threading.Lock()
+
+
+class SolveMonitor:
+    def __init__(self, callback=None, trace_path=None, echo=False):
+        self.callback = callback
+        self.trace_path = trace_path
+        self.echo = echo
+        self.trace = []
+        self.summary = None
+        self.error = None
+
+    def _reset(self):
+        self.trace = []
+        self.summary = None
+        self.error = None
+        self._start = time.perf_counter()
+        self._last_improvement = 0.0
+        self._best_primal, self._best_dual = None, None
+
+    def _event(self, row):
+        elapsed = time.perf_counter() - self._start
+        primal, dual = row['primalbound'], row['dualbound']
+        improved_primal = primal is not None and (self._best_primal is None or primal < self._best_primal)
+        if improved_primal or row['heur']:
+            event = 'incumbent'
+        elif dual is not None and dual != self._best_dual:
+            event = 'bound'
+        else:
+            event = 'progress'
+        if improved_primal:
+            self._best_primal = primal
+        if event != 'progress':
+            self._best_dual = dual if dual is not None else self._best_dual
+            self._last_improvement = elapsed
+        return {'elapsed': elapsed, 'event': event, 'scip_time': row['time'], 'node': row['node'],
+                'left': row['left'], 'primal': primal, 'dual': dual, 'gap': row['gap'], 'heur': row['heur'],
+                'since_improvement': elapsed - self._last_improvement}
+
+    def _done_event(self, text):
+        self.summary = parse_scip_log(text)
+        elapsed = time.perf_counter() - self._start
+        return {'elapsed': elapsed, 'event': 'done', 'scip_time': self.summary['solving_time'],
+                'node': self.summary['nodes'], 'left': 0, 'primal': self.summary['primal_bound'],
+                'dual': self.summary['dual_bound'], 'gap': self.summary['gap'], 'heur': '',
+                'since_improvement': elapsed - self._last_improvement}
+
+    def _emit(self, event, solver, writer, f):
+        self.trace.append(event)
+        if writer is not None:
+            writer.writerow(event)
+            f.flush()
+        if self.callback is not None and self.callback(event) and event['event'] != 'done':
+            solver.InterruptSolve()
+
+    def _read(self, fd, solver, writer, f, forward_fd, lines):
+        header = None
+        with os.fdopen(fd, 'r', encoding='utf-8', errors='replace') as pipe:
+            for line in pipe:
+                lines.append(line)
+                if forward_fd is not None:
+                    os.write(forward_fd, line.encode('utf-8'))
+                if self.error is not None:
+                    continue  # vẫn đọc hết pipe để SCIP không bị chặn khi ghi log
+                try:
+                    header, row = parse_progress_line(line, header)
+                    if row is not None:
+                        self._emit(self._event(row), solver, writer, f)
+                except Exception as exc:
+                    self.error = exc
+                    solver.InterruptSolve()
+
+    @contextlib.contextmanager
+    def attach(self, solver):
+        """Theo dõi mọi Solve() của `solver` (pywraplp SCIP) trong block."""
+        self._reset()
+        f = open(self.trace_path, 'w', newline='', encoding='utf-8') if self.trace_path else None
+        writer = csv.DictWriter(f, fieldnames=TRACE_FIELDS) if f else None
+        if writer is not None:
+            writer.writeheader()
+            f.flush()
+        if not _FD1_LOCK.acquire(blocking=False):
+            if f is not None:
+                f.close()
+            raise RuntimeError("Đã có SolveMonitor khác đang chuyển hướng fd 1")
+
+        sys.stdout.flush()
+        saved_fd = os.dup(1)
+        read_fd, write_fd = os.pipe()
+        os.dup2(write_fd, 1)
+        os.close(write_fd)
+        # print() của Python (vd. trong callback) ra stdout gốc thay vì vào pipe
+        saved_stdout = sys.stdout
+        if sys.stdout is sys.__stdout__:
+            sys.stdout = open(os.dup(saved_fd), 'w', buffering=1, encoding='utf-8')
+        lines = []
+        reader = threading.Thread(target=self._read, daemon=True,
+                                  args=(read_fd, solver, writer, f, saved_fd if self.echo else None, lines))
+        reader.start()
+        solver.EnableOutput()
+        completed = False
+        try:
+            yield self
+            completed = True
+        finally:
+            solver.SuppressOutput()
+            if sys.stdout is not saved_stdout:
+                sys.stdout.close()
+                sys.stdout = saved_stdout
+            sys.stdout.flush()
+            os.dup2(saved_fd, 1)  # đóng đầu ghi cuối cùng của pipe -> thread đọc kết thúc
+            reader.join()
+            os.close(saved_fd)
+            try:
+                # Body lỗi thì không phát 'done': lỗi của callback sẽ che mất exception gốc
+                if completed and self.error is None:
+                    self._emit(self._done_event(''.join(lines)), solver, writer, f)
+            finally:
+                if f is not None:
+                    f.close()
+                _FD1_LOCK.release()
+        if self.error is not None:
+            raise self.error
+
+
+def load_trace(path):
+    """Đọc trace CSV (TRACE_FIELDS) -> list sự kiện, số hóa các cột số."""
+    events = []
+    with open(path, newline='', encoding='utf-8') as f:
+        for row in csv.DictReader(f):
+            events.append({key: (value if key in ('event', 'heur') else _number(value)) for key, value in row.items()})
+    return events
+
+
+def _number(value):
+    return float(value) if value not in ('', None) else None
+
+
+def summarize_trace(trace):
+    """
+    dict: elapsed (tổng), first_incumbent / last_incumbent (thời điểm), gap_times
+    {gap %: thời điểm đầu tiên gap <= mốc}, longest_stall (giây không cải thiện dài nhất),
+    final_gap, nodes.
+    """
+    incumbents = [e['elapsed'] for e in trace if e['event'] == 'incumbent']
+    gap_times = {}
+    for milestone in GAP_MILESTONES:
+        hits = [e['elapsed'] for e in trace if e['gap'] is not None and e['gap'] <= milestone]
+        gap_times[milestone] = hits[0] if hits else None
+    last = trace[-1] if trace else {}
+    return {'elapsed': last.get('elapsed'), 'first_incumbent': incumbents[0] if incumbents else None,
+            'last_incumbent': incumbents[-1] if incumbents else None, 'gap_times': gap_times,
+            'longest_stall': max((e['since_improvement'] for e in trace), default=None),
+            'final_gap': last.get('gap'), 'nodes': last.get('node')}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('traces', nargs='+', help='file CSV ghi bởi trace_path')
+    args = parser.parse_args(argv)
+
+    fmt = lambda v: f"{v:8.2f}" if v is not None else f"{'-':>8}"
+    print(f"{'trace':<28} | {'total':>8} | {'1st inc':>8} | {'last inc':>8} | "
+          + " | ".join(f"{f'gap<={g:g}%':>9}" for g in GAP_MILESTONES) + f" | {'stall':>8} | {'gap':>6}")
+    for path in args.traces:
+        s = summarize_trace(load_trace(path))
+        gap = f"{s['final_gap']:5.2f}%" if s['final_gap'] is not None else f"{'-':>6}"
+        print(f"{os.path.basename(path):<28} | {fmt(s['elapsed'])} | {fmt(s['first_incumbent'])} | "
+              f"{fmt(s['last_incumbent'])} | " + " | ".join(f"{fmt(s['gap_times'][g]):>9}" for g in GAP_MILESTONES)
+              + f" | {fmt(s['longest_stall'])} | {gap}")
+
+
+if __name__ == "__main__":
+    main()
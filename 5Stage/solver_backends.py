@@ -0,0 +1,283 @@
+"""
+Backend giải cho SupplyChainModel: SCIP, CBC, HiGHS (qua pywraplp của OR-Tools) và
+CP-SAT (chuyển MPModelProto sang CpModel, biến liên tục được scale thành số nguyên).
+
+Model luôn được dựng bằng pywraplp (cùng 1 mô tả cho mọi backend):
+- SCIP / CBC / HIGHS: pywraplp.Solver tạo trực tiếp bằng backend đó.
+- CP-SAT: model dựng trên solver SCIP (hoặc CBC nếu thiếu SCIP) làm "container";
+  solve_cp_sat() export proto, giải bằng CP-SAT, rồi cố định biến nguyên theo nghiệm
+  CP-SAT và giải LP còn lại trên container -> phần liên tục chính xác (không bị làm tròn
+  theo lưới scale) và get_cost_breakdown() / get_purchasing_plan() dùng như cũ.
+
+Tham số giải (SupplyChainModel.set_parameters, CLI --threads --time-limit --rel-gap
+--abs-gap --emphasis --seed --safe): solver_parameters() chuyển sang MPSolverParameters +
+chuỗi tham số riêng của backend; CP-SAT nhận trực tiếp qua solve_cp_sat(). Backend
+không hỗ trợ 1 tham số thì tham số đó bị bỏ qua (kèm [WARN]):
+
+    tham số     SCIP                          CBC        HIGHS      CP-SAT
+    threads     SetNumThreads                 (có)       (có)       num_workers
+    rel_gap     RELATIVE_MIP_GAP              (có)       (có)       relative_gap_limit
+    abs_gap     limits/absgap                 -          -          absolute_gap_limit
+    emphasis    SCIP_EMPHASIS                 -          -          linearization_level
+    seed        randomization/* (seed, perm)  -          -          random_seed
+    safe        SCIP_SAFE                     -          -          -
+
+SCIP với threads > 1 chạy concurrent solve nội bộ của SCIP (SCIPsolveConcurrent: nhiều
+bộ tham số cùng giải trong 1 process); CBC của OR-Tools giải tuần tự. Cách khác để dùng
+nhiều core: race nhiều cấu hình ở mức process (concurrent_solve.py) hoặc giải nhiều
+instance song song (sweep.py, param_sweep.py).
+
+Scale của CP-SAT: dữ liệu đều nguyên nên biến liên tục x = x' / scale với x' nguyên;
+scale = bội chung nhỏ nhất của mẫu số các cận của biến / dòng (vd. Pmd chia nhu cầu cho m:
+62.5 -> 2, 200/3 -> 3). Hệ số dòng không nguyên thì dòng đó được nhân thêm 10^k. Biến
+không có cận trên nhận cận max_value.
+
+Vì vậy OPTIMAL của CP-SAT chỉ là tối ưu trên lưới (biến liên tục là bội của 1/scale, cận
+vô hạn bị chặn bởi max_value, hệ số / cận có thể bị làm tròn), không phải cận chứng minh
+cho MILP gốc: solve_cp_sat() trả về FEASIBLE trừ khi phép chuyển là chính xác (mọi biến
+nguyên, không chặn / làm tròn; INFEASIBLE trên lưới cũng chỉ là NOT_SOLVED), và ghi
+trạng thái của CP-SAT vào dict info ('cp_status', 'exact', 'scale', 'bound' - cận của
+CP-SAT, chỉ đúng cho bài toán trên lưới).
+"""
+
+import json
+import math
+from fractions import Fraction
+
+import numpy as np
+from ortools.linear_solver import linear_solver_pb2, pywraplp
+from ortools.sat.python import cp_model
+
+BACKENDS = ('SCIP', 'CBC', 'HIGHS', 'CP-SAT')
+MAX_SCALE = 10 ** 4
+SOLVER_PARAMS = ('threads', 'time_limit', 'rel_gap', 'abs_gap', 'emphasis', 'seed', 'safe')
+EMPHASIS = ('balanced', 'feasibility', 'optimality')
+# feasibility: heuristic dày hơn, ít vòng cut, ưu tiên đi sâu; optimality: cut không giới hạn vòng
+SCIP_EMPHASIS = {
+    'balanced': {},
+    'feasibility': {'heuristics/rins/freq': 10, 'heuristics/crossover/freq': 10, 'heuristics/feaspump/freq': 10,
+                    'separating/maxroundsroot': 5, 'nodeselection/restartdfs/stdpriority': 500000},
+    'optimality': {'separating/maxrounds': -1, 'separating/maxroundsroot': -1},
+}
+# Chế độ an toàn (safe=True / --safe, chỉ SCIP): tắt conflict analysis. SCIP (OR-Tools 9.15)
+# có lúc báo "optimal" sai tùy thứ tự cột / seed, vd. model matrix K4_m2_Pm 138,823.5 thay vì
+# 138,819; tắt conflict analysis thì đúng trên mọi thứ tự / seed đã thử nhưng có instance
+# chậm gấp đôi (xem README) -> mặc định tắt, verify_matrix_model.py luôn bật.
+SCIP_SAFE = {'conflict/enable': 'FALSE'}
+CP_SAT_LINEARIZATION = {'balanced': 1, 'feasibility': 0, 'optimality': 2}
+CP_SAT_STATUS = {cp_model.OPTIMAL: pywraplp.Solver.OPTIMAL, cp_model.FEASIBLE: pywraplp.Solver.FEASIBLE,
+                 cp_model.INFEASIBLE: pywraplp.Solver.INFEASIBLE, cp_model.MODEL_INVALID: pywraplp.Solver.MODEL_INVALID}
+
+
+def create_solver(backend='SCIP', safe=False):
+    """
+    pywraplp.Solver để dựng model cho backend (None nếu backend không có).
+    safe=True: SCIP có thêm SCIP_SAFE.
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"backend phải là một trong {BACKENDS}")
+    if backend == 'CP-SAT':
+        return pywraplp.Solver.CreateSolver('SCIP') or pywraplp.Solver.CreateSolver('CBC')
+    solver = pywraplp.Solver.CreateSolver(backend)
+    if solver and backend == 'SCIP' and safe:
+        solver.SetSolverSpecificParametersAsString(parameter_string(SCIP_SAFE))
+    return solver
+
+
+def parameter_string(params):
+    """{tham số: giá trị} -> chuỗi 'tên = giá trị' cho SetSolverSpecificParametersAsString."""
+    return "\n".join(f"{key} = {value}" for key, value in params.items())
+
+
+def available_backends():
+    return [backend for backend in BACKENDS if create_solver(backend) is not None]
+
+
+def _integral(value, tol=1e-9):
+    return abs(value - round(value)) <= tol * max(1.0, abs(value))
+
+
+def choose_scale(proto):
+    """Scale nhỏ nhất cho biến liên tục để mọi cận hữu hạn thành số nguyên (tối đa MAX_SCALE)."""
+    values = [b for v in proto.variable if not v.is_integer
+              for b in (v.lower_bound, v.upper_bound) if math.isfinite(b)]
+    values += [b for c in proto.constraint for b in (c.lower_bound, c.upper_bound) if math.isfinite(b)]
+    scale = 1
+    for b in values:
+        if not _integral(b * scale):
+            scale = math.lcm(scale, Fraction(b).limit_denominator(1000).denominator)
+            if scale > MAX_SCALE:
+                raise ValueError(f"Không scale được cận {b} thành số nguyên (scale > {MAX_SCALE})")
+    return scale
+
+
+def to_cp_model(proto, scale=None, max_value=10 ** 6):
+    """
+    MPModelProto -> (CpModel, biến CP theo thứ tự proto, scale theo biến, exact). exact:
+    CpModel có cùng tập nghiệm với proto - mọi biến nguyên, không cận vô hạn nào bị thay
+    bằng max_value, không hệ số / cận nào bị làm tròn.
+    """
+    scale = scale or choose_scale(proto)
+    model = cp_model.CpModel()
+    variables, factors = [], []
+    exact = True
+    for v in proto.variable:
+        factor = 1 if v.is_integer else scale
+        exact &= v.is_integer and math.isfinite(v.lower_bound) and math.isfinite(v.upper_bound)
+        lb = v.lower_bound if math.isfinite(v.lower_bound) else -max_value
+        ub = v.upper_bound if math.isfinite(v.upper_bound) else max_value
+        variables.append(model.NewIntVar(math.ceil(lb * factor - 1e-9), math.floor(ub * factor + 1e-9), v.name))
+        factors.append(factor)
+
+    for c in proto.constraint:
+        # Dòng nhân scale: hệ số của biến liên tục giữ nguyên, của biến nguyên nhân scale
+        coefs = [a * scale / factors[i] for i, a in zip(c.var_index, c.coefficient)]
+        mult = 1
+        while not all(_integral(a * mult) for a in coefs) and mult < 10 ** 6:
+            mult *= 10
+        exact &= all(_integral(a * mult) for a in coefs)
+        expr = sum(int(round(a * mult)) * variables[i] for i, a in zip(c.var_index, coefs))
+        for bound in (c.lower_bound, c.upper_bound):
+            exact &= not math.isfinite(bound) or _integral(bound * scale * mult)
+        if math.isfinite(c.lower_bound):
+            model.Add(expr >= math.ceil(c.lower_bound * scale * mult - 1e-6))
+        if math.isfinite(c.upper_bound):
+            model.Add(expr <= math.floor(c.upper_bound * scale * mult + 1e-6))
+
+    objective = sum(v.objective_coefficient / factors[i] * variables[i]
+                    for i, v in enumerate(proto.variable) if v.objective_coefficient)
+    objective += proto.objective_offset
+    if proto.maximize:
+        model.Maximize(objective)
+    else:
+        model.Minimize(objective)
+    return model, variables, factors, exact
+
+
+def _check_emphasis(emphasis):
+    if emphasis is not None and emphasis not in EMPHASIS:
+        raise ValueError(f"emphasis phải là một trong {EMPHASIS}")
+
+
+def solver_parameters(backend, rel_gap=None, abs_gap=None, emphasis=None, seed=None, safe=None):
+    """
+    (MPSolverParameters cho Solve(), chuỗi tham số riêng của backend, list tham số bị bỏ
+    qua) cho backend pywraplp. threads / time_limit đặt thẳng lên solver (SetNumThreads,
+    SetTimeLimit); CP-SAT không dùng hàm này (xem solve_cp_sat). safe: thêm SCIP_SAFE.
+    """
+    _check_emphasis(emphasis)
+    params = pywraplp.MPSolverParameters()
+    if rel_gap is not None:
+        params.SetDoubleParam(pywraplp.MPSolverParameters.RELATIVE_MIP_GAP, rel_gap)
+
+    specific, ignored = {}, []
+    if backend == 'SCIP':
+        if safe:
+            specific.update(SCIP_SAFE)
+        if abs_gap is not None:
+            specific['limits/absgap'] = abs_gap
+        specific.update(SCIP_EMPHASIS[emphasis or 'balanced'])
+        if seed is not None:
+            specific.update({'randomization/randomseedshift': seed, 'randomization/permutationseed': seed,
+                             'randomization/lpseed': seed, 'randomization/permutevars': 'TRUE'})
+    else:
+        ignored = [name for name, value in (('abs_gap', abs_gap), ('emphasis', emphasis), ('seed', seed),
+                                            ('safe', safe or None))
+                   if value is not None and not (name == 'emphasis' and value == 'balanced')]
+    return params, parameter_string(specific), ignored
+
+
+def solve_cp_sat(solver, time_limit=None, workers=None, max_value=10 ** 6, rel_gap=None, abs_gap=None,
+                 emphasis=None, seed=None):
+    """
+    Giải model pywraplp `solver` bằng CP-SAT rồi hoàn thiện phần liên tục trên chính
+    `solver` (biến nguyên bị cố định). Trả về (status pywraplp, các biến đã cố định
+    [(var, lb, ub)] để gọi restore_bounds() trước khi sửa / giải lại model, info).
+    OPTIMAL chỉ khi CP-SAT tối ưu và to_cp_model() chính xác; tối ưu trên lưới -> FEASIBLE
+    với info['cp_status'] == 'OPTIMAL'.
+    """
+    _check_emphasis(emphasis)
+    proto = linear_solver_pb2.MPModelProto()
+    solver.ExportModelToProto(proto)
+    scale = choose_scale(proto)
+    model, variables, _, exact = to_cp_model(proto, scale=scale, max_value=max_value)
+
+    cp_solver = cp_model.CpSolver()
+    if time_limit:
+        cp_solver.parameters.max_time_in_seconds = time_limit
+    if workers:
+        cp_solver.parameters.num_workers = workers
+    if rel_gap is not None:
+        cp_solver.parameters.relative_gap_limit = rel_gap
+    if abs_gap is not None:
+        cp_solver.parameters.absolute_gap_limit = abs_gap
+    if emphasis is not None:
+        cp_solver.parameters.linearization_level = CP_SAT_LINEARIZATION[emphasis]
+    if seed is not None:
+        cp_solver.parameters.random_seed = seed
+    status = cp_solver.Solve(model)
+    info = {'cp_status': cp_solver.StatusName(status), 'exact': exact, 'scale': scale}
+    if status == cp_model.INFEASIBLE and not exact:
+        return pywraplp.Solver.NOT_SOLVED, [], info  # chỉ vô nghiệm trên lưới
+    if status not in (cp_model.OPTIMAL, cp_model.FEASIBLE):
+        return CP_SAT_STATUS.get(status, pywraplp.Solver.NOT_SOLVED), [], info
+    info['bound'] = cp_solver.BestObjectiveBound()
+
+    fixed = []
+    for var, cp_var in zip(solver.variables(), variables):
+        if var.integer():
+            fixed.append((var, var.lb(), var.ub()))
+            value = cp_solver.Value(cp_var)
+            var.SetBounds(value, value)
+    lp_status = solver.Solve()
+    if lp_status != pywraplp.Solver.OPTIMAL:
+        return lp_status, fixed, info
+    if status == cp_model.OPTIMAL and exact:
+        return pywraplp.Solver.OPTIMAL, fixed, info
+    return pywraplp.Solver.FEASIBLE, fixed, info
+
+
+def solution_values(solver):
+    """
+    Giá trị mọi biến của nghiệm hiện tại trong 1 lần gọi (FillSolutionResponseProto), dạng
+    ndarray theo var.index() - thay cho var.solution_value() từng biến. Chưa có nghiệm thì
+    trả về toàn 0 (như solution_value()).
+    """
+    response = linear_solver_pb2.MPSolutionResponse()
+    solver.FillSolutionResponseProto(response)
+    if not response.variable_value:
+        return np.zeros(solver.NumVariables())
+    return np.array(response.variable_value, dtype=float)
+
+
+def restore_bounds(fixed):
+    for var, lb, ub in fixed:
+        var.SetBounds(lb, ub)
+
+
+def pick_backend(choice_file, key, default='SCIP'):
+    """Backend nhanh nhất cho lớp instance `key` (vd. 'K4_m2_Pm') theo file của bench_backends.py."""
+    try:
+        with open(choice_file, encoding='utf-8') as f:
+            return json.load(f).get('choice', {}).get(key, default)
+    except FileNotFoundError:
+        return default
+
+
+def add_solver_arguments(parser):
+    """Thêm --threads --time-limit --rel-gap --abs-gap --emphasis --seed --safe vào argparse parser."""
+    group = parser.add_argument_group('tham số solver')
+    group.add_argument('--threads', type=int, default=None)
+    group.add_argument('--time-limit', type=float, default=None, help='giây, cho mỗi lần giải')
+    group.add_argument('--rel-gap', type=float, default=None, help='gap tương đối để dừng (vd. 1e-4)')
+    group.add_argument('--abs-gap', type=float, default=None, help='gap tuyệt đối để dừng')
+    group.add_argument('--emphasis', default=None, choices=EMPHASIS)
+    group.add_argument('--seed', type=int, default=None)
+    group.add_argument('--safe', action='store_true', default=None,
+                       help='SCIP: tắt conflict analysis (SCIP_SAFE) - chậm hơn, tránh tối ưu sai hiếm gặp')
+    return group
+
+
+def solver_params_from_args(args):
+    """{tham số: giá trị} khác None từ args của add_solver_arguments() (cho set_parameters)."""
+    return {name: getattr(args, name) for name in SOLVER_PARAMS if getattr(args, name, None) is not None}
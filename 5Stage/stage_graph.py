@@ -0,0 +1,217 @@
+"""
+Mô tả khai báo (declarative) của mạng chuỗi cung ứng: node (stage) và arc giữa các stage.
+
+Node (dict):
+    id                  định danh node (số thứ tự stage 1..K ở mạng nối tiếp, chuỗi ở mạng nhiều site)
+    name                tên hiển thị
+    stage               tầng của node trong mạng (nhiều node song song có thể cùng tầng)
+    initial_inventory   tồn kho đầu kỳ
+    ending_inventory    tồn kho yêu cầu ở kỳ cuối
+    supply              True nếu node nhận hàng từ MỌI supplier, list chỉ số supplier nếu chỉ
+                        nhận từ một số supplier, False nếu không; mỗi supplier giao cho tối đa 1 node
+    demand              mảng nhu cầu theo kỳ con nếu là node khách hàng, ngược lại None
+    inventory_capacity  (tùy chọn) sức chứa riêng của node, mặc định data.inventory_capacity
+
+Arc (dict), luồng flow[a, t] đi từ src sang dst, đến nơi sau lead_time kỳ con:
+    src, dst, lead_time
+    leg                 chỉ số leg tương ứng trong SupplyChainModel (y[leg, t]); leg 1 = sản xuất site 1
+    production          None hoặc {'site', 'capacity', 'fixed_cost', 'var_cost'} (mảng theo kỳ con;
+                        capacity / fixed_cost tính theo kỳ gốc như SupplyChainModel)
+    transport_capacity  None hoặc mảng theo kỳ con (flow <= cap * w_trans)
+    freight             False, True (cước theo bậc data.freight_actual) hoặc list bậc cước
+                        riêng của arc (cùng dạng data.freight_actual)
+    intransit           True nếu tính holding cost cho hàng đang đi trên arc
+    unit_cost           chi phí vận chuyển tuyến tính theo đơn vị (không có biến nhị phân)
+
+Mọi model (SupplyChainModel, MatrixSupplyChainModel) lấy leg / arc từ đây thay vì rẽ
+nhánh theo K; mạng mới (10-20 stage, ...) chỉ cần một StageGraph mới.
+"""
+
+
+import numpy as np
+
+
+def _node(k, data, K, supply=False, demand=None):
+    return {
+        'id': k,
+        'name': f'stage{k}',
+        'stage': k,
+        'initial_inventory': data.initial_inventory.get(k, 0),
+        'ending_inventory': 100 if k == K else 0,
+        'supply': supply,
+        'demand': demand,
+    }
+
+
+def _arc(src, dst, lead_time=0, production=None, transport_capacity=None, freight=False,
+         intransit=False, leg=None, unit_cost=0.0):
+    return {
+        'src': src,
+        'dst': dst,
+        'lead_time': lead_time,
+        'leg': src if leg is None else leg,
+        'production': production,
+        'transport_capacity': transport_capacity,
+        'freight': freight,
+        'intransit': intransit,
+        'unit_cost': unit_cost,
+    }
+
+
+class StageGraph:
+    def __init__(self, nodes, arcs):
+        self.nodes = list(nodes)
+        self.arcs = list(arcs)
+        self.K = len(self.nodes)
+        self._by_id = {node['id']: node for node in self.nodes}
+        if len(self._by_id) != self.K:
+            raise ValueError("Trùng id node")
+        self._in = {node_id: [] for node_id in self._by_id}
+        self._out = {node_id: [] for node_id in self._by_id}
+        for a, arc in enumerate(self.arcs):
+            if arc['src'] not in self._by_id or arc['dst'] not in self._by_id:
+                raise ValueError(f"Arc {arc['src']}->{arc['dst']} nối tới node không tồn tại")
+            self._out[arc['src']].append(a)
+            self._in[arc['dst']].append(a)
+
+    def node(self, node_id):
+        return self._by_id[node_id]
+
+    def arcs_in(self, node_id):
+        return self._in[node_id]
+
+    def arcs_out(self, node_id):
+        return self._out[node_id]
+
+    def suppliers_of(self, node_id, num_suppliers):
+        """Chỉ số các supplier giao hàng tới node. Kiểm tra mỗi supplier chỉ giao cho 1 node."""
+        owner = {}
+        for node in self.nodes:
+            supply = node['supply']
+            js = list(range(num_suppliers)) if supply is True else list(supply or [])
+            for j in js:
+                if j in owner:
+                    raise ValueError(f"Supplier {j} giao cho cả node {owner[j]} và {node['id']}")
+                owner[j] = node['id']
+        return [j for j in range(num_suppliers) if owner.get(j) == node_id]
+
+    def tariff(self, a, default):
+        """Bậc cước của arc a (default = data.freight_actual khi arc['freight'] is True)."""
+        freight = self.arcs[a]['freight']
+        return default if freight is True else list(freight)
+
+    def legs(self, kind):
+        """Chỉ số leg (theo SupplyChainModel) của các arc có thuộc tính `kind`."""
+        return [arc['leg'] for arc in self.arcs if arc[kind]]
+
+    @classmethod
+    def from_data(cls, data):
+        """Mạng 3/4/5-stage đúng như SupplyChainModel đang mô hình hóa cho data.K."""
+        K = data.K
+        lt = lambda a, b: data.lead_times.get((a, b), 0)
+        site1 = {'site': 1, 'capacity': data.prod_capacity,
+                 'fixed_cost': data.prod_fixed_cost, 'var_cost': data.prod_var_cost}
+        nodes = [_node(k, data, K, supply=(k == 1), demand=data.demand if k == K else None)
+                 for k in range(1, K + 1)]
+        arcs = [_arc(1, 2, lt(1, 2), production=site1)]
+
+        if K == 3:
+            arcs.append(_arc(2, 3, lt(2, 3), transport_capacity=data.trans_capacity,
+                             freight=True, intransit=True))
+        elif K == 4:
+            arcs.append(_arc(2, 3, lt(2, 3), transport_capacity=data.trans_capacity, intransit=True))
+            arcs.append(_arc(3, 4, lt(3, 4), transport_capacity=data.trans_capacity,
+                             freight=True, intransit=True))
+        elif K == 5:
+            site2 = {'site': 2, 'capacity': data.prod2_capacity,
+                     'fixed_cost': data.prod2_fixed_cost, 'var_cost': data.prod2_var_cost}
+            arcs.append(_arc(2, 3, lt(2, 3), transport_capacity=data.trans_capacity,
+                             freight=True, intransit=True))
+            # Site 2: sản xuất (x2) và giao sang WH2 (y3 == x2) là cùng một luồng
+            arcs.append(_arc(3, 4, lt(3, 4), production=site2, transport_capacity=data.trans_capacity))
+            arcs.append(_arc(4, 5, lt(4, 5), transport_capacity=data.trans_capacity,
+                             freight=True, intransit=True))
+        else:
+            raise ValueError(f"Không có stage graph mặc định cho K={K}")
+        return cls(nodes, arcs)
+
+    @classmethod
+    def serial(cls, data, num_stages, freight_every=2, lead_time=0):
+        """
+        Chuỗi num_stages stage nối tiếp (dùng cho benchmark mạng dài 10-20 stage):
+        sản xuất ở arc 1->2 (site 1 của data), các arc sau là vận chuyển có capacity,
+        tính in-transit; arc thứ freight_every, 2*freight_every, ... chịu cước theo bậc.
+        Tồn kho đầu kỳ ở node cuối bằng của data.
+        """
+        if num_stages < 2:
+            raise ValueError("Cần ít nhất 2 stage")
+        site1 = {'site': 1, 'capacity': data.prod_capacity,
+                 'fixed_cost': data.prod_fixed_cost, 'var_cost': data.prod_var_cost}
+        nodes = []
+        for k in range(1, num_stages + 1):
+            node = _node(k, data, num_stages, supply=(k == 1),
+                         demand=data.demand if k == num_stages else None)
+            node['initial_inventory'] = data.initial_inventory[data.K] if k == num_stages else 0
+            nodes.append(node)
+        arcs = [_arc(1, 2, production=site1)]
+        for k in range(2, num_stages):
+            arcs.append(_arc(k, k + 1, lead_time, transport_capacity=data.trans_capacity,
+                             freight=(k - 1) % freight_every == 0, intransit=True))
+        return cls(nodes, arcs)
+
+    @classmethod
+    def network(cls, data, plants=2, dcs=40, customers=300, dcs_per_customer=2,
+                far_dc_share=0.5, tariff_spread=0.3, customer_unit_cost=(1.0, 5.0), seed=0):
+        """
+        Mạng nhiều site (sinh ngẫu nhiên, seed cố định), 4 tầng:
+
+            plant{p} --sản xuất--> fg{p} --vận chuyển--> dc{d} --giao--> cust{c}
+
+        - Supplier j giao cho plant j % plants; mỗi plant có capacity / chi phí sản xuất của
+          site 1 (chi phí cố định nhân hệ số ngẫu nhiên 0.8-1.2).
+        - Mọi kho thành phẩm fg{p} nối tới mọi DC: capacity = data.trans_capacity, bậc cước
+          riêng (fixed/var của data.freight_actual nhân hệ số 1 ± tariff_spread; các bậc nối
+          liền nhau, không có khe 31-32, 48-49... vì luồng chia cho nhiều khách hàng là số
+          thực và rơi vào khe thì không khả thi), lead time m
+          với DC "xa" (tỷ lệ far_dc_share), 0 với DC gần; tính in-transit.
+        - Mỗi khách hàng nối tới dcs_per_customer DC ngẫu nhiên, lead time 0, cước tuyến tính
+          unit_cost ~ U(customer_unit_cost), không capacity (không biến nhị phân).
+        - Nhu cầu và tồn kho đầu / cuối kỳ của tầng cuối được chia cho khách hàng theo tỷ
+          trọng ngẫu nhiên, nên tổng nhu cầu giữ như bài gốc.
+        """
+        rng = np.random.default_rng(seed)
+        J, m = len(data.suppliers), data.m
+        weight = rng.uniform(0.5, 1.5, customers)
+        weight /= weight.sum()
+        initial = data.initial_inventory[data.K]
+        ending = 100
+
+        def node(node_id, stage, supply=False, demand=None, initial=0.0, ending=0.0):
+            return {'id': node_id, 'name': node_id, 'stage': stage, 'initial_inventory': initial,
+                    'ending_inventory': ending, 'supply': supply, 'demand': demand}
+
+        nodes, arcs = [], []
+        for p in range(plants):
+            nodes.append(node(f'plant{p}', 1, supply=[j for j in range(J) if j % plants == p]))
+            nodes.append(node(f'fg{p}', 2))
+            site = {'site': p + 1, 'capacity': data.prod_capacity,
+                    'fixed_cost': np.asarray(data.prod_fixed_cost) * rng.uniform(0.8, 1.2),
+                    'var_cost': data.prod_var_cost}
+            arcs.append(_arc(f'plant{p}', f'fg{p}', production=site))
+        for d in range(dcs):
+            nodes.append(node(f'dc{d}', 3))
+            lead = m if rng.random() < far_dc_share else 0
+            for p in range(plants):
+                factor = rng.uniform(1 - tariff_spread, 1 + tariff_spread)
+                tariff = [dict(iv, min=iv['min'] if e == 0 else data.freight_actual[e - 1]['max'],
+                               fixed_cost=iv['fixed_cost'] * factor,
+                               var_cost_per_unit=iv['var_cost_per_unit'] * factor)
+                          for e, iv in enumerate(data.freight_actual)]
+                arcs.append(_arc(f'fg{p}', f'dc{d}', lead, transport_capacity=data.trans_capacity,
+                                 freight=tariff, intransit=True))
+        for c in range(customers):
+            nodes.append(node(f'cust{c}', 4, demand=np.asarray(data.demand) * weight[c],
+                              initial=initial * weight[c], ending=ending * weight[c]))
+            for d in rng.choice(dcs, size=min(dcs_per_customer, dcs), replace=False):
+                arcs.append(_arc(f'dc{d}', f'cust{c}', unit_cost=rng.uniform(*customer_unit_cost)))
+        return cls(nodes, arcs)
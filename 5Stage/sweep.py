@@ -0,0 +1,190 @@
+"""
+Sweep engine song song cho sensitivity analysis.
+
+Mỗi instance (m, mode, num_stages) được giải trong một worker riêng của
+ProcessPoolExecutor (mỗi worker một solver SCIP). Worker chỉ trả về bản ghi
+picklable (CachedSolution + số liệu), không trả pywraplp object.
+
+Warm start (warm_start.py): instance m được giải với MIP start lift từ nghiệm của
+instance m thô hơn cùng (mode, num_stages):
+    warm_start='base'      lift từ m = 1 (các m > 1 vẫn chạy song song sau khi m = 1 xong) - mặc định
+    warm_start='previous'  lift từ m nhỏ hơn liền trước trong lưới (chuỗi tuần tự theo m)
+    warm_start=None        giải độc lập
+
+Pm -> Pmd seeding (seed_pmd=True): Pmd của mỗi m được giải SAU Pm cùng m. Nghiệm Pm
+được định thời lại theo nhu cầu Pmd (warm_start.pm_to_pmd, Theorem 3) làm MIP start; nếu
+PlanEvaluator xác nhận phương án đó khả thi trên Pmd thì chi phí của nó là cutoff ban đầu.
+Nếu cutoff làm bài toán vô nghiệm, solve_cached tự giải lại không có cutoff.
+
+solver_params = {threads, time_limit, rel_gap, abs_gap, emphasis, seed, safe} được truyền tới
+SupplyChainModel.set_parameters() trong mọi worker (và vào cache key). Instance dừng vì
+time limit với nghiệm FEASIBLE vẫn trả về incumbent (record['optimal'] = False, không vào
+cache); không có nghiệm nào thì obj = inf và solution = None.
+"""
+
+import contextlib
+import io
+import os
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from ortools.linear_solver import pywraplp
+
+from data_loader import SupplyChainData
+from dynamic_scm_milp import SupplyChainModel
+from result_cache import CachedSolution, solution_record, solve_cached
+from warm_start import lift_solution, pm_to_pmd
+
+WARM_START_MODES = (None, 'base', 'previous')
+
+
+def solve_task(task, seed=None, solver_params=None):
+    """
+    Giải 1 instance task = (m, mode, num_stages) - chạy trong worker process.
+    seed = (parent_task, {tên biến: giá trị}) của instance đã giải để warm start, hoặc
+    None. solver_params: xem SupplyChainModel.set_parameters.
+    Trả về dict: m, mode, num_stages, T, obj, cpu, seed_from, optimal, solution
+    (CachedSolution - incumbent nếu optimal = False - hoặc None nếu không có nghiệm)
+    """
+    m, mode, num_stages = task
+    data = SupplyChainData(m=m, mode=mode, num_stages=num_stages)
+
+    hint, cutoff = None, None
+    if seed is not None:
+        parent, values = seed
+        coarse = SupplyChainData(m=parent[0], mode=parent[1], num_stages=parent[2])
+        if parent == (m, 'Pm', num_stages) and mode == 'Pmd':
+            hint, cutoff = pm_to_pmd(values, coarse, data)
+        else:
+            hint = lift_solution(values, coarse, data)
+
+    # Log của model ("Creating variables...") sẽ chồng chéo giữa các worker -> bỏ
+    with contextlib.redirect_stdout(io.StringIO()):
+        settings = dict(backend='SCIP', **solver_params) if solver_params else None
+        model, obj_val, duration, _ = solve_cached(data, SupplyChainModel, solver_settings=settings,
+                                                   hint=hint, cutoff=cutoff)
+
+    optimal = obj_val != float('inf')
+    if isinstance(model, CachedSolution):
+        solution = model
+    elif optimal or model.status == pywraplp.Solver.FEASIBLE:
+        solution = CachedSolution(None, solution_record(model, duration))
+        obj_val = solution.get_objective_value()
+    else:
+        solution = None
+
+    return {
+        'm': m,
+        'mode': mode,
+        'num_stages': num_stages,
+        'T': data.T,
+        'obj': obj_val,
+        'cpu': duration,
+        'seed_from': seed[0] if seed is not None else None,
+        'optimal': optimal,
+        'solution': solution,
+    }
+
+
+def warm_start_parents(tasks, warm_start, seed_pmd=False):
+    """
+    Task nào warm start từ task nào: { task: parent_task hoặc None }.
+    seed_pmd=True: Pmd của m lấy Pm cùng m làm parent (ưu tiên hơn warm_start).
+    Parent có thể nằm ngoài `tasks` (vd. m = 1 khi warm_start='base'); khi đó nó
+    vẫn được giải làm seed nhưng không trả về.
+    """
+    if warm_start not in WARM_START_MODES:
+        raise ValueError(f"warm_start phải là một trong {WARM_START_MODES}")
+    parents = {}
+    for task in tasks:
+        m, mode, num_stages = task
+        parent = None
+        if warm_start == 'base' and m > 1:
+            parent = (1, mode, num_stages)
+        elif warm_start == 'previous':
+            smaller = [t[0] for t in tasks if t[1:] == task[1:] and t[0] < m]
+            if smaller:
+                parent = (max(smaller), mode, num_stages)
+        if seed_pmd and mode == 'Pmd':
+            parent = (m, 'Pm', num_stages)
+        parents[task] = parent
+    for parent in set(parents.values()) - set(parents) - {None}:
+        parents[parent] = None
+    return parents
+
+
+def run_sweep(tasks, on_result=None, max_workers=None, warm_start='base', seed_pmd=False, solver_params=None):
+    """
+    Giải toàn bộ tasks song song, gọi on_result(record) ngay khi mỗi task xong.
+    Trả về: { (m, mode, num_stages): record }
+
+    Task có m lớn (chậm nhất) được submit trước để tổng thời gian ~ instance chậm nhất.
+    Với warm_start, 1 task chỉ được submit sau khi task seed của nó xong.
+    max_workers=1 chạy tuần tự trong process hiện tại (tiện debug).
+    """
+    requested = set(tasks)
+    parents = warm_start_parents(list(requested), warm_start, seed_pmd)
+    if max_workers is None:
+        max_workers = min(len(parents), os.cpu_count() or 1)
+
+    records = {}
+    ready = [task for task, parent in parents.items() if parent is None]
+
+    def seed_of(task):
+        parent = parents[task]
+        if parent is None or records[parent]['solution'] is None:
+            return None
+        return parent, records[parent]['solution'].get_variable_values()
+
+    def finish(task, record):
+        records[task] = record
+        ready.extend(child for child, parent in parents.items() if parent == task)
+        if on_result and task in requested:
+            on_result(record)
+
+    def next_tasks():
+        ready.sort(key=lambda task: task[0])
+        while ready:
+            yield ready.pop()
+
+    if max_workers <= 1:
+        while ready:
+            for task in next_tasks():
+                finish(task, solve_task(task, seed_of(task), solver_params))
+        return {task: records[task] for task in requested}
+
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        pending = {}
+        while ready or pending:
+            for task in next_tasks():
+                pending[pool.submit(solve_task, task, seed_of(task), solver_params)] = task
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                finish(pending.pop(future), future.result())
+    return {task: records[task] for task in requested}
+
+
+def run_pm_pmd_grid(m_values, num_stages, on_row=None, max_workers=None, warm_start='base',
+                    seed_pmd=False, solver_params=None):
+    """
+    Giải lưới m x {Pm, Pmd}. Gọi on_row(m, rec_pm, rec_pmd) theo thứ tự m tăng dần,
+    ngay khi cả 2 mode của m đó (và mọi m nhỏ hơn) đã xong.
+    Trả về list [(m, rec_pm, rec_pmd), ...] sắp theo m.
+    """
+    m_values = sorted(m_values)
+    tasks = [(m, mode, num_stages) for m in m_values for mode in ('Pm', 'Pmd')]
+    done = {}
+    next_idx = [0]
+
+    def emit_ready(record):
+        done[record['m'], record['mode']] = record
+        while next_idx[0] < len(m_values):
+            m = m_values[next_idx[0]]
+            if (m, 'Pm') not in done or (m, 'Pmd') not in done:
+                break
+            if on_row:
+                on_row(m, done[m, 'Pm'], done[m, 'Pmd'])
+            next_idx[0] += 1
+
+    run_sweep(tasks, on_result=emit_ready, max_workers=max_workers, warm_start=warm_start,
+              seed_pmd=seed_pmd, solver_params=solver_params)
+    return [(m, done[m, 'Pm'], done[m, 'Pmd']) for m in m_values]
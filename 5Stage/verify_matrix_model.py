@@ -0,0 +1,113 @@
+"""
+So sánh MatrixSupplyChainModel (matrix_model.py) với SupplyChainModel trên mọi instance
+của benchmark (3-, 4-, 5-stage × m × {Pm, Pmd}): objective và cost breakdown phải trùng.
+Mạng 3/4-stage còn được so với objective của các bản model riêng trước khi gộp vào model
+dùng chung (3Stage/, Sensitivity/): StageGraph.from_data phải cho đúng công thức cũ.
+Model matrix còn được giải lại với thứ tự cột hoán vị ngẫu nhiên (PERMUTATION_SEEDS): tối
+ưu không được phụ thuộc thứ tự cột. Mọi lần giải ở đây dùng SCIP_SAFE (solver_backends.py)
+vì SCIP mặc định có lúc báo tối ưu sai tùy thứ tự cột.
+
+Chạy:
+    python verify_matrix_model.py
+"""
+
+import contextlib
+import io
+import sys
+import time
+
+import numpy as np
+from ortools.linear_solver import linear_solver_pb2, pywraplp
+
+from benchmark_suite import DEFAULT_M_VALUES, MODES, case_key
+from data_loader import SupplyChainData
+from dynamic_scm_milp import SupplyChainModel
+from matrix_model import MatrixSupplyChainModel
+from solver_backends import SCIP_SAFE, create_solver, parameter_string
+
+TOL = 1e-6
+PERMUTATION_SEEDS = (0, 1)
+
+# Objective của 3Stage/dynamic_scm_milp.py (K=3, K=4) và Sensitivity/ (K=4) cũ, cùng data
+REFERENCE_OBJECTIVES = {
+    (3, 1, 'Pm'): 135554.0, (3, 1, 'Pmd'): 135554.0,
+    (3, 2, 'Pm'): 135894.0, (3, 2, 'Pmd'): 134682.5,
+    (3, 3, 'Pm'): 136711.66666666666, (3, 3, 'Pmd'): 135350.55555555553,
+    (4, 1, 'Pm'): 141404.0, (4, 1, 'Pmd'): 141404.0,
+    (4, 2, 'Pm'): 138819.0, (4, 2, 'Pmd'): 137595.0,
+    (4, 3, 'Pm'): 138661.66666666672, (4, 3, 'Pmd'): 137289.44444444444,
+}
+
+
+def solve(model_cls, data):
+    model = model_cls(data)
+    with contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        model.create_variables()
+        model.add_constraints()
+        model.set_objective()
+        build_time = time.perf_counter() - start
+        model.solver.SetSolverSpecificParametersAsString(parameter_string(SCIP_SAFE))
+        if not model.solve():
+            return None, build_time
+    return model, build_time
+
+
+def solve_permuted(model, seed):
+    """Objective tối ưu của model khi các cột được xếp theo hoán vị ngẫu nhiên (None nếu không tối ưu)."""
+    proto = linear_solver_pb2.MPModelProto()
+    model.solver.ExportModelToProto(proto)
+    order = np.random.default_rng(seed).permutation(len(proto.variable))
+    position = np.empty_like(order)
+    position[order] = np.arange(len(order))
+    permuted = linear_solver_pb2.MPModelProto()
+    permuted.CopyFrom(proto)
+    del permuted.variable[:]
+    permuted.variable.extend(proto.variable[c] for c in order)
+    for row in permuted.constraint:
+        row.var_index[:] = position[list(row.var_index)].tolist()
+    solver = create_solver('SCIP', safe=True)
+    solver.LoadModelFromProto(permuted)
+    if solver.Solve() != pywraplp.Solver.OPTIMAL:
+        return None
+    return solver.Objective().Value()
+
+
+def main():
+    ok = True
+    print(f"{'case':<14} | {'pywraplp obj':>14} | {'matrix obj':>14} | {'build old':>9} | {'build new':>9} |")
+    print("-" * 80)
+    for K, m_values in DEFAULT_M_VALUES.items():
+        for m in m_values:
+            for mode in MODES:
+                data = SupplyChainData(m=m, mode=mode, num_stages=K)
+                ref, t_ref = solve(SupplyChainModel, data)
+                new, t_new = solve(MatrixSupplyChainModel, data)
+                if ref is None or new is None:
+                    status = 'FAIL (not optimal)'
+                    ok = False
+                    print(f"{case_key(K, m, mode):<14} | {status}")
+                    continue
+                obj_ref, obj_new = ref.get_objective_value(), new.get_objective_value()
+                bd_ref, bd_new = ref.get_cost_breakdown(), new.get_cost_breakdown()
+                same = abs(obj_ref - obj_new) <= TOL * max(1.0, abs(obj_ref))
+                same &= abs(bd_new['total'] - obj_new) <= TOL * max(1.0, abs(obj_new))
+                reference = REFERENCE_OBJECTIVES.get((K, m, mode))
+                if reference is not None:
+                    same &= abs(obj_ref - reference) <= TOL * max(1.0, abs(reference))
+                permuted = [solve_permuted(new, seed) for seed in PERMUTATION_SEEDS]
+                same &= all(obj is not None and abs(obj - obj_ref) <= TOL * max(1.0, abs(obj_ref))
+                            for obj in permuted)
+                ok &= same
+                print(f"{case_key(K, m, mode):<14} | {obj_ref:>14,.2f} | {obj_new:>14,.2f} | "
+                      f"{t_ref:>9.4f} | {t_new:>9.4f} | {'OK' if same else 'MISMATCH'}", flush=True)
+                if not same:
+                    print(f"    reference: {reference}\n    permuted: {permuted}\n"
+                          f"    breakdown ref: {bd_ref}\n    breakdown new: {bd_new}")
+    print("-" * 80)
+    print("[PASS]" if ok else "[FAIL]")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
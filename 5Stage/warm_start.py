@@ -0,0 +1,121 @@
+"""
+Warm start cho instance chia nhỏ kỳ (m lớn) từ nghiệm của instance thô hơn (m nhỏ hơn).
+
+Instance m = k là bản chia nhỏ theo thời gian của instance m = 1 (Theorem 2/3): mỗi kỳ
+gốc gồm m kỳ con. lift_solution() ánh xạ nghiệm tối ưu của m_coarse sang lưới m_fine:
+
+- Kỳ con fine t (kỳ gốc b, vị trí s) thuộc nhóm kỳ coarse tc = b*m_coarse + s*m_coarse // m_fine.
+- Quyết định mua / sản xuất (q, z, x, w_prod, x2, w_prod2) đặt ở kỳ fine ĐẦU TIÊN của nhóm.
+- Lượng vận chuyển y chia đều trên các kỳ fine của nhóm (capacity vận chuyển chia theo m).
+- Tồn kho i lấy theo kỳ coarse tương ứng; biến theo kỳ gốc và pricing (s, r) giữ nguyên.
+
+Biến freight không được hint (khoảng cước có "lỗ" nên y chia nhỏ có thể rơi vào khe),
+nên hint luôn là nghiệm PARTIAL: SCIP hoàn thiện nó bằng heuristic completesol thay vì
+loại bỏ nếu không khả thi tuyệt đối.
+
+Pm -> Pmd cùng m (pm_to_pmd, Theorem 3): nhu cầu Pmd chia đều m kỳ con thay vì dồn vào
+kỳ con cuối, nên nghiệm Pm giữ nguyên lịch thì tồn kho stage nhu cầu âm ở các kỳ con đầu.
+Phương án được định thời lại theo nhu cầu Pmd: gộp nghiệm Pm theo kỳ gốc, đặt lượng mua
+ở kỳ con đầu của kỳ gốc, chia đều sản xuất và vận chuyển trên m kỳ con (lead time là bội
+của m nên luồng đến cũng đều), rồi suy lại tồn kho từ các hàng cân bằng. Tồn kho cuối mỗi
+kỳ gốc giữ như Pm và đi tuyến tính trong kỳ gốc. PlanEvaluator kiểm tra khả thi và tính
+chi phí thật trên Pmd - chi phí đó là cutoff hợp lệ cho bài Pmd.
+
+Nghiệm được biểu diễn bằng dict {tên biến pywraplp: giá trị} (giống
+CachedSolution.get_variable_values()), nên dùng được cả với kết quả từ cache.
+"""
+
+import numpy as np
+
+from plan_evaluator import PlanEvaluator
+
+# Ngưỡng coi 1 lượng là > 0 khi suy ra biến binary tương ứng
+EPS = 1e-6
+
+
+def fine_to_coarse(t, m_coarse, m_fine):
+    """Kỳ coarse chứa kỳ fine t."""
+    b, s = divmod(t, m_fine)
+    return b * m_coarse + s * m_coarse // m_fine
+
+
+def lift_solution(values, coarse, fine):
+    """
+    values: {tên biến: giá trị} của nghiệm tối ưu trên `coarse` (SupplyChainData).
+    Trả về dict hint {tên biến: giá trị} cho model dựng trên `fine`.
+    """
+    if coarse.K != fine.K or coarse.base_T != fine.base_T:
+        raise ValueError("coarse và fine phải cùng num_stages và cùng số kỳ gốc")
+    mc, mf = coarse.m, fine.m
+    get = lambda name: values.get(name, 0.0)
+
+    tc_of = [fine_to_coarse(t, mc, mf) for t in range(fine.T)]
+    group_size = {}
+    for tc in tc_of:
+        group_size[tc] = group_size.get(tc, 0) + 1
+    is_first = [t == 0 or tc_of[t] != tc_of[t - 1] for t in range(fine.T)]
+
+    hint = {}
+    for t, tc in enumerate(tc_of):
+        first = is_first[t]
+        for j in range(len(fine.suppliers)):
+            q = get(f'q_{j}_{tc}') if first else 0.0
+            hint[f'q_{j}_{t}'] = q
+            hint[f'z_{j}_{t}'] = float(q > EPS)
+
+        for site in ('', '2'):
+            x = get(f'x{site}_{tc}') if first else 0.0
+            hint[f'x{site}_{t}'] = x
+            hint[f'w_prod{site}_{t}'] = float(x > EPS)
+
+        for k in range(1, fine.K + 1):
+            hint[f'i_{k}_{t}'] = min(get(f'i_{k}_{tc}'), fine.inventory_capacity)
+            if k < fine.K:
+                y = get(f'y_{k}_{tc}') / group_size[tc]
+                hint[f'y_{k}_{t}'] = y
+                hint[f'w_trans_{k}_{t}'] = float(y > EPS)
+
+    for b in range(fine.base_T):
+        for site in ('', '2'):
+            hint[f'w_prod{site}_group_{b}'] = float(
+                any(hint[f'w_prod{site}_{t}'] > 0.5 for t in range(b * mf, (b + 1) * mf)))
+
+    for j, supplier in enumerate(fine.suppliers):
+        for g in range(len(supplier['price_intervals'])):
+            hint[f's_{j}_{g}'] = get(f's_{j}_{g}')
+            hint[f'r_{j}_{g}'] = get(f'r_{j}_{g}')
+    return hint
+
+
+def pm_to_pmd(values, pm, pmd, evaluator=None):
+    """
+    values: {tên biến: giá trị} của nghiệm trên `pm` (mode 'Pm'); `pmd` cùng m, num_stages.
+    Trả về (hint, cost): hint {tên biến: giá trị} cho model dựng trên `pmd`, cost = chi phí
+    của phương án trên pmd nếu khả thi (dùng làm cutoff), ngược lại None và hint bỏ biến
+    freight để SCIP hoàn thiện như lift_solution().
+    """
+    if (pm.K, pm.m, pm.base_T) != (pmd.K, pmd.m, pmd.base_T):
+        raise ValueError("pm và pmd phải cùng num_stages, m và số kỳ gốc")
+    evaluator = evaluator or PlanEvaluator(pmd)
+    m, T, J, K = pmd.m, pmd.T, len(pmd.suppliers), pmd.K
+    get = lambda name: values.get(name, 0.0)
+
+    def base_totals(a):
+        return a.reshape(a.shape[:-1] + (pmd.base_T, m)).sum(axis=-1)
+
+    q = np.array([[get(f'q_{j}_{t}') for t in range(T)] for j in range(J)])
+    x = np.array([get(f'x_{t}') for t in range(T)])
+    x2 = np.array([get(f'x2_{t}') for t in range(T)])
+    y = np.array([[get(f'y_{k}_{t}') for t in range(T)] for k in range(1, K)])
+
+    plan = {'q': np.zeros_like(q)}
+    plan['q'][:, ::m] = base_totals(q)
+    for name, flow in (('x', x), ('x2', x2), ('y', y)):
+        plan[name] = np.repeat(base_totals(flow) / m, m, axis=-1)
+    plan['i'] = evaluator.inventories(plan['q'], plan['x'], plan['x2'], plan['y'])
+
+    result = evaluator.evaluate(**plan)
+    hint = dict(zip(evaluator.var_names, evaluator.decode(**plan)[0].tolist()))
+    if not result['feasible']:
+        return {name: value for name, value in hint.items() if not name.startswith(('f_', 'y_fr_'))}, None
+    return hint, result['total']
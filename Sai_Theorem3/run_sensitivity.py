@@ -1,6 +1,6 @@
-import time
 from data_loader import SupplyChainData
 from dynamic_scm_milp import SupplyChainModel
+from result_cache import solve_cached
 
 BASE_PERIOD_DAYS = 12
 
@@ -8,23 +8,10 @@ def solve_one(m, mode):
     """
     Run model once with given m and mode ('Pm', 'Pmd', or 'Pmd_nc').
     Returns: (data, model, objective_value, cpu_time)
+    Instances solved before (same data + model) are read back from result_cache.
     """
     data = SupplyChainData(m=m, mode=mode)
-    model = SupplyChainModel(data)
-
-    start_time = time.time()
-    model.create_variables()
-    model.add_constraints()
-    model.set_objective()
-    success = model.solve()
-    end_time = time.time()
-
-    duration = end_time - start_time
-    
-    if success:
-        obj_val = model.solver.Objective().Value()
-    else:
-        obj_val = float('inf')
+    model, obj_val, duration, _ = solve_cached(data, SupplyChainModel)
 
     return data, model, obj_val, duration
 
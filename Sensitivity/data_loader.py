@@ -1,3 +1,6 @@
+import numpy as np
+
+
 class SupplyChainData:
     def __init__(self, m=1, mode='Pm'):
         self.m = m
@@ -7,61 +10,45 @@ class SupplyChainData:
         self.base_T = 5  # Lưu lại số kỳ gốc để dùng trong Model
         self.K = 4
         
-        base_demand = [100, 200, 250, 300, 200]
-        base_holding_cost = [5, 5, 5, 6, 6]
-        base_prod_fixed = [2500, 2500, 3000, 3000, 3500]
-        base_prod_var   = [10, 10, 12, 12, 13]
+        base_demand = np.array([100, 200, 250, 300, 200])
+        base_holding_cost = np.array([5, 5, 5, 6, 6])
+        base_prod_fixed = np.array([2500, 2500, 3000, 3000, 3500])
+        base_prod_var   = np.array([10, 10, 12, 12, 13])
         
-        base_prod_cap = [270] * self.base_T
-        base_trans_cap = [300] * self.base_T
+        base_prod_cap = np.full(self.base_T, 270)
+        base_trans_cap = np.full(self.base_T, 300)
         
         # --- 2. BIẾN ĐỔI DỮ LIỆU ---
+        # Mọi dữ liệu theo kỳ con là mảng NumPy liên tục, mở rộng bằng np.repeat
+        # (mỗi kỳ gốc -> m kỳ con) thay vì vòng lặp extend.
         self.T = self.base_T * m 
         
         # A. Xử lý Nhu cầu (Demand) - Giữ nguyên logic cũ
-        self.demand = [0] * self.T
-        if m == 1:
-            self.demand = base_demand
-        else:
-            for t_old in range(self.base_T):
-                val = base_demand[t_old]
-                if mode == 'Pm':
-                    idx = (t_old + 1) * m - 1 
-                    self.demand[idx] = val
-                elif mode == 'Pmd':
-                    dist_val = val / m
-                    for sub in range(m):
-                        self.demand[t_old * m + sub] = dist_val
+        self.demand = np.zeros(self.T)
+        if m == 1 or mode == 'Pm':
+            self.demand[m - 1::m] = base_demand  # dồn vào kỳ con cuối của mỗi kỳ gốc
+        elif mode == 'Pmd':
+            self.demand[:] = np.repeat(base_demand / m, m)
 
         # B. Xử lý Chi phí & Năng lực 
         
         # 1. Holding cost: Vẫn chia m (đúng theo định lý 2 condition i )
-        self.holding_cost = []
-        for h in base_holding_cost:
-            self.holding_cost.extend([h / m] * m)
+        self.holding_cost = np.repeat(base_holding_cost / m, m)
             
         # 2. Production Fixed Cost: KHÔNG CHIA m (Theo condition ii )
         # Model sẽ dùng biến w_group để tính phí này 1 lần cho cả nhóm
-        self.prod_fixed_cost = []
-        for f in base_prod_fixed:
-            self.prod_fixed_cost.extend([f] * m) 
+        self.prod_fixed_cost = np.repeat(base_prod_fixed, m)
             
         # 3. Production Variable Cost: Giữ nguyên
-        self.prod_var_cost = []
-        for v in base_prod_var:
-            self.prod_var_cost.extend([v] * m)
+        self.prod_var_cost = np.repeat(base_prod_var, m)
 
         # 4. Production Capacity: KHÔNG CHIA m Ở ĐÂY
         # Để nguyên giá trị gốc, Model sẽ ràng buộc: Sum(sub_periods) <= Base_Cap
-        self.prod_capacity = []
-        for c in base_prod_cap:
-            self.prod_capacity.extend([c] * m)
+        self.prod_capacity = np.repeat(base_prod_cap, m)
             
         # 5. Transport Capacity: Giữ nguyên logic cũ (chia m) vì bài báo không nhấn mạnh
         # thay đổi capacity vận chuyển, ta giả định nó chia đều theo thời gian.
-        self.trans_capacity = []
-        for c in base_trans_cap:
-            self.trans_capacity.extend([c / m] * m)
+        self.trans_capacity = np.repeat(base_trans_cap / m, m)
             
         self.inventory_capacity = 400
 
@@ -79,12 +66,6 @@ class SupplyChainData:
         self.global_min_order_later = 20
         self.global_max_order_size = 500
 
-        def expand_cap(arr_cap, m_factor):
-            new_arr = []
-            for val in arr_cap:
-                new_arr.extend([val] * m_factor) 
-            return new_arr
-
         sup1_off1_cap = [300, 450, 450, 450, 450]
         sup1_off2_cap = [0, 0, 50, 150, 400]
         sup2_cap      = [200, 400, 650, 900, 1200]
@@ -94,7 +75,7 @@ class SupplyChainData:
         self.suppliers = [
             {
                 "name": "Sup1_Offer1",
-                "cumulative_capacity": expand_cap(sup1_off1_cap, m),
+                "cumulative_capacity": np.repeat(sup1_off1_cap, m),
                 "primary_cost": 550,     # <--- GIỮ NGUYÊN
                 "secondary_cost": 1000,  # <--- GIỮ NGUYÊN
                 "min_order": 50,
@@ -102,7 +83,7 @@ class SupplyChainData:
             },
             {
                 "name": "Sup1_Offer2",
-                "cumulative_capacity": expand_cap(sup1_off2_cap, m),
+                "cumulative_capacity": np.repeat(sup1_off2_cap, m),
                 "primary_cost": 550,     # <--- GIỮ NGUYÊN
                 "secondary_cost": 1000,  # <--- GIỮ NGUYÊN
                 "min_order": 50,
@@ -110,7 +91,7 @@ class SupplyChainData:
             },
             {
                 "name": "Sup2",
-                "cumulative_capacity": expand_cap(sup2_cap, m),
+                "cumulative_capacity": np.repeat(sup2_cap, m),
                 "primary_cost": 500,     # <--- GIỮ NGUYÊN
                 "secondary_cost": 1000,  # <--- GIỮ NGUYÊN
                 "min_order": 50,
@@ -118,7 +99,7 @@ class SupplyChainData:
             },
             {
                 "name": "Sup3",
-                "cumulative_capacity": expand_cap(sup3_cap, m),
+                "cumulative_capacity": np.repeat(sup3_cap, m),
                 "primary_cost": 600,     # <--- GIỮ NGUYÊN
                 "secondary_cost": 1050,  # <--- GIỮ NGUYÊN
                 "min_order": 50,
@@ -1,6 +1,6 @@
-import time
 from data_loader import SupplyChainData
 from dynamic_scm_milp import SupplyChainModel
+from result_cache import solve_cached
 
 # Giả sử bài toán gốc có 5 kỳ và tổng horizon là 60 ngày => mỗi kỳ gốc dài 12 ngày
 BASE_PERIOD_DAYS = 12
@@ -9,23 +9,10 @@ def solve_one(m, mode):
     """
     Chạy 1 lần mô hình với hệ số m và mode ('Pm' hoặc 'Pmd').
     Trả về: (data, model, objective_value, cpu_time)
+    Instance đã giải trước đó (cùng data + model) được đọc lại từ result_cache.
     """
     data = SupplyChainData(m=m, mode=mode)
-    model = SupplyChainModel(data)
-
-    start_time = time.time()
-    model.create_variables()
-    model.add_constraints()
-    model.set_objective()
-    success = model.solve()
-    end_time = time.time()
-
-    duration = end_time - start_time
-    
-    if success:
-        obj_val = model.solver.Objective().Value()
-    else:
-        obj_val = float('inf')
+    model, obj_val, duration, _ = solve_cached(data, SupplyChainModel)
 
     return data, model, obj_val, duration
 